@@ -110,12 +110,44 @@ class BlogCoordinator {
   /**
    * Phase 2b: Figure Extractor
    */
-  async runFigureExtractor() {
+  async runFigureExtractor(action) {
     console.log('Phase 2b: Running Figure Extractor Agent...');
+    // On rework, only re-extract what the feedback points at
+    const selectorArgs = action ? this.buildFigureReworkArgs(action) : [];
+    if (selectorArgs.length > 0) {
+      console.log(`Partial re-extraction: ${selectorArgs.join(' ')}`);
+    }
     // Agent execution via Claude Code Task tool
     return { /* figures metadata */ };
   }
 
+  /**
+   * Map Master feedback such as "Figure 3 is cropped badly" to the
+   * selector flags of scripts/extract_figures_improved.py
+   */
+  buildFigureReworkArgs(action) {
+    const text = typeof action === 'string' ? action : JSON.stringify(action || '');
+    const figures = new Set();
+    const pages = new Set();
+
+    for (const match of text.matchAll(/\b(fig(?:ure)?|table)\.?\s*(\d+)/gi)) {
+      const type = match[1].toLowerCase() === 'table' ? 'table' : 'figure';
+      figures.add(`${type}:${match[2]}`);
+    }
+    for (const match of text.matchAll(/\bpage\s*(\d+)/gi)) {
+      pages.add(match[1]);
+    }
+
+    const args = [];
+    if (figures.size > 0) {
+      args.push('--figures', [...figures].join(','));
+    }
+    if (pages.size > 0) {
+      args.push('--pages', [...pages].join(','));
+    }
+    return args;
+  }
+
   /**
    * Phase 2c: Cover Designer
    */
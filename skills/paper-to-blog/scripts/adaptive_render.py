@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Adaptive Per-Figure Render Resolution
+
+Instead of cropping every figure out of a page raster rendered at one fixed
+--scale, re-render just the figure's region straight from the PDF at a zoom
+chosen so the output is about `target_width` pixels wide. Small inset
+figures get enough pixels and full-page figures are not over-rendered; the
+page raster itself is then only needed for detection and can stay small.
+
+render_pdf_pages renders the page rasters themselves for every extractor,
+through RENDER_CACHE when extraction_server.py has installed one.
+
+Requirements:
+    pip install pymupdf
+"""
+
+import os
+
+import fitz  # PyMuPDF
+
+from tracing import span
+
+
+DEFAULT_TARGET_WIDTH = 1600  # blog header width
+MIN_ZOOM = 1.0
+MAX_ZOOM = 8.0
+
+# Optional page render cache with get(key)/put(key, png_bytes), installed by
+# extraction_server.py so rework cycles on the same PDF skip re-rendering
+RENDER_CACHE = None
+
+
+def render_pdf_pages(pdf_path, output_dir, scale=2.0, pages=None, prefix='temp_page_'):
+    """Render PDF pages (all, or the 0-based page numbers in `pages`) to PNG files.
+
+    Returns (page_num, image_path) pairs in page order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rendered_pages = []
+    doc = fitz.open(pdf_path)
+
+    cache_key = None
+    if RENDER_CACHE is not None:
+        stat = os.stat(pdf_path)
+        cache_key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size, scale)
+
+    for page_num in (sorted(pages) if pages is not None else range(len(doc))):
+        with span('render', page=page_num + 1) as s:
+            page_image_path = os.path.join(output_dir, f"{prefix}{page_num:03d}.png")
+            cached = RENDER_CACHE.get(cache_key + (page_num,)) if cache_key else None
+            if cached is not None:
+                with open(page_image_path, 'wb') as f:
+                    f.write(cached)
+                s.set(cache_hit=True, bytes_written=len(cached))
+            else:
+                pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
+                pix.save(page_image_path)
+                s.set(pixels=pix.width * pix.height, bytes_written=os.path.getsize(page_image_path))
+                if cache_key:
+                    with open(page_image_path, 'rb') as f:
+                        RENDER_CACHE.put(cache_key + (page_num,), f.read())
+        rendered_pages.append((page_num, page_image_path))
+        print(f"Rendered page {page_num + 1}/{len(doc)}: {page_image_path}")
+
+    doc.close()
+    return rendered_pages
+
+
+def adaptive_zoom(clip_width_pt, target_width, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """Zoom factor that renders a region `clip_width_pt` wide at ~target_width pixels."""
+    if clip_width_pt <= 0:
+        return min_zoom
+    return max(min_zoom, min(max_zoom, target_width / clip_width_pt))
+
+
+def render_clip(page, box, target_width, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """
+    Render one region of a PDF page at an adaptive zoom.
+
+    Args:
+        page: fitz.Page to render from
+        box: (left, top, right, bottom) as fractions (0-1) of the page
+        target_width: Desired output width in pixels
+
+    Returns:
+        (fitz.Pixmap, zoom) - the pixmap supports .save(path), .width and .height
+    """
+    page_rect = page.rect
+    clip = fitz.Rect(
+        page_rect.x0 + box[0] * page_rect.width,
+        page_rect.y0 + box[1] * page_rect.height,
+        page_rect.x0 + box[2] * page_rect.width,
+        page_rect.y0 + box[3] * page_rect.height
+    ) & page_rect
+    zoom = adaptive_zoom(clip.width, target_width, min_zoom, max_zoom)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+    return pix, zoom
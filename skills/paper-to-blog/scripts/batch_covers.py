@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Rate-Limited Batch Cover Generation
+
+Generates covers for a whole corpus in one process instead of one
+generate_cover.py process per post. Posts come from a JSONL file of
+{"id", "title", "content"} records; generation runs on asyncio with a
+shared token-bucket limiter (requests per second across all workers), a
+concurrency cap, and a shared back-off when the API answers 429. Every
+outcome is appended to a JSONL manifest, so an interrupted or partly failed
+run resumes where it stopped.
+
+Usage:
+    python batch_covers.py posts.jsonl -o covers/ [--rate 2] [--burst 4] [--concurrency 8]
+    python batch_covers.py posts.jsonl -o covers/ --resume        # skip ids already done
+
+Manifest (<output>/manifest.jsonl by default), one line per attempt run:
+    {"id": ..., "status": "ok", "path": ..., "attempts": 1, "seconds": 0.8}
+    {"id": ..., "status": "failed", "error": ..., "attempts": 4, "seconds": 7.1}
+"attempts" counts generation requests (0 for a cache hit). A generation is
+only retried when the API cannot have started it (429/5xx, or no
+connection); a failed download is retried on the same image URL, which a
+failed entry records as "url".
+
+Testing against the local stub:
+    python cover_api_stub.py --latency-ms 500 --rate-429 0.2 &
+    ZHIPUAI_API_URL=http://127.0.0.1:8790/api/paas/v4/images/generations ZHIPUAI_API_KEY=test \\
+        python batch_covers.py posts.jsonl -o /tmp/covers --rate 5
+
+Requirements:
+    pip install requests pillow
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+import requests
+
+from cover_cache import CoverCache, DEFAULT_CACHE_DIR
+from generate_cover import (RETRY_BACKOFF, connect_failed, construct_prompt, copy_cached_cover, create_session,
+                            get_api_key, request_image, save_cover)
+
+
+DEFAULT_RATE = 2.0        # generation requests per second, shared by all workers
+DEFAULT_BURST = 4
+DEFAULT_CONCURRENCY = 8
+DEFAULT_ATTEMPTS = 4
+MAX_BACKOFF = 30.0
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket: `rate` tokens per second, at most `burst` stored.
+
+    pause() empties the bucket and holds every waiter until the deadline,
+    so one 429 slows the whole batch down rather than just its own worker.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+def load_posts(path):
+    """Records with an 'id' from a JSONL file; blank lines are skipped."""
+    posts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'id' not in record:
+                raise ValueError(f"{path}:{line_no}: record has no 'id'")
+            posts.append(record)
+    return posts
+
+
+def load_manifest(path):
+    """Last manifest entry per id (later runs override earlier ones)."""
+    entries = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[str(entry['id'])] = entry
+    return entries
+
+
+def output_name(post_id):
+    """Filesystem-safe cover file name for a post id."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(post_id)) + '.png'
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait after a failed attempt: Retry-After if the API sent one, else exponential."""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(MAX_BACKOFF, float(response.headers.get('Retry-After', '')))
+        except ValueError:
+            pass
+    return min(MAX_BACKOFF, RETRY_BACKOFF * 2 ** attempt)
+
+
+def _status(error):
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def is_retryable(error):
+    """Generation failures that cannot have produced (and billed) an image: 429/5xx or no connection."""
+    status = _status(error)
+    return connect_failed(error) or (status is not None and (status == 429 or status >= 500))
+
+
+def is_download_retryable(error):
+    """Download failures worth fetching the same image URL again for."""
+    status = _status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+async def generate_one(post, output_dir, limiter, semaphore, options, stats):
+    """Generate one post's cover with limiter-paced retries; returns its manifest entry."""
+    path = os.path.join(output_dir, output_name(post['id']))
+    prompt = construct_prompt(post.get('content') or post.get('title', ''), post.get('title'))
+    start = time.perf_counter()
+
+    def entry(attempts, error=None, **fields):
+        result = {'id': post['id'], 'status': 'failed' if error else 'ok', 'attempts': attempts,
+                  'seconds': round(time.perf_counter() - start, 3), **fields}
+        if error:
+            result['error'] = f"{type(error).__name__}: {error}"
+        else:
+            result['path'] = path
+        return result
+
+    async with semaphore:
+        if await asyncio.to_thread(copy_cached_cover, prompt, path, options['cache'], verbose=False):
+            return entry(0)
+
+        # Generation: the billed request, resent only when the API cannot have started it
+        for attempt in range(1, options['attempts'] + 1):
+            await limiter.acquire()
+            try:
+                image = await asyncio.to_thread(request_image, prompt, options['api_key'], options['session'],
+                                                options['api_url'])
+                break
+            except Exception as e:
+                status = _status(e)
+                if status == 429:
+                    stats['429'] += 1
+                if not is_retryable(e) or attempt == options['attempts']:
+                    return entry(attempt, e)
+                delay = retry_delay(e, attempt)
+                if status == 429:
+                    limiter.pause(delay)
+                await asyncio.sleep(delay)
+
+        # Download: retried on the URL already returned, never by generating again
+        for download in range(1, options['attempts'] + 1):
+            try:
+                await asyncio.to_thread(save_cover, image, prompt, path, options['session'], options['cache'],
+                                        verbose=False)
+                return entry(attempt)
+            except Exception as e:
+                if not is_download_retryable(e) or download == options['attempts']:
+                    return entry(attempt, e, url=image.get('url'))
+                await asyncio.sleep(retry_delay(e, download))
+
+
+async def run_batch(posts, output_dir, manifest_path, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                    concurrency=DEFAULT_CONCURRENCY, attempts=DEFAULT_ATTEMPTS, api_key=None,
+                    api_url=None, cache=None):
+    """
+    Generate covers for `posts`, appending each outcome to the manifest as it completes.
+
+    Returns:
+        Summary dict (counts, 429 responses, wall time, covers per second)
+    """
+    if attempts < 1:
+        raise ValueError(f"attempts must be at least 1, got {attempts}")
+    os.makedirs(output_dir, exist_ok=True)
+    # Retries live here, paced by the shared limiter, not inside urllib3
+    options = {
+        'api_key': api_key or get_api_key(),
+        'api_url': api_url,
+        'session': create_session(retries=0, pool_size=max(concurrency, 10)),
+        'cache': cache,
+        'attempts': attempts
+    }
+    limiter = TokenBucket(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {'429': 0}
+    counts = {'ok': 0, 'failed': 0}
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(generate_one(post, output_dir, limiter, semaphore, options, stats))
+             for post in posts]
+    with open(manifest_path, 'a', encoding='utf-8') as manifest:
+        for task in asyncio.as_completed(tasks):
+            entry = await task
+            counts[entry['status']] += 1
+            manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            manifest.flush()
+            detail = entry.get('path') or entry.get('error')
+            print(f"[{counts['ok'] + counts['failed']}/{len(posts)}] {entry['id']}: "
+                  f"{entry['status']} after {entry['attempts']} attempt(s) - {detail}")
+
+    elapsed = time.perf_counter() - start
+    return {'total': len(posts), 'ok': counts['ok'], 'failed': counts['failed'], 'rate_limited': stats['429'],
+            'seconds': round(elapsed, 2), 'covers_per_s': round(counts['ok'] / elapsed, 2) if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate covers for a JSONL corpus of posts.')
+    parser.add_argument('posts', help='JSONL file of {"id", "title", "content"} records')
+    parser.add_argument('--output-dir', '-o', default='covers', help='Directory for <id>.png covers (default: covers)')
+    parser.add_argument('--manifest', help='Manifest path (default: <output-dir>/manifest.jsonl)')
+    parser.add_argument('--resume', action='store_true', help='Skip ids whose last manifest entry is ok')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Generation requests per second across all workers (default: {DEFAULT_RATE})')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST,
+                        help=f'Requests allowed back to back after idle time (default: {DEFAULT_BURST})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Covers in flight at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--attempts', type=int, default=DEFAULT_ATTEMPTS,
+                        help=f'Generation attempts per cover on 429/5xx/connect errors, and download '
+                             f'attempts per generated image (default: {DEFAULT_ATTEMPTS})')
+    parser.add_argument('--api-key', help='ZhipuAI API key (uses ZHIPUAI_API_KEY env var if not provided)')
+    parser.add_argument('--api-url', help='Images endpoint (default: ZHIPUAI_API_URL env var or the ZhipuAI API)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the prompt-keyed image cache')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Image cache directory (default: {DEFAULT_CACHE_DIR})')
+    args = parser.parse_args()
+
+    manifest_path = args.manifest or os.path.join(args.output_dir, 'manifest.jsonl')
+    try:
+        posts = load_posts(args.posts)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.resume:
+        done = {post_id for post_id, entry in load_manifest(manifest_path).items()
+                if entry['status'] == 'ok' and os.path.exists(entry.get('path', ''))}
+        skipped = sum(1 for post in posts if str(post['id']) in done)
+        posts = [post for post in posts if str(post['id']) not in done]
+        print(f"Resuming: {skipped} already done, {len(posts)} to generate")
+
+    if not posts:
+        print("Nothing to generate")
+        return 0
+
+    cache = None if args.no_cache else CoverCache(args.cache_dir)
+    try:
+        summary = asyncio.run(run_batch(posts, args.output_dir, manifest_path, args.rate, args.burst,
+                                        args.concurrency, args.attempts, args.api_key, args.api_url, cache))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    print(f"Manifest: {manifest_path}")
+    return 0 if summary['failed'] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the Figure-Extraction Hot Paths
+
+Times each stage of the extraction pipeline in isolation (render, text scan,
+detection, crop, encode, metadata write) on the attention-paper fixture and
+on generated synthetic PDFs. Every (input, stage) pair runs in a fresh
+process so peak RSS is attributable; stages that precede the measured one
+run untimed as setup.
+
+Usage:
+    python benchmark_extraction.py run --output baseline.json [--sizes 10,100,1000]
+    python benchmark_extraction.py compare baseline.json current.json [--threshold 0.10] [--min-delta-ms 5]
+
+Requirements:
+    pip install pymupdf pillow numpy
+"""
+
+import fitz  # PyMuPDF
+from PIL import Image
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from extract_figures_improved import detect_page_elements, has_text_layer, page_text_elements
+
+
+STAGES = ('render', 'text_scan', 'detect', 'crop', 'encode', 'metadata')
+DEFAULT_SIZES = (10, 100, 1000)
+# Smallest absolute slowdown reported as a regression: below it, run-to-run noise on
+# millisecond stages (e.g. the metadata write) exceeds any relative threshold
+MIN_DELTA_S = 0.005
+MIN_DELTA_MB = 5.0
+FIXTURE_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test', 'fixtures', 'attention_paper.pdf')
+
+
+class StageTimer:
+    """Accumulates wall and CPU time over repeated measured sections."""
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall += time.perf_counter() - self._wall_start
+        self.cpu += time.process_time() - self._cpu_start
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def generate_synthetic_pdf(path, num_pages):
+    """Write a paper-like PDF: text columns, a drawn figure or table, and captions."""
+    doc = fitz.open()
+    line = "Synthetic body text for benchmarking the figure extraction pipeline. " * 2
+
+    for page_num in range(num_pages):
+        page = doc.new_page(width=612, height=792)
+        for row in range(12):
+            page.insert_text((54, 60 + row * 12), line[:95], fontsize=8)
+
+        if page_num % 3 == 2:
+            # Table: ruled grid with numbers
+            for r in range(7):
+                page.draw_line((100, 260 + r * 30), (512, 260 + r * 30))
+            for c in range(5):
+                page.draw_line((100 + c * 103, 260), (100 + c * 103, 440))
+            for r in range(6):
+                for c in range(4):
+                    page.insert_text((110 + c * 103, 280 + r * 30), f"{r * c + page_num:.2f}", fontsize=8)
+            page.insert_text((100, 460), f"Table {page_num // 3 + 1}: Synthetic results table.", fontsize=9)
+        else:
+            # Figure: bar chart with a gradient-like fill and a line plot
+            for b in range(10):
+                height = 40 + (b * 37 + page_num * 11) % 150
+                color = (b / 10, 0.3, 1 - b / 10)
+                page.draw_rect(fitz.Rect(110 + b * 38, 450 - height, 140 + b * 38, 450), color=color, fill=color)
+            points = [fitz.Point(110 + i * 19, 300 + ((i * 53 + page_num) % 80)) for i in range(20)]
+            page.draw_polyline(points, color=(0, 0, 0), width=1.5)
+            page.insert_text((100, 470), f"Figure {page_num + 1}: Synthetic chart.", fontsize=9)
+
+        for row in range(20):
+            page.insert_text((54, 500 + row * 12), line[:95], fontsize=8)
+
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def run_stage(stage, pdf_path, scale, workdir):
+    """Run the pipeline up to `stage`, timing only that stage."""
+    timer = StageTimer()
+    null = _NullTimer()
+
+    def timed(name):
+        return timer if name == stage else null
+
+    last = STAGES.index(stage)
+    pages_dir = os.path.join(workdir, 'pages')
+    figures_dir = os.path.join(workdir, 'figures')
+    os.makedirs(pages_dir, exist_ok=True)
+    os.makedirs(figures_dir, exist_ok=True)
+
+    doc = fitz.open(pdf_path)
+    records = []
+    pixels = 0
+
+    # Same detection inputs as extract_figures_improved.py, so 'detect' times the production call
+    text_elements = {}
+    if last >= STAGES.index('text_scan'):
+        with timed('text_scan'):
+            text_elements = page_text_elements(doc)
+
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        page_image_path = os.path.join(pages_dir, f"temp_page_{page_num:03d}.png")
+
+        if last >= STAGES.index('render') and stage != 'text_scan':
+            with timed('render'):
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+                pix.save(page_image_path)
+            pixels += pix.width * pix.height
+
+        if last < STAGES.index('detect'):
+            continue
+
+        scanned = not has_text_layer(page)
+        with timed('detect'):
+            elements = detect_page_elements(page, page_image_path, text_elements[page_num], scanned=scanned)
+
+        if last >= STAGES.index('crop'):
+            crops = []
+            with timed('crop'):
+                page_img = Image.open(page_image_path)
+                width, height = page_img.size
+                for element in elements:
+                    box = (int(element['left'] / 100 * width), int(element['top'] / 100 * height),
+                           int(element['right'] / 100 * width), int(element['bottom'] / 100 * height))
+                    cropped = page_img.crop(box)
+                    cropped.load()
+                    crops.append(cropped)
+
+            for idx, cropped in enumerate(crops):
+                filename = f"figure{page_num + 1}_{idx + 1}.png"
+                if last >= STAGES.index('encode'):
+                    with timed('encode'):
+                        cropped.save(os.path.join(figures_dir, filename))
+                records.append({'filename': filename, 'page': page_num + 1, 'number': idx + 1,
+                                'bbox': {k: elements[idx][k] for k in ('top', 'left', 'bottom', 'right')}})
+
+        os.remove(page_image_path)
+
+    if stage == 'metadata':
+        with timed('metadata'):
+            with open(os.path.join(workdir, 'figures_metadata.json'), 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
+
+    num_pages = len(doc)
+    doc.close()
+
+    return {
+        'wall_s': round(timer.wall, 4),
+        'cpu_s': round(timer.cpu, 4),
+        'pages': num_pages,
+        'pixels': pixels,
+        'ms_per_page': round(timer.wall / max(num_pages, 1) * 1000, 3)
+    }
+
+
+def _run_isolated(stage, pdf_path, scale):
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        result = run_stage(stage, pdf_path, scale, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_benchmarks(inputs, stages, scale, repeat):
+    """Run every stage on every input in a fresh process; keep the best of `repeat` runs."""
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+
+    for name, pdf_path in inputs:
+        for stage in stages:
+            runs = []
+            for _ in range(repeat):
+                with ctx.Pool(1) as pool:
+                    runs.append(pool.apply(_run_isolated, (stage, pdf_path, scale)))
+            best = min(runs, key=lambda r: r['wall_s'])
+            best['peak_rss_mb'] = max(r['peak_rss_mb'] for r in runs)
+            results[f"{name}/{stage}"] = best
+            print(f"{name:<16} {stage:<10} wall {best['wall_s']:>8.3f}s  cpu {best['cpu_s']:>8.3f}s  "
+                  f"rss {best['peak_rss_mb']:>7.1f} MB  ({best['ms_per_page']:.2f} ms/page)")
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, current, threshold, min_delta_s=MIN_DELTA_S, min_delta_mb=MIN_DELTA_MB):
+    """
+    Return (key, metric, old, new, change) tuples for metrics that regressed beyond threshold.
+
+    A metric only counts as regressed if it also grew by at least min_delta_s
+    seconds (wall/CPU time) or min_delta_mb MB (peak RSS).
+    """
+    min_delta = {'wall_s': min_delta_s, 'cpu_s': min_delta_s, 'peak_rss_mb': min_delta_mb}
+    regressions = []
+    for key, old in baseline['results'].items():
+        new = current['results'].get(key)
+        if new is None:
+            continue
+        for metric in ('wall_s', 'cpu_s', 'peak_rss_mb'):
+            if old[metric] <= 0:
+                continue
+            change = (new[metric] - old[metric]) / old[metric]
+            if change > threshold and new[metric] - old[metric] >= min_delta[metric]:
+                regressions.append((key, metric, old[metric], new[metric], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the figure-extraction pipeline stages.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Run the benchmark suite and write a JSON baseline')
+    run.add_argument('--output', '-o', default='benchmark_results.json', help='Output JSON path')
+    run.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                     help='Synthetic PDF page counts (default: 10,100,1000; empty to skip)')
+    run.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages to run')
+    run.add_argument('--scale', type=float, default=2.0, help='Rendering scale factor (default: 2.0)')
+    run.add_argument('--repeat', type=int, default=1, help='Runs per measurement, best is kept (default: 1)')
+    run.add_argument('--cache-dir', default=os.path.join(tempfile.gettempdir(), 'paper_to_blog_bench'),
+                     help='Where generated synthetic PDFs are cached')
+
+    compare = subparsers.add_parser('compare', help='Flag regressions between two result files')
+    compare.add_argument('baseline', help='Baseline JSON (e.g. from the previous commit)')
+    compare.add_argument('current', help='Current JSON')
+    compare.add_argument('--threshold', type=float, default=0.10, help='Allowed relative slowdown (default: 0.10)')
+    compare.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_S * 1000,
+                         help=f'Ignore time slowdowns smaller than this (default: {MIN_DELTA_S * 1000:g})')
+    compare.add_argument('--min-delta-mb', type=float, default=MIN_DELTA_MB,
+                         help=f'Ignore peak RSS growth smaller than this (default: {MIN_DELTA_MB:g})')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+
+        regressions = compare_results(baseline, current, args.threshold, args.min_delta_ms / 1000, args.min_delta_mb)
+        print(f"Baseline: {baseline['meta'].get('commit')}  Current: {current['meta'].get('commit')}")
+        for key, metric, old, new, change in regressions:
+            print(f"REGRESSION {key:<28} {metric:<12} {old:>9.3f} -> {new:>9.3f} (+{change:.0%})")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%} "
+                  f"and {args.min_delta_ms:g} ms / {args.min_delta_mb:g} MB")
+            sys.exit(1)
+        print("No regressions")
+        return
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    inputs = [('attention_paper', os.path.abspath(FIXTURE_PDF))]
+    os.makedirs(args.cache_dir, exist_ok=True)
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        path = os.path.join(args.cache_dir, f"synthetic_{size}.pdf")
+        if not os.path.exists(path):
+            print(f"Generating synthetic PDF with {size} pages...")
+            generate_synthetic_pdf(path, size)
+        inputs.append((f"synthetic_{size}", path))
+
+    results = run_benchmarks(inputs, stages, args.scale, args.repeat)
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pymupdf': fitz.VersionBind,
+            'scale': args.scale,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local Stub of the ZhipuAI Images Endpoint
+
+Plays the CogView generations API on localhost so generate_cover.py can be
+exercised without an API key or quota: POSTs return an image URL on this
+server, and GETs serve a PNG derived from the prompt. Latency and 429/500
+responses can be injected to test retries, backoff and rate limiting.
+
+Usage:
+    python cover_api_stub.py [--port 8790] [--latency-ms 200] [--rate-429 0.2] [--rate-500 0.05]
+    ZHIPUAI_API_URL=http://127.0.0.1:8790/api/paas/v4/images/generations \
+        ZHIPUAI_API_KEY=test python generate_cover.py -c "..." --candidates 3
+
+Protocol:
+    POST /api/paas/v4/images/generations -> {"created": ..., "data": [{"url": ...}]}
+    GET  /images/<id>.png                -> image/png
+    GET  /stats                          -> request counters
+
+Requirements:
+    pip install pillow
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+
+GENERATIONS_PATH = "/api/paas/v4/images/generations"
+
+
+class StubState:
+    """Injected faults, generated images and counters shared by all handler threads."""
+
+    def __init__(self, latency_ms=0, rate_429=0.0, rate_500=0.0, retry_after=0, seed=None):
+        self.latency_ms = latency_ms
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.images = {}
+        self.counts = {'generations': 0, 'downloads': 0, '429': 0, '500': 0}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def fault(self):
+        """'429', '500' or None for the next generation request."""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.rate_429:
+            return '429'
+        if roll < self.rate_429 + self.rate_500:
+            return '500'
+        return None
+
+
+def render_stub_image(prompt, size):
+    """PNG bytes of a flat image coloured by the prompt hash."""
+    width, height = (int(v) for v in size.lower().split('x'))
+    digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), tuple(digest[:3])).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != GENERATIONS_PATH:
+            self._send(404, {'error': {'message': 'not found'}})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send(400, {'error': {'message': 'invalid JSON'}})
+            return
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send(401, {'error': {'message': 'missing API key'}})
+            return
+
+        self.state.count('generations')
+        time.sleep(self.state.latency_ms / 1000)
+
+        fault = self.state.fault()
+        if fault == '429':
+            self.state.count('429')
+            self._send(429, {'error': {'code': '1302', 'message': 'rate limit reached'}},
+                       headers={'Retry-After': str(self.state.retry_after)})
+            return
+        if fault == '500':
+            self.state.count('500')
+            self._send(500, {'error': {'message': 'internal error'}})
+            return
+
+        image = render_stub_image(payload.get('prompt', ''), payload.get('size', '1024x1024'))
+        image_id = hashlib.sha256(image).hexdigest()[:16]
+        with self.state.lock:
+            self.state.images[image_id] = image
+        host, port = self.server.server_address[:2]
+        self._send(200, {'created': int(time.time()),
+                         'data': [{'url': f'http://{host}:{port}/images/{image_id}.png'}]})
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.state.lock:
+                self._send(200, dict(self.state.counts, images=len(self.state.images)))
+            return
+        if self.path.startswith('/images/') and self.path.endswith('.png'):
+            image = self.state.images.get(self.path[len('/images/'):-len('.png')])
+            if image is not None:
+                self.state.count('downloads')
+                self._send(200, image, content_type='image/png')
+                return
+        self._send(404, {'error': {'message': 'not found'}})
+
+
+def serve(host='127.0.0.1', port=8790, **faults):
+    """Start the stub in a background thread; returns the server (call .shutdown() to stop)."""
+    handler = type('BoundStubHandler', (StubHandler,), {'state': StubState(**faults)})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stub of the ZhipuAI images endpoint.')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8790, help='Port (default: 8790)')
+    parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every generation request')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of generation requests answered 429')
+    parser.add_argument('--rate-500', type=float, default=0.0, help='Fraction of generation requests answered 500')
+    parser.add_argument('--retry-after', type=int, default=0, help='Retry-After seconds sent with 429 responses')
+    parser.add_argument('--seed', type=int, help='Seed for fault injection')
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, latency_ms=args.latency_ms, rate_429=args.rate_429,
+                   rate_500=args.rate_500, retry_after=args.retry_after, seed=args.seed)
+    print(f"Stub images API on http://{args.host}:{args.port}{GENERATIONS_PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
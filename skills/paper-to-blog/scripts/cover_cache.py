@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Prompt-Keyed Cover Image Cache
+
+Master-review iterations that route back to the Cover Designer usually
+rebuild exactly the same prompt. This cache stores the downloaded image
+bytes and the API response metadata under a key derived from (model, size,
+prompt, variant), so repeat runs skip the API call and the download. Entries
+are evicted by age and, least recently used first, by total size.
+
+Layout:
+    <cache_dir>/<key>.img   image file exactly as downloaded
+    <cache_dir>/<key>.json  model, size, prompt hash, response, timestamps
+
+Usage:
+    python cover_cache.py stats
+    python cover_cache.py prune [--max-mb 200] [--max-age-days 30]
+    python cover_cache.py clear
+
+Environment:
+    COVER_CACHE_DIR - cache directory (default: ~/.cache/paper-to-blog/covers)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "COVER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "paper-to-blog", "covers"))
+DEFAULT_MAX_MB = 200
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def cache_key(model, size, prompt, variant=0):
+    """Key for one cached image; variant distinguishes concurrent candidates of the same prompt."""
+    return hashlib.sha256(f"{model}\0{size}\0{prompt_hash(prompt)}\0{variant}".encode('utf-8')).hexdigest()[:32]
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CoverCache:
+    """Directory of cached cover images with age and size bounds."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 max_age_s=DEFAULT_MAX_AGE_DAYS * 86400):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.img', base + '.json'
+
+    def get(self, key):
+        """(image_path, metadata) for a fresh entry, or None. The bytes are not read."""
+        img_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() - meta['created'] > self.max_age_s:
+                self.remove(key)
+                return None
+            # mtime of the image file tracks last use for LRU eviction
+            os.utime(img_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return img_path, meta
+
+    def put_file(self, key, source_path, model, size, prompt, response=None):
+        """Copy a downloaded image file in, store response metadata, then enforce the bounds."""
+        img_path, meta_path = self._paths(key)
+        meta = {
+            'model': model,
+            'size': size,
+            'prompt_hash': prompt_hash(prompt),
+            'prompt': prompt[:200],
+            'bytes': os.path.getsize(source_path),
+            'created': time.time(),
+            'response': response or {}
+        }
+        # Image first: a metadata file always points at complete bytes
+        tmp_path = f"{img_path}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, img_path)
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+        self.evict()
+
+    def remove(self, key):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def entries(self):
+        """(key, bytes, last_used, created) for every complete entry."""
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            img_path, meta_path = self._paths(key)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    created = json.load(f)['created']
+                stat = os.stat(img_path)
+            except (OSError, ValueError, KeyError):
+                continue
+            result.append((key, stat.st_size, stat.st_mtime, created))
+        return result
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        now = time.time()
+        removed = 0
+        live = []
+        for key, size, last_used, created in self.entries():
+            if now - created > self.max_age_s:
+                self.remove(key)
+                removed += 1
+            else:
+                live.append((last_used, key, size))
+
+        total = sum(size for _, _, size in live)
+        for _, key, size in sorted(live):
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        entries = self.entries()
+        return {'dir': self.cache_dir, 'entries': len(entries), 'bytes': sum(e[1] for e in entries),
+                'max_bytes': self.max_bytes, 'max_age_days': self.max_age_s / 86400}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and prune the cover image cache.')
+    parser.add_argument('command', choices=['stats', 'prune', 'clear'])
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_MAX_MB, help=f'Size bound (default: {DEFAULT_MAX_MB})')
+    parser.add_argument('--max-age-days', type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help=f'Age bound (default: {DEFAULT_MAX_AGE_DAYS})')
+    args = parser.parse_args()
+
+    cache = CoverCache(args.cache_dir, args.max_mb * 1024 * 1024, args.max_age_days * 86400)
+    if args.command == 'prune':
+        print(f"Removed {cache.evict()} entries")
+    elif args.command == 'clear':
+        for key, *_ in cache.entries():
+            cache.remove(key)
+        print(f"Cleared {cache.cache_dir}")
+    print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
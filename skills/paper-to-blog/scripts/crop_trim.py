@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Whitespace Trimming for Figure Crops
+
+The extractors' crops come from fixed percentage boxes (10/10/90/90,
+15/10/85/90, 25/15/75/85) or coarse detections and carry wide white
+margins. trim_box() shrinks a crop to its ink bounds plus padding using
+row/column projection profiles of the page raster, and can extend it to
+take in the caption block directly below a figure or above a table.
+crop_element() is the trim -> cut -> save -> report step the extractors'
+crop_and_save_elements share.
+
+Usage:
+    page = np.asarray(Image.open('temp_page_002.png'))
+    box = trim_box(page, (120, 150, 1100, 1300), padding=8, caption='below')
+
+Requirements:
+    pip install pillow numpy
+"""
+
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+from tracing import span
+
+
+WHITE_THRESHOLD = 245   # gray levels at or above this count as background
+DEFAULT_PADDING = 8     # pixels of the page raster kept around the ink
+CAPTION_MAX_GAP = 0.04  # fraction of page height searched for a caption start
+CAPTION_MAX_HEIGHT = 0.15
+
+
+def _ink_mask(page_array, left, top, right, bottom, threshold):
+    region = page_array[top:bottom, left:right]
+    if region.ndim == 3:
+        # Darkest channel, so saturated colours count as ink
+        region = region[..., :3].min(axis=2)
+    return region < threshold
+
+
+def ink_bounds(mask):
+    """(left, top, right, bottom) of the True pixels in a 2-D mask, or None if it is empty."""
+    rows = mask.any(axis=1)
+    if not rows.any():
+        return None
+    cols = mask.any(axis=0)
+    top = int(np.argmax(rows))
+    bottom = len(rows) - int(np.argmax(rows[::-1]))
+    left = int(np.argmax(cols))
+    right = len(cols) - int(np.argmax(cols[::-1]))
+    return left, top, right, bottom
+
+
+def caption_side(fig_type):
+    """Captions sit below figures and above tables."""
+    return 'above' if fig_type == 'table' else 'below'
+
+
+def _caption_rows(rows, max_gap):
+    """Extent (start, end) of the first text block in a row profile, or None."""
+    ink = np.flatnonzero(rows)
+    if not len(ink) or ink[0] > max_gap:
+        return None
+    start = end = ink[0]
+    line_height = None
+    for row in ink[1:]:
+        if row == end + 1:
+            end = row
+            continue
+        if line_height is None:
+            line_height = end - start + 1
+        # A gap taller than a text line ends the caption paragraph
+        if row - end - 1 > line_height:
+            break
+        end = row
+    return start, end + 1
+
+
+def find_caption(page_array, box, side, threshold=WHITE_THRESHOLD):
+    """
+    Bounds of the caption block adjacent to a crop.
+
+    Args:
+        page_array: Page raster (H, W[, C]) as uint8
+        box: (left, top, right, bottom) crop in pixels
+        side: 'below' or 'above'
+
+    Returns:
+        (left, top, right, bottom) of the caption in pixels, or None
+    """
+    left, top, right, bottom = box
+    height = page_array.shape[0]
+    max_gap = int(CAPTION_MAX_GAP * height)
+    reach = int(CAPTION_MAX_HEIGHT * height)
+
+    if side == 'below':
+        area_top, area_bottom = bottom, min(height, bottom + reach)
+    else:
+        area_top, area_bottom = max(0, top - reach), top
+    if area_bottom - area_top < 2:
+        return None
+
+    mask = _ink_mask(page_array, left, area_top, right, area_bottom, threshold)
+    rows = mask.any(axis=1)
+    extent = _caption_rows(rows if side == 'below' else rows[::-1], max_gap)
+    if extent is None:
+        return None
+    start, end = extent
+    if side == 'above':
+        start, end = len(rows) - end, len(rows) - start
+
+    bounds = ink_bounds(mask[start:end])
+    return (left + bounds[0], area_top + int(start), left + bounds[2], area_top + int(end))
+
+
+def trim_box(page_array, box, padding=DEFAULT_PADDING, caption=None, threshold=WHITE_THRESHOLD):
+    """
+    Shrink a crop box to its ink bounds plus padding.
+
+    Args:
+        page_array: Page raster (H, W[, C]) as uint8
+        box: (left, top, right, bottom) crop in pixels
+        padding: Pixels of margin kept around the ink
+        caption: None, 'below' or 'above' - also take in the caption block on that side
+
+    Returns:
+        (left, top, right, bottom) trimmed box in pixels; the original box if it holds no ink
+    """
+    left, top, right, bottom = box
+    bounds = ink_bounds(_ink_mask(page_array, left, top, right, bottom, threshold))
+    if bounds is None:
+        return box
+    trimmed = (left + bounds[0], top + bounds[1], left + bounds[2], top + bounds[3])
+
+    # Padding never grows the crop past the original box (or the caption it took in)
+    height, width = page_array.shape[:2]
+    limit = box
+    if caption:
+        # Search the caption across the original width: it is often wider than the figure ink
+        found = find_caption(page_array, (left, trimmed[1], right, trimmed[3]), caption, threshold)
+        if found:
+            trimmed = (min(trimmed[0], found[0]), min(trimmed[1], found[1]),
+                       max(trimmed[2], found[2]), max(trimmed[3], found[3]))
+            limit = (min(left, trimmed[0] - padding), min(top, trimmed[1] - padding),
+                     max(right, trimmed[2] + padding), max(bottom, trimmed[3] + padding))
+
+    return (max(0, limit[0], trimmed[0] - padding), max(0, limit[1], trimmed[1] - padding),
+            min(width, limit[2], trimmed[2] + padding), min(height, limit[3], trimmed[3] + padding))
+
+
+def page_raster(image):
+    """Read-only uint8 array view of a PIL page image for trim_box."""
+    return np.asarray(image)
+
+
+def area_saved(before, after):
+    """Fraction of pixel area removed going from box `before` to box `after`."""
+    area = (before[2] - before[0]) * (before[3] - before[1])
+    return 1 - (after[2] - after[0]) * (after[3] - after[1]) / area if area else 0.0
+
+
+def png_size(image):
+    """Encoded PNG size in bytes of a PIL image or fitz.Pixmap, without writing a file."""
+    if isinstance(image, Image.Image):
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.tell()
+    return len(image.tobytes('png'))
+
+
+def crop_element(cut, page_array, box, page_size, output_path, page_num, fig_type,
+                 trim=False, include_caption=False, padding=DEFAULT_PADDING, trim_report=False):
+    """
+    Trim (optionally), cut and save one element crop, printing the trim report.
+
+    Args:
+        cut: Callable(box) -> (PIL image or fitz.Pixmap, zoom or None) for a pixel box
+        page_array: Page raster for trim_box; only read when trim is set
+        box: (left, top, right, bottom) crop in pixels, before trimming
+        page_size: (width, height) of the page raster
+        output_path: PNG path the crop is saved to
+        page_num: 0-based page number, for the tracing spans
+
+    Returns:
+        The trimmed box as a percentage bbox dict, or None when not trimming
+    """
+    img_width, img_height = page_size
+    left, top, right, bottom = box
+    bbox = None
+    if trim:
+        with span('trim', page=page_num + 1):
+            left, top, right, bottom = trim_box(page_array, box, padding,
+                                                caption_side(fig_type) if include_caption else None)
+        bbox = {
+            'top': round(top / img_height * 100, 2),
+            'left': round(left / img_width * 100, 2),
+            'bottom': round(bottom / img_height * 100, 2),
+            'right': round(right / img_width * 100, 2)
+        }
+
+    with span('crop', page=page_num + 1) as s:
+        cropped, zoom = cut((left, top, right, bottom))
+        s.set(pixels=cropped.width * cropped.height)
+        if zoom is not None:
+            s.set(zoom=round(zoom, 2))
+    with span('encode', page=page_num + 1) as s:
+        cropped.save(output_path)
+        s.set(bytes_written=os.path.getsize(output_path))
+
+    print(f"Saved: {output_path}")
+    if trim:
+        report = f"  Trimmed {box[2] - box[0]}x{box[3] - box[1]} -> " \
+                 f"{right - left}x{bottom - top} px (pixels {-area_saved(box, (left, top, right, bottom)):+.0%}"
+        if trim_report:
+            before = png_size(cut(box)[0])
+            after = os.path.getsize(output_path)
+            report += f", {before / 1024:.0f} KB -> {after / 1024:.0f} KB, bytes {after / before - 1:+.0%}"
+        print(report + ")")
+    return bbox
+
+
+def add_trim_arguments(parser):
+    """Add the --trim family of flags to an extractor's argument parser."""
+    parser.add_argument('--trim', action='store_true', help='Shrink each crop to its ink bounds plus padding')
+    parser.add_argument('--include-caption', action='store_true',
+                        help='With --trim, extend crops to the caption below figures / above tables')
+    parser.add_argument('--trim-padding', type=int, default=DEFAULT_PADDING,
+                        help=f'Pixels kept around the ink when trimming (default: {DEFAULT_PADDING})')
+    parser.add_argument('--trim-report', action='store_true',
+                        help='With --trim, also report PNG bytes saved per crop (encodes the untrimmed crop)')
+
+
+def crop_options_from_args(args):
+    """crop_and_save_elements keyword arguments for the parsed --trim flags, or None."""
+    if not (args.trim or args.include_caption or args.trim_report):
+        return None
+    return {'trim': True, 'include_caption': args.include_caption,
+            'padding': args.trim_padding, 'trim_report': args.trim_report}
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Accuracy-and-Speed Evaluation of Figure Detection Strategies
+
+Runs every detection strategy at every render scale on a labelled fixture
+set and reports IoU/precision/recall next to per-page latency as a Pareto
+table, so the cheapest configuration that still meets the quality bar can
+be chosen instead of rendering at --scale 3.0 everywhere.
+
+Usage:
+    python evaluate_extraction.py [--ground-truth ../test/fixtures/ground_truth.json]
+                                  [--scales 1.0,1.5,2.0,3.0] [--min-recall 1.0] [--min-iou 0.5]
+
+Requirements:
+    pip install pymupdf pillow numpy
+"""
+
+import fitz  # PyMuPDF
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from extract_figures_improved import analyze_pdf_text, detect_page_elements, detect_visual_elements_with_text_guidance
+from extract_figures_standalone import detect_figures_simple
+from extract_figures_targeted import analyze_pdf_for_figures_tables
+from layout_segmenter import segment_page
+
+
+DEFAULT_GROUND_TRUTH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    '..', 'test', 'fixtures', 'ground_truth.json')
+DEFAULT_SCALES = (1.0, 1.5, 2.0, 3.0)
+
+# Fixed boxes used by extract_figures_targeted.py for pages with a caption
+TARGETED_BBOXES = {
+    'figure': {'top': 15, 'left': 10, 'bottom': 85, 'right': 90},
+    'table': {'top': 25, 'left': 15, 'bottom': 75, 'right': 85}
+}
+
+
+def _strategy_variance(doc, page_num, page_image_path, context):
+    return detect_visual_elements_with_text_guidance(page_image_path, [])
+
+
+def _strategy_text_guided(doc, page_num, page_image_path, context):
+    figures, tables = analyze_pdf_text(doc[page_num])
+    return detect_page_elements(doc[page_num], page_image_path, figures + tables)
+
+
+def _strategy_standalone(doc, page_num, page_image_path, context):
+    return detect_figures_simple(page_image_path)
+
+
+def _strategy_layout_segmenter(doc, page_num, page_image_path, context):
+    return segment_page(page_image_path)
+
+
+def _strategy_caption_default(doc, page_num, page_image_path, context):
+    if 'captions' not in context:
+        figures, tables = analyze_pdf_for_figures_tables(context['pdf_path'])
+        context['captions'] = [dict(ref, type='figure') for ref in figures] + \
+                              [dict(ref, type='table') for ref in tables]
+    return [dict(TARGETED_BBOXES[ref['type']], type=ref['type'], number=ref['number'])
+            for ref in context['captions'] if ref['page'] == page_num + 1]
+
+
+# name -> callable(doc, page_num, page_image_path, context) -> elements with percentage bboxes
+STRATEGIES = {
+    'variance': _strategy_variance,
+    'text_guided': _strategy_text_guided,
+    'standalone': _strategy_standalone,
+    'caption_default': _strategy_caption_default,
+    'layout_segmenter': _strategy_layout_segmenter,
+}
+
+
+def _box(element):
+    bbox = element.get('bbox', element)
+    return (float(bbox['left']), float(bbox['top']), float(bbox['right']), float(bbox['bottom']))
+
+
+def iou(a, b):
+    """Intersection over union of two (left, top, right, bottom) boxes."""
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_boxes(predictions, truths, threshold):
+    """Greedy one-to-one matching by IoU; returns (true positives, IoUs of matched pairs)."""
+    pairs = sorted(((iou(p, t), i, j) for i, p in enumerate(predictions) for j, t in enumerate(truths)),
+                   reverse=True)
+    used_pred, used_truth, ious = set(), set(), []
+    for score, i, j in pairs:
+        if score < threshold:
+            break
+        if i in used_pred or j in used_truth:
+            continue
+        used_pred.add(i)
+        used_truth.add(j)
+        ious.append(score)
+    return len(ious), ious
+
+
+def load_ground_truth(path):
+    """Load the labelled fixture manifest; PDF paths are relative to the manifest."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for entry in entries:
+        entry['pdf'] = os.path.join(base, entry['pdf'])
+        if 'pages' not in entry:
+            entry['pages'] = sorted({box['page'] for box in entry['boxes']})
+    return entries
+
+
+def evaluate(entries, strategy, scale, threshold):
+    """Evaluate one (strategy, scale) configuration on all labelled pages."""
+    detect = STRATEGIES[strategy]
+    temp_dir = tempfile.mkdtemp(prefix='eval_')
+    tp = num_pred = num_truth = 0
+    ious = []
+    render_s = detect_s = 0.0
+    pages = 0
+
+    try:
+        for entry in entries:
+            doc = fitz.open(entry['pdf'])
+            context = {'pdf_path': entry['pdf']}
+            for page in entry['pages']:
+                page_num = page - 1
+                page_image_path = os.path.join(temp_dir, f"temp_page_{page_num:03d}.png")
+
+                start = time.perf_counter()
+                pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
+                pix.save(page_image_path)
+                render_s += time.perf_counter() - start
+
+                start = time.perf_counter()
+                predictions = [_box(e) for e in detect(doc, page_num, page_image_path, context)]
+                detect_s += time.perf_counter() - start
+
+                truths = [_box(box) for box in entry['boxes'] if box['page'] == page]
+                matched, matched_ious = match_boxes(predictions, truths, threshold)
+                tp += matched
+                ious.extend(matched_ious)
+                num_pred += len(predictions)
+                num_truth += len(truths)
+                pages += 1
+            doc.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    precision = tp / num_pred if num_pred else 0.0
+    recall = tp / num_truth if num_truth else 0.0
+    return {
+        'strategy': strategy,
+        'scale': scale,
+        'pages': pages,
+        'predictions': num_pred,
+        'precision': round(precision, 3),
+        'recall': round(recall, 3),
+        'f1': round(2 * precision * recall / (precision + recall), 3) if precision + recall else 0.0,
+        'mean_iou': round(sum(ious) / len(ious), 3) if ious else 0.0,
+        'render_ms_per_page': round(render_s / max(pages, 1) * 1000, 2),
+        'detect_ms_per_page': round(detect_s / max(pages, 1) * 1000, 2),
+        'ms_per_page': round((render_s + detect_s) / max(pages, 1) * 1000, 2)
+    }
+
+
+def pareto_front(results):
+    """Mark configurations not dominated on (lower latency, higher F1, higher mean IoU)."""
+    for r in results:
+        r['pareto'] = not any(
+            o is not r
+            and o['ms_per_page'] <= r['ms_per_page']
+            and o['f1'] >= r['f1']
+            and o['mean_iou'] >= r['mean_iou']
+            and (o['ms_per_page'], -o['f1'], -o['mean_iou']) != (r['ms_per_page'], -r['f1'], -r['mean_iou'])
+            for o in results
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate figure detection strategies for accuracy and speed.')
+    parser.add_argument('--ground-truth', default=DEFAULT_GROUND_TRUTH, help='Labelled fixture manifest (JSON)')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help='Comma-separated strategies to evaluate')
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='Comma-separated render scales')
+    parser.add_argument('--iou-threshold', type=float, default=0.5, help='IoU for a detection to count as a hit')
+    parser.add_argument('--min-recall', type=float, default=1.0, help='Quality bar: minimum recall')
+    parser.add_argument('--min-iou', type=float, default=0.5, help='Quality bar: minimum mean IoU of hits')
+    parser.add_argument('--output', '-o', help='Write the full report as JSON')
+    args = parser.parse_args()
+
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"unknown strategy: {', '.join(sorted(unknown))}")
+    if not os.path.exists(args.ground_truth):
+        print(f"Error: ground truth not found: {args.ground_truth}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = load_ground_truth(args.ground_truth)
+    scales = [float(s) for s in args.scales.split(',') if s.strip()]
+
+    results = []
+    for strategy in strategies:
+        for scale in scales:
+            results.append(evaluate(entries, strategy, scale, args.iou_threshold))
+    pareto_front(results)
+    results.sort(key=lambda r: r['ms_per_page'])
+
+    print(f"\n{'strategy':<16} {'scale':>5} {'ms/page':>8} {'render':>8} {'detect':>8} "
+          f"{'prec':>6} {'recall':>6} {'f1':>6} {'mIoU':>6}  pareto")
+    for r in results:
+        print(f"{r['strategy']:<16} {r['scale']:>5.1f} {r['ms_per_page']:>8.1f} {r['render_ms_per_page']:>8.1f} "
+              f"{r['detect_ms_per_page']:>8.1f} {r['precision']:>6.2f} {r['recall']:>6.2f} {r['f1']:>6.2f} "
+              f"{r['mean_iou']:>6.2f}  {'*' if r['pareto'] else ''}")
+
+    passing = [r for r in results if r['recall'] >= args.min_recall and r['mean_iou'] >= args.min_iou]
+    recommended = passing[0] if passing else None
+    if recommended:
+        print(f"\nCheapest configuration meeting recall >= {args.min_recall} and mean IoU >= {args.min_iou}: "
+              f"{recommended['strategy']} at --scale {recommended['scale']} ({recommended['ms_per_page']:.1f} ms/page)")
+    else:
+        print(f"\nNo configuration meets recall >= {args.min_recall} and mean IoU >= {args.min_iou}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'recommended': recommended}, f, indent=2)
+        print(f"Saved report to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
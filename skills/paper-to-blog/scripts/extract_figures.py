@@ -19,6 +19,9 @@ import os
 import sys
 import argparse
 
+from adaptive_render import render_clip
+from tracing import span
+
 
 def render_pdf_pages(pdf_path, output_dir, scale=2.0):
     """Render PDF pages to high-resolution images."""
@@ -27,9 +30,11 @@ def render_pdf_pages(pdf_path, output_dir, scale=2.0):
     doc = fitz.open(pdf_path)
 
     for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
-        page_image_path = os.path.join(output_dir, f"temp_page_{page_num:03d}.png")
-        pix.save(page_image_path)
+        with span('render', page=page_num + 1) as s:
+            pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
+            page_image_path = os.path.join(output_dir, f"temp_page_{page_num:03d}.png")
+            pix.save(page_image_path)
+            s.set(pixels=pix.width * pix.height, bytes_written=os.path.getsize(page_image_path))
         rendered_pages.append((page_num, page_image_path))
         print(f"Rendered page {page_num + 1}/{len(doc)}: {page_image_path}")
 
@@ -71,8 +76,12 @@ def analyze_page_for_figures(page_image_path, mcp_analyze_image_func):
         }]
 
 
-def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
-    """Crop identified visual elements from page image and save individually."""
+def crop_and_save_elements(page_image_path, elements, output_dir, page_num, pdf_page=None, target_width=None):
+    """Crop identified visual elements from page image and save individually.
+
+    When target_width is given, each element is re-rendered from pdf_page at
+    a zoom chosen from its size instead of being cut out of the page image.
+    """
     os.makedirs(output_dir, exist_ok=True)
     page_img = Image.open(page_image_path)
     img_width, img_height = page_img.size
@@ -86,13 +95,24 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
         bottom = int(element.get('bottom', 90) / 100 * img_height)
 
         # Crop and save
-        cropped = page_img.crop((left, top, right, bottom))
+        if pdf_page is not None and target_width:
+            # Re-render only this region, zoomed to the target output width
+            with span('crop', page=page_num + 1) as s:
+                box = (left / img_width, top / img_height, right / img_width, bottom / img_height)
+                cropped, zoom = render_clip(pdf_page, box, target_width)
+                s.set(pixels=cropped.width * cropped.height, zoom=round(zoom, 2))
+        else:
+            with span('crop', page=page_num + 1) as s:
+                cropped = page_img.crop((left, top, right, bottom))
+                s.set(pixels=cropped.width * cropped.height)
         fig_type = element.get('type', 'figure')
         fig_num = element.get('number', idx + 1)
         description = element.get('description', '')[:30].replace(' ', '_').replace('/', '_')
         filename = f"{fig_type}{page_num+1}_{fig_num}_{description}.png"
         output_path = os.path.join(output_dir, filename)
-        cropped.save(output_path)
+        with span('encode', page=page_num + 1) as s:
+            cropped.save(output_path)
+            s.set(bytes_written=os.path.getsize(output_path))
 
         # Build metadata
         saved_elements.append({
@@ -114,7 +134,7 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
     return saved_elements
 
 
-def extract_figures(pdf_path, output_dir, mcp_analyze_image_func=None):
+def extract_figures(pdf_path, output_dir, mcp_analyze_image_func=None, scale=2.0, target_width=None):
     """
     Main function to extract figures and tables from PDF.
 
@@ -122,6 +142,8 @@ def extract_figures(pdf_path, output_dir, mcp_analyze_image_func=None):
         pdf_path: Path to PDF file
         output_dir: Directory to save extracted figures
         mcp_analyze_image_func: MCP tool function for image analysis
+        scale: Rendering scale factor for the analyzed page images
+        target_width: If set, render each crop adaptively at about this pixel width
 
     Returns:
         List of all extracted figure metadata
@@ -135,20 +157,29 @@ def extract_figures(pdf_path, output_dir, mcp_analyze_image_func=None):
 
     # Render and analyze PDF pages
     print("Rendering PDF pages...")
-    rendered_pages = render_pdf_pages(pdf_path, temp_dir)
+    rendered_pages = render_pdf_pages(pdf_path, temp_dir, scale)
+    doc = fitz.open(pdf_path) if target_width else None
 
     for page_num, page_image_path in rendered_pages:
         print(f"\nAnalyzing page {page_num + 1}...")
-        elements = analyze_page_for_figures(page_image_path, mcp_analyze_image_func) if mcp_analyze_image_func else []
+        elements = []
+        if mcp_analyze_image_func:
+            with span('vision', page=page_num + 1):
+                elements = analyze_page_for_figures(page_image_path, mcp_analyze_image_func)
 
         if elements:
-            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num)
+            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num,
+                                           pdf_page=doc[page_num] if doc else None, target_width=target_width)
             all_metadata.extend(saved)
 
+    if doc:
+        doc.close()
+
     # Save metadata and cleanup
     metadata_path = os.path.join(output_dir, 'figures_metadata.json')
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2, ensure_ascii=False)
+    with span('metadata', records=len(all_metadata)):
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(all_metadata, f, indent=2, ensure_ascii=False)
 
     print(f"\nSaved metadata to: {metadata_path}")
     print(f"Total elements extracted: {len(all_metadata)}")
@@ -18,24 +18,15 @@ import json
 import os
 import sys
 import argparse
+import time
 import numpy as np
+import multiprocessing
 
-
-def render_pdf_pages(pdf_path, output_dir, scale=2.0):
-    """Render PDF pages to high-resolution images."""
-    os.makedirs(output_dir, exist_ok=True)
-    rendered_pages = []
-    doc = fitz.open(pdf_path)
-
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
-        page_image_path = os.path.join(output_dir, f"temp_page_{page_num:03d}.png")
-        pix.save(page_image_path)
-        rendered_pages.append((page_num, page_image_path))
-        print(f"Rendered page {page_num + 1}/{len(doc)}: {page_image_path}")
-
-    doc.close()
-    return rendered_pages
+from adaptive_render import render_clip, render_pdf_pages
+from crop_trim import DEFAULT_PADDING, add_trim_arguments, crop_element, crop_options_from_args
+from layout_segmenter import segment_page
+from raster_store import RasterStore, render_pdf_to_store
+from tracing import TRACER, span, enable as enable_tracing
 
 
 def analyze_pdf_text(page):
@@ -82,10 +73,39 @@ def analyze_pdf_text(page):
     return figures, tables
 
 
+def has_text_layer(page):
+    """False for scanned pages, which carry no extractable text."""
+    return bool(page.get_text("text").strip())
+
+
+def page_text_elements(doc):
+    """Caption references handed to detection for each page (page index -> list).
+
+    Full extraction and partial re-extraction both call this, so a page is
+    detected, and its elements numbered, the same way on either path.
+    """
+    all_text_elements = []
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        with span('text_scan', page=page_num + 1):
+            figures, tables = analyze_pdf_text(page)
+        all_text_elements.extend(figures)
+        all_text_elements.extend(tables)
+
+    return {page_num: [elem for elem in all_text_elements
+                       if hasattr(elem, 'position') and abs(elem['position'] // 50) == page_num]
+            for page_num in range(len(doc))}
+
+
 def detect_visual_elements_with_text_guidance(page_path, text_elements):
-    """Use text positions to guide figure detection."""
-    img = Image.open(page_path)
-    img_array = np.array(img)
+    """Use text positions to guide figure detection.
+
+    page_path may also be an RGB ndarray, e.g. a zero-copy RasterStore view.
+    """
+    if isinstance(page_path, np.ndarray):
+        img_array = page_path
+    else:
+        img_array = np.array(Image.open(page_path))
 
     if len(img_array.shape) == 3:
         gray = np.mean(img_array, axis=2)
@@ -144,8 +164,18 @@ def detect_visual_elements_with_text_guidance(page_path, text_elements):
     return visual_elements[:3]
 
 
-def extract_figures_with_text_guidance(pdf_path, output_dir):
-    """Extract figures using both text analysis and visual detection."""
+def extract_figures_with_text_guidance(pdf_path, output_dir, scale=2.0, target_width=None,
+                                       raster_store=False, workers=1, on_page=None, crop_options=None):
+    """Extract figures using both text analysis and visual detection.
+
+    With target_width set, crops are re-rendered per figure at an adaptive
+    zoom and `scale` only governs the page images used for detection.
+    crop_options (trim, include_caption, padding, trim_report) are passed
+    on to crop_and_save_elements.
+    With raster_store set, pages are rendered into one memory-mapped file
+    instead of per-page PNGs, and `workers` processes share it read-only
+    for detection. on_page(page, records) is called as each page finishes.
+    """
     temp_dir = os.path.join(output_dir, 'temp')
     figures_dir = os.path.join(output_dir, 'figures')
     os.makedirs(figures_dir, exist_ok=True)
@@ -155,37 +185,54 @@ def extract_figures_with_text_guidance(pdf_path, output_dir):
     doc = fitz.open(pdf_path)
 
     # First pass: collect all figure/table references
-    all_text_elements = []
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        figures, tables = analyze_pdf_text(page)
-        all_text_elements.extend(figures)
-        all_text_elements.extend(tables)
+    text_elements = page_text_elements(doc)
 
     # Second pass: render pages and extract visual elements
     print("Rendering PDF pages...")
-    rendered_pages = render_pdf_pages(pdf_path, temp_dir)
+    store = None
+    if raster_store:
+        store_path = os.path.join(temp_dir, 'temp_page_store.raster')
+        store = render_pdf_to_store(pdf_path, store_path, scale)
+        rendered_pages = [(page_num, store.page(page_num)) for page_num in range(len(store))]
+    else:
+        rendered_pages = render_pdf_pages(pdf_path, temp_dir, scale)
+
+    # Scanned pages go to the offline layout segmenter instead of the variance heuristic
+    scanned = {page_num for page_num, _ in rendered_pages if not has_text_layer(doc[page_num])}
+
+    detected = {}
+    if store is not None and workers > 1:
+        print(f"\nDetecting on {len(store)} pages with {workers} workers...")
+        jobs = [(page_num, text_elements[page_num], page_num in scanned) for page_num, _ in rendered_pages]
+        with multiprocessing.Pool(workers, initializer=_init_detect_worker, initargs=(store_path,)) as pool:
+            detected = dict(zip([job[0] for job in jobs], pool.map(_detect_worker, jobs)))
 
     for page_num, page_image_path in rendered_pages:
         print(f"\nAnalyzing page {page_num + 1}...")
 
-        # Get text elements for this page
-        page_text_elements = [elem for elem in all_text_elements
-                            if hasattr(elem, 'position') and
-                            abs(elem['position'] // 50) == page_num]
-
-        elements = detect_visual_elements_with_text_guidance(page_image_path, page_text_elements)
+        if page_num in detected:
+            elements = detected[page_num]
+        else:
+            elements = detect_page_elements(doc[page_num], page_image_path, text_elements[page_num],
+                                            scanned=page_num in scanned)
 
         if elements:
-            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num)
+            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num,
+                                           pdf_page=doc[page_num] if target_width else None,
+                                           target_width=target_width, **(crop_options or {}))
             all_metadata.extend(saved)
+            if on_page:
+                on_page(page_num + 1, saved)
 
     doc.close()
+    if store is not None:
+        store.close()
 
     # Save metadata and cleanup
     metadata_path = os.path.join(output_dir, 'figures_metadata.json')
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2, ensure_ascii=False)
+    with span('metadata', records=len(all_metadata)):
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(all_metadata, f, indent=2, ensure_ascii=False)
 
     print(f"\nSaved metadata to: {metadata_path}")
     print(f"Total elements extracted: {len(all_metadata)}")
@@ -199,13 +246,52 @@ def extract_figures_with_text_guidance(pdf_path, output_dir):
     return all_metadata
 
 
-def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
-    """Crop identified visual elements from page image and save individually."""
+_worker_store = None
+
+
+def _init_detect_worker(store_path):
+    global _worker_store
+    _worker_store = RasterStore.open(store_path)
+
+
+def _detect_worker(job):
+    page_num, text_elements, scanned = job
+    if scanned:
+        return segment_page(_worker_store.page(page_num))
+    return detect_visual_elements_with_text_guidance(_worker_store.page(page_num), text_elements)
+
+
+def crop_and_save_elements(page_image_path, elements, output_dir, page_num, pdf_page=None, target_width=None,
+                           trim=False, include_caption=False, padding=DEFAULT_PADDING, trim_report=False):
+    """Crop identified visual elements from page image and save individually.
+
+    When target_width is given, each element is re-rendered from pdf_page at
+    a zoom chosen from its size instead of being cut out of the page image.
+    With trim set, each box is first shrunk to its ink bounds plus padding
+    (optionally taking in the caption); trim_report also measures the PNG
+    bytes saved by encoding the untrimmed crop in memory.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    page_img = Image.open(page_image_path)
-    img_width, img_height = page_img.size
+    if isinstance(page_image_path, np.ndarray):
+        # RasterStore view: slice the crop out without decoding or copying the page
+        page_img = None
+        page_array = page_image_path
+        img_height, img_width = page_image_path.shape[:2]
+    else:
+        page_img = Image.open(page_image_path)
+        page_array = np.asarray(page_img) if trim else None
+        img_width, img_height = page_img.size
     saved_elements = []
 
+    def cut(box):
+        if pdf_page is not None and target_width:
+            # Re-render only this region, zoomed to the target output width
+            fractions = (box[0] / img_width, box[1] / img_height, box[2] / img_width, box[3] / img_height)
+            return render_clip(pdf_page, fractions, target_width)
+        if page_img is None:
+            return Image.fromarray(np.ascontiguousarray(page_image_path[box[1]:box[3], box[0]:box[2]])), None
+        return page_img.crop(box), None
+
     for idx, element in enumerate(elements):
         # Convert percentage coordinates to pixels
         left = int(element.get('left', 10) / 100 * img_width)
@@ -219,14 +305,20 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
         right = max(left + 1, min(right, img_width))
         bottom = max(top + 1, min(bottom, img_height))
 
-        # Crop and save
-        cropped = page_img.crop((left, top, right, bottom))
         fig_type = element.get('type', 'figure')
+        bbox = {
+            'top': element.get('top', 10),
+            'left': element.get('left', 10),
+            'bottom': element.get('bottom', 90),
+            'right': element.get('right', 90)
+        }
+
         fig_num = element.get('number', idx + 1)
         description = element.get('description', 'unknown')[:30].replace(' ', '_').replace('/', '_')
         filename = f"{fig_type}{page_num+1}_{fig_num}_{description}.png"
         output_path = os.path.join(output_dir, filename)
-        cropped.save(output_path)
+        trimmed = crop_element(cut, page_array, (left, top, right, bottom), (img_width, img_height), output_path,
+                               page_num, fig_type, trim, include_caption, padding, trim_report)
 
         # Build metadata
         saved_elements.append({
@@ -236,28 +328,260 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
             'page': page_num + 1,
             'description': element.get('description', ''),
             'text_content': element.get('text', ''),
-            'bbox': {
-                'top': element.get('top', 10),
-                'left': element.get('left', 10),
-                'bottom': element.get('bottom', 90),
-                'right': element.get('right', 90)
-            }
+            'bbox': trimmed or bbox
         })
-        print(f"Saved: {output_path}")
 
     return saved_elements
 
 
+def parse_page_selector(spec):
+    """Parse a page selector like "3" or "1,4-6" into a set of 1-based page numbers."""
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            pages.update(range(int(start), int(end) + 1))
+        else:
+            pages.add(int(part))
+    return pages
+
+
+def parse_figure_selector(spec):
+    """Parse a figure selector like "figure:3@4,table:1@6" into (page, type, number) triples.
+
+    Element numbers count the detections on one page (they are not the
+    paper's own figure numbers), so every element names its 1-based page
+    after "@". A bare number ("3@4") matches any element type with that number.
+    """
+    selectors = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '@' not in part:
+            raise ValueError(f'Figure selector "{part}" needs a page, e.g. "figure:3@4"')
+        element, page = part.rsplit('@', 1)
+        if ':' in element:
+            fig_type, number = element.split(':', 1)
+            selectors.add((int(page), fig_type.strip().lower(), number.strip()))
+        else:
+            selectors.add((int(page), None, element.strip()))
+    return selectors
+
+
+def load_bbox_overrides(spec):
+    """Load bbox overrides from a JSON string or a path to a JSON file.
+
+    Expected format, keyed like the figure selector, with the page either in
+    the key ("figure:3@4") or in the bbox:
+        {"figure:3": {"page": 4, "top": 12, "left": 8, "bottom": 55, "right": 92}}
+    """
+    if os.path.exists(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    else:
+        raw = json.loads(spec)
+
+    overrides = {}
+    for key, bbox in raw.items():
+        if '@' not in key and 'page' in bbox:
+            key = f"{key}@{bbox['page']}"
+        (selector,) = parse_figure_selector(key)
+        overrides[selector] = bbox
+    return overrides
+
+
+def _matches_selector(record, selector):
+    fig_type, number = selector
+    if str(record.get('number')) != number:
+        return False
+    return fig_type is None or record.get('type', '').lower() == fig_type
+
+
+def detect_page_elements(page, page_image_path, text_elements, scanned=None):
+    """Run text-guided detection for a single page, or layout segmentation if it is scanned.
+
+    text_elements is the page's entry from page_text_elements().
+    """
+    if scanned is None:
+        scanned = not has_text_layer(page)
+    if scanned:
+        with span('segment', page=page.number + 1):
+            return segment_page(page_image_path)
+    with span('detect', page=page.number + 1):
+        return detect_visual_elements_with_text_guidance(page_image_path, text_elements)
+
+
+def reextract_selected(pdf_path, output_dir, pages=None, figures=None, bbox_overrides=None, scale=2.0,
+                       target_width=None, on_page=None, crop_options=None):
+    """
+    Re-process only the selected pages/figures and patch figures_metadata.json in place.
+
+    Used by the Master rework loop so that feedback like "Figure 3 is cropped
+    badly" does not trigger a full re-extraction. Records and image files that
+    are not selected are left untouched, and a selected record is only
+    replaced once re-detection produced something in its place.
+
+    Args:
+        pdf_path: Path to PDF file
+        output_dir: Output directory of a previous extraction run
+        pages: Set of 1-based page numbers to re-extract completely
+        figures: Set of (page, type, number) selectors from parse_figure_selector
+        bbox_overrides: Dict of (page, type, number) selector -> bbox (percentages)
+        scale: Rendering scale factor
+        target_width: If set, render each crop adaptively at about this pixel width
+        on_page: Optional callback(page, records) called as each page finishes
+        crop_options: Optional trim settings for crop_and_save_elements
+
+    Returns:
+        The patched list of figure metadata
+    """
+    pages = set(pages or ())
+    figures = set(figures or ())
+    bbox_overrides = dict(bbox_overrides or {})
+
+    figures_dir = os.path.join(output_dir, 'figures')
+    temp_dir = os.path.join(output_dir, 'temp')
+    metadata_path = os.path.join(output_dir, 'figures_metadata.json')
+    os.makedirs(figures_dir, exist_ok=True)
+    os.makedirs(temp_dir, exist_ok=True)
+
+    metadata = []
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+    doc = fitz.open(pdf_path)
+
+    # (type, number) selectors per page
+    figures_by_page = {}
+    for page, fig_type, number in figures | set(bbox_overrides):
+        figures_by_page.setdefault(page, set()).add((fig_type, number))
+
+    text_elements = page_text_elements(doc)
+    selected_pages = []
+    for page in sorted(pages | set(figures_by_page)):
+        if page < 1 or page > len(doc):
+            print(f"Warning: page {page} out of range, skipping")
+        else:
+            selected_pages.append(page)
+    rendered = dict(render_pdf_pages(pdf_path, temp_dir, scale, pages=[page - 1 for page in selected_pages]))
+
+    patched = list(metadata)
+    for page in selected_pages:
+        page_num = page - 1
+        page_image_path = rendered[page_num]
+        print(f"\nRe-extracting page {page}...")
+
+        selectors = figures_by_page.get(page, set())
+        previous = [rec for rec in patched if rec['page'] == page]
+        elements = detect_page_elements(doc[page_num], page_image_path, text_elements[page_num])
+        if page not in pages:
+            elements = [elem for elem in elements if any(_matches_selector(elem, s) for s in selectors)]
+
+        # Explicit bbox overrides win over detection
+        for selector in selectors:
+            if (page,) + selector not in bbox_overrides:
+                continue
+            bbox = bbox_overrides[(page,) + selector]
+            old = next((rec for rec in previous if _matches_selector(rec, selector)), {})
+            elements = [elem for elem in elements if not _matches_selector(elem, selector)]
+            elements.append({
+                'type': selector[0] or old.get('type', 'figure'),
+                'number': old.get('number', selector[1]),
+                'description': old.get('description', ''),
+                'text': old.get('text_content', ''),
+                'top': bbox['top'],
+                'left': bbox['left'],
+                'bottom': bbox['bottom'],
+                'right': bbox['right']
+            })
+
+        saved = []
+        if elements:
+            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num,
+                                           pdf_page=doc[page_num] if target_width else None,
+                                           target_width=target_width, **(crop_options or {}))
+        os.remove(page_image_path)
+
+        # Retire old records only where a new one stands in: any result supersedes a
+        # re-extracted page, otherwise a new element matching the same selector
+        if page in pages:
+            replaced = previous if saved else []
+        else:
+            covered = {s for s in selectors if any(_matches_selector(rec, s) for rec in saved)}
+            replaced = [rec for rec in previous if any(_matches_selector(rec, s) for s in covered)]
+            for selector in sorted(selectors - covered, key=str):
+                print(f"Warning: nothing re-detected for {selector[0] or 'element'} {selector[1]} "
+                      f"on page {page}, keeping the previous record")
+
+        # Drop files of replaced records that were not overwritten
+        new_files = {rec['filename'] for rec in saved}
+        for rec in replaced:
+            old_path = os.path.join(figures_dir, rec['filename'])
+            if rec['filename'] not in new_files and os.path.exists(old_path):
+                os.remove(old_path)
+
+        # Keep the replacements where the old records were
+        insert_at = next((i for i, rec in enumerate(patched) if rec in replaced), None)
+        patched = [rec for rec in patched if rec not in replaced]
+        if insert_at is None:
+            insert_at = next((i for i, rec in enumerate(patched) if rec['page'] > page), len(patched))
+        else:
+            insert_at = min(insert_at, len(patched))
+        patched[insert_at:insert_at] = saved
+        if on_page:
+            on_page(page, saved)
+
+    doc.close()
+    os.rmdir(temp_dir)
+
+    # Write atomically so a crash never leaves half a metadata file behind
+    tmp_path = metadata_path + '.tmp'
+    with span('metadata', records=len(patched)):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(patched, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, metadata_path)
+
+    print(f"\nPatched metadata: {metadata_path}")
+    print(f"Total elements: {len(patched)}")
+
+    return patched
+
+
 def main():
     parser = argparse.ArgumentParser(description='Extract figures and tables from academic papers (PDF).')
     parser.add_argument('pdf_path', help='Path to PDF file')
     parser.add_argument('output_dir', help='Output directory for extracted figures')
     parser.add_argument('--scale', type=float, default=2.0, help='Rendering scale factor (default: 2.0)')
+    parser.add_argument('--target-width', type=int, help='Adaptive mode: render each crop at a zoom giving about this many pixels of width (e.g. 1600)')
+    parser.add_argument('--raster-store', action='store_true',
+                        help='Render pages into one memory-mapped file instead of per-page PNG temp files')
+    parser.add_argument('--workers', type=int, default=1, help='Detection processes sharing the raster store (default: 1)')
+    parser.add_argument('--pages', help='Re-extract only these pages, e.g. "3" or "2,5-7"')
+    parser.add_argument('--figures',
+                        help='Re-extract only these elements, each with its page: "figure:3@4,table:1@6" '
+                             '(numbers are the per-page "number" in figures_metadata.json)')
+    parser.add_argument('--bbox-override',
+                        help='JSON string or file mapping "figure:3@4" (or "figure:3" with a "page" key) '
+                             'to a bbox in percentages')
+    add_trim_arguments(parser)
+    parser.add_argument('--profile', help='Write a Chrome-trace/Perfetto JSON profile of every stage and page to this path')
+    parser.add_argument('--index-db', help='Also upsert figure records into this SQLite corpus index')
+    parser.add_argument('--no-server', action='store_true', help='Run locally even if extraction_server.py is running')
     args = parser.parse_args()
 
     if not os.path.exists(args.pdf_path):
         print(f"Error: PDF file not found: {args.pdf_path}", file=sys.stderr)
         sys.exit(1)
+    try:
+        figures = parse_figure_selector(args.figures) if args.figures else None
+        bbox_overrides = load_bbox_overrides(args.bbox_override) if args.bbox_override else None
+    except ValueError as e:
+        parser.error(str(e))
 
     print("Figure Extractor Script - Improved Version")
     print("=" * 50)
@@ -265,8 +589,56 @@ def main():
     print(f"Output: {args.output_dir}")
     print(f"Scale: {args.scale}x")
 
-    extract_figures_with_text_guidance(args.pdf_path, args.output_dir)
+    if args.profile:
+        enable_tracing()
+
+    start = time.perf_counter()
+    crop_options = crop_options_from_args(args)
+    metadata = None
+    if not args.no_server and not args.profile:
+        from extraction_client import try_remote
+        bbox_override = args.bbox_override
+        if bbox_override and os.path.exists(bbox_override):
+            bbox_override = os.path.abspath(bbox_override)
+        metadata = try_remote({
+            'extractor': 'improved',
+            'pdf_path': os.path.abspath(args.pdf_path),
+            'output_dir': os.path.abspath(args.output_dir),
+            'scale': args.scale,
+            'target_width': args.target_width,
+            'raster_store': args.raster_store,
+            'workers': args.workers,
+            'pages': args.pages,
+            'figures': args.figures,
+            'bbox_override': bbox_override,
+            'crop_options': crop_options
+        })
+
+    if metadata is None and (args.pages or args.figures or args.bbox_override):
+        metadata = reextract_selected(
+            args.pdf_path,
+            args.output_dir,
+            pages=parse_page_selector(args.pages) if args.pages else None,
+            figures=figures,
+            bbox_overrides=bbox_overrides,
+            scale=args.scale,
+            target_width=args.target_width,
+            crop_options=crop_options
+        )
+    elif metadata is None:
+        metadata = extract_figures_with_text_guidance(args.pdf_path, args.output_dir, args.scale, args.target_width,
+                                                      raster_store=args.raster_store, workers=args.workers,
+                                                      crop_options=crop_options)
+
+    if args.index_db:
+        from figure_index import upsert_figures
+        upsert_figures(args.index_db, args.pdf_path, metadata, os.path.join(args.output_dir, 'figures'),
+                       timings={'extract_s': round(time.perf_counter() - start, 3)})
+
+    if args.profile:
+        TRACER.write_chrome_trace(args.profile)
+        TRACER.print_summary()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
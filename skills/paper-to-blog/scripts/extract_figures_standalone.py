@@ -18,23 +18,11 @@ import json
 import os
 import sys
 import argparse
+import time
 
-
-def render_pdf_pages(pdf_path, output_dir, scale=2.0):
-    """Render PDF pages to high-resolution images."""
-    os.makedirs(output_dir, exist_ok=True)
-    rendered_pages = []
-    doc = fitz.open(pdf_path)
-
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
-        page_image_path = os.path.join(output_dir, f"temp_page_{page_num:03d}.png")
-        pix.save(page_image_path)
-        rendered_pages.append((page_num, page_image_path))
-        print(f"Rendered page {page_num + 1}/{len(doc)}: {page_image_path}")
-
-    doc.close()
-    return rendered_pages
+from adaptive_render import render_clip, render_pdf_pages
+from crop_trim import DEFAULT_PADDING, add_trim_arguments, crop_element, crop_options_from_args, page_raster
+from tracing import TRACER, span, enable as enable_tracing
 
 
 def detect_figures_simple(page_image_path):
@@ -91,13 +79,29 @@ def detect_figures_simple(page_image_path):
     return figures[:3]  # Limit to 3 figures per page
 
 
-def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
-    """Crop identified visual elements from page image and save individually."""
+def crop_and_save_elements(page_image_path, elements, output_dir, page_num, pdf_page=None, target_width=None,
+                           trim=False, include_caption=False, padding=DEFAULT_PADDING, trim_report=False):
+    """Crop identified visual elements from page image and save individually.
+
+    When target_width is given, each element is re-rendered from pdf_page at
+    a zoom chosen from its size instead of being cut out of the page image.
+    With trim set, each box is first shrunk to its ink bounds plus padding
+    (optionally taking in the caption); trim_report also measures the PNG
+    bytes saved by encoding the untrimmed crop in memory.
+    """
     os.makedirs(output_dir, exist_ok=True)
     page_img = Image.open(page_image_path)
+    page_array = page_raster(page_img) if trim else None
     img_width, img_height = page_img.size
     saved_elements = []
 
+    def cut(box):
+        if pdf_page is not None and target_width:
+            # Re-render only this region, zoomed to the target output width
+            fractions = (box[0] / img_width, box[1] / img_height, box[2] / img_width, box[3] / img_height)
+            return render_clip(pdf_page, fractions, target_width)
+        return page_img.crop(box), None
+
     for idx, element in enumerate(elements):
         # Convert percentage coordinates to pixels
         left = int(element.get('left', 10) / 100 * img_width)
@@ -111,14 +115,20 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
         right = max(left + 1, min(right, img_width))
         bottom = max(top + 1, min(bottom, img_height))
 
-        # Crop and save
-        cropped = page_img.crop((left, top, right, bottom))
         fig_type = element.get('type', 'figure')
+        bbox = {
+            'top': element.get('top', 10),
+            'left': element.get('left', 10),
+            'bottom': element.get('bottom', 90),
+            'right': element.get('right', 90)
+        }
+
         fig_num = element.get('number', idx + 1)
         description = element.get('description', 'unknown')[:20].replace(' ', '_').replace('/', '_')
         filename = f"{fig_type}{page_num+1}_{fig_num}_{description}.png"
         output_path = os.path.join(output_dir, filename)
-        cropped.save(output_path)
+        trimmed = crop_element(cut, page_array, (left, top, right, bottom), (img_width, img_height), output_path,
+                               page_num, fig_type, trim, include_caption, padding, trim_report)
 
         # Build metadata
         saved_elements.append({
@@ -128,25 +138,23 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
             'page': page_num + 1,
             'description': element.get('description', ''),
             'text_content': element.get('text', ''),
-            'bbox': {
-                'top': element.get('top', 10),
-                'left': element.get('left', 10),
-                'bottom': element.get('bottom', 90),
-                'right': element.get('right', 90)
-            }
+            'bbox': trimmed or bbox
         })
-        print(f"Saved: {output_path}")
 
     return saved_elements
 
 
-def extract_figures(pdf_path, output_dir):
+def extract_figures(pdf_path, output_dir, scale=2.0, target_width=None, on_page=None, crop_options=None):
     """
     Main function to extract figures and tables from PDF.
 
     Args:
         pdf_path: Path to PDF file
         output_dir: Directory to save extracted figures
+        scale: Rendering scale factor for the analyzed page images
+        target_width: If set, render each crop adaptively at about this pixel width
+        on_page: Optional callback(page, records) called as each page finishes
+        crop_options: Optional trim settings for crop_and_save_elements
 
     Returns:
         List of all extracted figure metadata
@@ -160,20 +168,30 @@ def extract_figures(pdf_path, output_dir):
 
     # Render and analyze PDF pages
     print("Rendering PDF pages...")
-    rendered_pages = render_pdf_pages(pdf_path, temp_dir)
+    rendered_pages = render_pdf_pages(pdf_path, temp_dir, scale)
+    doc = fitz.open(pdf_path) if target_width else None
 
     for page_num, page_image_path in rendered_pages:
         print(f"\nAnalyzing page {page_num + 1}...")
-        elements = detect_figures_simple(page_image_path)
+        with span('detect', page=page_num + 1):
+            elements = detect_figures_simple(page_image_path)
 
         if elements:
-            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num)
+            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num,
+                                           pdf_page=doc[page_num] if doc else None, target_width=target_width,
+                                           **(crop_options or {}))
             all_metadata.extend(saved)
+            if on_page:
+                on_page(page_num + 1, saved)
+
+    if doc:
+        doc.close()
 
     # Save metadata and cleanup
     metadata_path = os.path.join(output_dir, 'figures_metadata.json')
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2, ensure_ascii=False)
+    with span('metadata', records=len(all_metadata)):
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(all_metadata, f, indent=2, ensure_ascii=False)
 
     print(f"\nSaved metadata to: {metadata_path}")
     print(f"Total elements extracted: {len(all_metadata)}")
@@ -192,6 +210,11 @@ def main():
     parser.add_argument('pdf_path', help='Path to PDF file')
     parser.add_argument('output_dir', help='Output directory for extracted figures')
     parser.add_argument('--scale', type=float, default=2.0, help='Rendering scale factor (default: 2.0)')
+    parser.add_argument('--target-width', type=int, help='Adaptive mode: render each crop at a zoom giving about this many pixels of width (e.g. 1600)')
+    add_trim_arguments(parser)
+    parser.add_argument('--profile', help='Write a Chrome-trace/Perfetto JSON profile of every stage and page to this path')
+    parser.add_argument('--index-db', help='Also upsert figure records into this SQLite corpus index')
+    parser.add_argument('--no-server', action='store_true', help='Run locally even if extraction_server.py is running')
     args = parser.parse_args()
 
     if not os.path.exists(args.pdf_path):
@@ -204,7 +227,34 @@ def main():
     print(f"Output: {args.output_dir}")
     print(f"Scale: {args.scale}x")
 
-    extract_figures(args.pdf_path, args.output_dir)
+    if args.profile:
+        enable_tracing()
+
+    start = time.perf_counter()
+    crop_options = crop_options_from_args(args)
+    metadata = None
+    if not args.no_server and not args.profile:
+        from extraction_client import try_remote
+        metadata = try_remote({
+            'extractor': 'standalone',
+            'pdf_path': os.path.abspath(args.pdf_path),
+            'output_dir': os.path.abspath(args.output_dir),
+            'scale': args.scale,
+            'target_width': args.target_width,
+            'crop_options': crop_options
+        })
+    if metadata is None:
+        metadata = extract_figures(args.pdf_path, args.output_dir, args.scale, args.target_width,
+                                   crop_options=crop_options)
+
+    if args.index_db:
+        from figure_index import upsert_figures
+        upsert_figures(args.index_db, args.pdf_path, metadata, os.path.join(args.output_dir, 'figures'),
+                       timings={'extract_s': round(time.perf_counter() - start, 3)})
+
+    if args.profile:
+        TRACER.write_chrome_trace(args.profile)
+        TRACER.print_summary()
 
 
 if __name__ == "__main__":
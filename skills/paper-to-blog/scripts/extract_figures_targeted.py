@@ -18,23 +18,11 @@ import json
 import os
 import sys
 import argparse
+import time
 
-
-def render_pdf_pages(pdf_path, output_dir, scale=2.0):
-    """Render PDF pages to high-resolution images."""
-    os.makedirs(output_dir, exist_ok=True)
-    rendered_pages = []
-    doc = fitz.open(pdf_path)
-
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(scale, scale))
-        page_image_path = os.path.join(output_dir, f"page_{page_num:03d}.png")
-        pix.save(page_image_path)
-        rendered_pages.append((page_num, page_image_path))
-        print(f"Rendered page {page_num + 1}/{len(doc)}: {page_image_path}")
-
-    doc.close()
-    return rendered_pages
+from adaptive_render import render_clip, render_pdf_pages
+from crop_trim import DEFAULT_PADDING, add_trim_arguments, crop_element, crop_options_from_args, page_raster
+from tracing import TRACER, span, enable as enable_tracing
 
 
 def analyze_pdf_for_figures_tables(pdf_path):
@@ -47,7 +35,8 @@ def analyze_pdf_for_figures_tables(pdf_path):
 
     for page_num in range(len(doc)):
         page = doc[page_num]
-        text = page.get_text()
+        with span('text_scan', page=page_num + 1):
+            text = page.get_text()
         lines = text.split('\n')
 
         for line in lines:
@@ -156,13 +145,29 @@ def extract_visual_elements_targeted(page_image_path, elements_info):
     return extracted_elements
 
 
-def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
-    """Crop identified visual elements from page image and save individually."""
+def crop_and_save_elements(page_image_path, elements, output_dir, page_num, pdf_page=None, target_width=None,
+                           trim=False, include_caption=False, padding=DEFAULT_PADDING, trim_report=False):
+    """Crop identified visual elements from page image and save individually.
+
+    When target_width is given, each element is re-rendered from pdf_page at
+    a zoom chosen from its size instead of being cut out of the page image.
+    With trim set, each box is first shrunk to its ink bounds plus padding
+    (optionally taking in the caption); trim_report also measures the PNG
+    bytes saved by encoding the untrimmed crop in memory.
+    """
     os.makedirs(output_dir, exist_ok=True)
     page_img = Image.open(page_image_path)
+    page_array = page_raster(page_img) if trim else None
     img_width, img_height = page_img.size
     saved_elements = []
 
+    def cut(box):
+        if pdf_page is not None and target_width:
+            # Re-render only this region, zoomed to the target output width
+            fractions = (box[0] / img_width, box[1] / img_height, box[2] / img_width, box[3] / img_height)
+            return render_clip(pdf_page, fractions, target_width)
+        return page_img.crop(box), None
+
     for element in elements:
         # Set default bounding box if not provided
         if 'bbox' in element:
@@ -194,14 +199,13 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
         right = max(left + 1, min(right, img_width))
         bottom = max(top + 1, min(bottom, img_height))
 
-        # Crop and save
-        cropped = page_img.crop((left, top, right, bottom))
         fig_type = element['type']
         fig_num = element['number']
         description = element.get('description', element.get('title', ''))[:30].replace(' ', '_').replace('/', '_')
         filename = f"{fig_type}{fig_num}_{description}.png"
         output_path = os.path.join(output_dir, filename)
-        cropped.save(output_path)
+        trimmed = crop_element(cut, page_array, (left, top, right, bottom), (img_width, img_height), output_path,
+                               page_num, fig_type, trim, include_caption, padding, trim_report)
 
         # Build metadata
         saved_elements.append({
@@ -211,15 +215,20 @@ def crop_and_save_elements(page_image_path, elements, output_dir, page_num):
             'page': page_num + 1,
             'description': element.get('description', element.get('title', '')),
             'text_content': element.get('text', ''),
-            'bbox': bbox
+            'bbox': trimmed or bbox
         })
-        print(f"Saved: {output_path}")
 
     return saved_elements
 
 
-def extract_figures_targeted(pdf_path, output_dir):
-    """Main extraction function with targeted approach."""
+def extract_figures_targeted(pdf_path, output_dir, scale=3.0, target_width=None, on_page=None, crop_options=None):
+    """Main extraction function with targeted approach.
+
+    With target_width set, crops are re-rendered per figure at an adaptive
+    zoom and `scale` only needs to be large enough for the page images.
+    on_page(page, records) is called as each page finishes. crop_options
+    (trim, include_caption, padding, trim_report) go to crop_and_save_elements.
+    """
     temp_dir = os.path.join(output_dir, 'temp')
     figures_dir = os.path.join(output_dir, 'figures')
     os.makedirs(figures_dir, exist_ok=True)
@@ -254,7 +263,8 @@ def extract_figures_targeted(pdf_path, output_dir):
 
     # Render pages and extract elements
     print("\nRendering PDF pages...")
-    rendered_pages = render_pdf_pages(pdf_path, temp_dir)
+    rendered_pages = render_pdf_pages(pdf_path, temp_dir, scale, prefix='page_')
+    doc = fitz.open(pdf_path) if target_width else None
 
     # Group elements by page
     page_to_elements = {}
@@ -272,13 +282,21 @@ def extract_figures_targeted(pdf_path, output_dir):
             print(f"Debug - elements type: {type(elements)}")
             print(f"Debug - first element: {elements[0] if elements else 'None'}")
             print(f"Debug - first element keys: {elements[0].keys() if elements and isinstance(elements[0], dict) else 'N/A'}")
-            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num)
+            saved = crop_and_save_elements(page_image_path, elements, figures_dir, page_num,
+                                           pdf_page=doc[page_num] if doc else None, target_width=target_width,
+                                           **(crop_options or {}))
             all_metadata.extend(saved)
+            if on_page:
+                on_page(page_num + 1, saved)
+
+    if doc:
+        doc.close()
 
     # Save metadata
     metadata_path = os.path.join(output_dir, 'figures_metadata.json')
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2, ensure_ascii=False)
+    with span('metadata', records=len(all_metadata)):
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(all_metadata, f, indent=2, ensure_ascii=False)
 
     print(f"\nSaved metadata to: {metadata_path}")
     print(f"Total elements extracted: {len(all_metadata)}")
@@ -296,6 +314,11 @@ def main():
     parser.add_argument('pdf_path', help='Path to PDF file')
     parser.add_argument('output_dir', help='Output directory for extracted figures')
     parser.add_argument('--scale', type=float, default=3.0, help='Rendering scale factor (default: 3.0)')
+    parser.add_argument('--target-width', type=int, help='Adaptive mode: render each crop at a zoom giving about this many pixels of width (e.g. 1600)')
+    add_trim_arguments(parser)
+    parser.add_argument('--profile', help='Write a Chrome-trace/Perfetto JSON profile of every stage and page to this path')
+    parser.add_argument('--index-db', help='Also upsert figure records into this SQLite corpus index')
+    parser.add_argument('--no-server', action='store_true', help='Run locally even if extraction_server.py is running')
     args = parser.parse_args()
 
     if not os.path.exists(args.pdf_path):
@@ -308,7 +331,34 @@ def main():
     print(f"Output: {args.output_dir}")
     print(f"Scale: {args.scale}x")
 
-    extract_figures_targeted(args.pdf_path, args.output_dir)
+    if args.profile:
+        enable_tracing()
+
+    start = time.perf_counter()
+    crop_options = crop_options_from_args(args)
+    metadata = None
+    if not args.no_server and not args.profile:
+        from extraction_client import try_remote
+        metadata = try_remote({
+            'extractor': 'targeted',
+            'pdf_path': os.path.abspath(args.pdf_path),
+            'output_dir': os.path.abspath(args.output_dir),
+            'scale': args.scale,
+            'target_width': args.target_width,
+            'crop_options': crop_options
+        })
+    if metadata is None:
+        metadata = extract_figures_targeted(args.pdf_path, args.output_dir, args.scale, args.target_width,
+                                            crop_options=crop_options)
+
+    if args.index_db:
+        from figure_index import upsert_figures
+        upsert_figures(args.index_db, args.pdf_path, metadata, os.path.join(args.output_dir, 'figures'),
+                       timings={'extract_s': round(time.perf_counter() - start, 3)})
+
+    if args.profile:
+        TRACER.write_chrome_trace(args.profile)
+        TRACER.print_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Thin Client for the Warm Extraction Server
+
+Sends an extraction job to extraction_server.py when it is running and
+streams per-page results back; otherwise runs the extractor script locally.
+This module only imports the standard library, so calling it costs no
+fitz/PIL/NumPy start-up.
+
+Usage:
+    python extraction_client.py improved <pdf_path> <output_dir> [--scale 2.0] [--figures figure:3@4]
+
+Environment:
+    FIGURE_EXTRACTOR_SERVER - host:port of the server (default: 127.0.0.1:8765)
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+
+
+DEFAULT_SERVER = "127.0.0.1:8765"
+HEALTH_TIMEOUT = 0.5   # seconds for the /health probe
+STREAM_TIMEOUT = 300   # seconds of silence between streamed events before giving up
+
+# Anything the server, or whatever else is listening on its port, can answer with
+REMOTE_ERRORS = (OSError, http.client.HTTPException, ValueError, KeyError, TypeError, RuntimeError)
+
+SCRIPTS = {
+    'improved': 'extract_figures_improved.py',
+    'standalone': 'extract_figures_standalone.py',
+    'targeted': 'extract_figures_targeted.py',
+}
+
+
+def server_address():
+    """(host, port) of the extraction server from FIGURE_EXTRACTOR_SERVER."""
+    host, _, port = os.environ.get("FIGURE_EXTRACTOR_SERVER", DEFAULT_SERVER).rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def server_available(address=None, timeout=HEALTH_TIMEOUT):
+    """True if an extraction server answers its /health endpoint at the address."""
+    host, port = address or server_address()
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request('GET', '/health')
+        response = conn.getresponse()
+        if response.status != 200:
+            return False
+        health = json.loads(response.read())
+        return isinstance(health, dict) and health.get('status') == 'ok'
+    except REMOTE_ERRORS:
+        return False
+    finally:
+        conn.close()
+
+
+def run_remote(job, address=None, on_page=None, timeout=STREAM_TIMEOUT):
+    """
+    Submit a job and stream its events.
+
+    Args:
+        job: Job dict (see extraction_server.run_job)
+        address: (host, port), defaults to server_address()
+        on_page: Optional callback(page, records) for streamed page results
+        timeout: Seconds to wait for the connection and for each streamed event
+
+    Returns:
+        The final figure metadata list
+    """
+    host, port = address or server_address()
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request('POST', '/extract', body=json.dumps(job), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"Extraction server returned {response.status}: {response.read().decode()}")
+
+        for line in response:
+            event = json.loads(line)
+            if event['event'] == 'page':
+                print(f"Page {event['page']}: {len(event['records'])} element(s)")
+                if on_page:
+                    on_page(event['page'], event['records'])
+            elif event['event'] == 'done':
+                print(f"Server finished in {event['elapsed_s']:.2f}s")
+                return event['metadata']
+            elif event['event'] == 'error':
+                raise RuntimeError(f"Extraction server error: {event['message']}")
+    finally:
+        conn.close()
+
+    raise RuntimeError("Extraction server closed the stream before finishing")
+
+
+def try_remote(job, on_page=None):
+    """Run the job on the server if it is up; return None to run locally instead.
+
+    None also covers a server that fails, times out or answers with
+    something other than the extraction protocol.
+    """
+    address = server_address()
+    if not server_available(address):
+        return None
+    print(f"Using extraction server at {address[0]}:{address[1]}")
+    try:
+        return run_remote(job, address, on_page)
+    except REMOTE_ERRORS as e:
+        print(f"Extraction server failed ({type(e).__name__}: {e}), running locally", file=sys.stderr)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a figure extraction job on the warm extraction server.')
+    parser.add_argument('extractor', choices=sorted(SCRIPTS), help='Which extractor to run')
+    parser.add_argument('pdf_path', help='Path to PDF file')
+    parser.add_argument('output_dir', help='Output directory for extracted figures')
+    parser.add_argument('--scale', type=float, help='Rendering scale factor (extractor default if omitted)')
+    parser.add_argument('--target-width', type=int, help='Adaptive per-figure render width in pixels')
+    parser.add_argument('--raster-store', action='store_true', help='Use the memory-mapped raster store (improved)')
+    parser.add_argument('--workers', type=int, default=1, help='Detection workers with --raster-store (improved)')
+    parser.add_argument('--pages', help='Re-extract only these pages (improved)')
+    parser.add_argument('--figures', help='Re-extract only these elements (improved)')
+    parser.add_argument('--bbox-override', help='Bbox overrides as JSON string or file (improved)')
+    parser.add_argument('--trim', action='store_true', help='Shrink each crop to its ink bounds plus padding')
+    parser.add_argument('--include-caption', action='store_true', help='With --trim, take in the caption block')
+    parser.add_argument('--trim-padding', type=int, help='Pixels kept around the ink when trimming')
+    parser.add_argument('--trim-report', action='store_true', help='With --trim, also report PNG bytes saved')
+    args = parser.parse_args()
+
+    improved_only = [flag for flag in ('raster_store', 'pages', 'figures', 'bbox_override') if getattr(args, flag)]
+    if args.extractor != 'improved' and (improved_only or args.workers != 1):
+        parser.error(f"--{(improved_only or ['workers'])[0].replace('_', '-')} is only supported by the improved extractor")
+
+    if not os.path.exists(args.pdf_path):
+        print(f"Error: PDF file not found: {args.pdf_path}", file=sys.stderr)
+        sys.exit(1)
+
+    crop_options = None
+    if args.trim or args.include_caption or args.trim_report:
+        crop_options = {'trim': True, 'include_caption': args.include_caption, 'trim_report': args.trim_report}
+        if args.trim_padding is not None:
+            crop_options['padding'] = args.trim_padding
+
+    job = {
+        'extractor': args.extractor,
+        'pdf_path': os.path.abspath(args.pdf_path),
+        'output_dir': os.path.abspath(args.output_dir),
+        'scale': args.scale,
+        'target_width': args.target_width,
+        'raster_store': args.raster_store,
+        'workers': args.workers,
+        'pages': args.pages,
+        'figures': args.figures,
+        'bbox_override': os.path.abspath(args.bbox_override)
+        if args.bbox_override and os.path.exists(args.bbox_override) else args.bbox_override,
+        'crop_options': crop_options,
+    }
+    metadata = try_remote(job)
+    if metadata is not None:
+        print(f"Total elements extracted: {len(metadata)}")
+        return
+
+    # No server: fall back to the extractor script itself
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), SCRIPTS[args.extractor])
+    argv = [sys.executable, script, args.pdf_path, args.output_dir, '--no-server']
+    for flag in ('scale', 'target_width', 'workers', 'pages', 'figures', 'bbox_override', 'trim_padding'):
+        value = getattr(args, flag)
+        if value is not None and not (flag == 'workers' and value == 1):
+            argv += ['--' + flag.replace('_', '-'), str(value)]
+    for flag in ('raster_store', 'trim', 'include_caption', 'trim_report'):
+        if getattr(args, flag):
+            argv.append('--' + flag.replace('_', '-'))
+    sys.exit(subprocess.call(argv))
+
+
+if __name__ == "__main__":
+    main()
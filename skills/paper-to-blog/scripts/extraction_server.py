@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Warm Figure Extraction Server
+
+Long-running localhost HTTP server that keeps fitz, PIL, NumPy and the
+extractor modules loaded and holds a bounded in-memory cache of rendered
+pages, so repeated calls from the coordinator's rework loop skip interpreter
+start-up, imports and re-rendering. Jobs are posted as JSON and per-page
+results stream back as newline-delimited JSON events.
+
+Usage:
+    python extraction_server.py [--host 127.0.0.1] [--port 8765] [--cache-mb 512]
+
+Protocol:
+    GET  /health   -> {"status": "ok", "cache": {...}}
+    POST /extract  -> NDJSON stream of
+                      {"event": "page", "page": 3, "records": [...]}
+                      {"event": "done", "metadata": [...], "elapsed_s": 1.2}
+                      {"event": "error", "message": "..."}
+
+The extractor CLIs and extraction_client.py use the server automatically
+when it is running (see FIGURE_EXTRACTOR_SERVER).
+
+Requirements:
+    pip install pymupdf pillow numpy
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import adaptive_render
+import extract_figures_improved
+import extract_figures_standalone
+import extract_figures_targeted
+from extraction_client import DEFAULT_SERVER
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered page PNGs, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def run_job(job, on_page=None):
+    """
+    Run one extraction job in-process.
+
+    Args:
+        job: Dict with extractor ('improved', 'standalone' or 'targeted'),
+             pdf_path, output_dir and optional scale, target_width,
+             raster_store, workers, pages, figures, bbox_override, crop_options
+        on_page: Optional callback(page, records) for per-page results
+
+    Returns:
+        Figure metadata list
+    """
+    extractor = job.get('extractor', 'improved')
+    pdf_path = job['pdf_path']
+    output_dir = job['output_dir']
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+    kwargs = {'target_width': job.get('target_width'), 'on_page': on_page, 'crop_options': job.get('crop_options')}
+    if job.get('scale') is not None:
+        kwargs['scale'] = job['scale']
+
+    if extractor == 'improved':
+        module = extract_figures_improved
+        if job.get('pages') or job.get('figures') or job.get('bbox_override'):
+            return module.reextract_selected(
+                pdf_path,
+                output_dir,
+                pages=module.parse_page_selector(job['pages']) if job.get('pages') else None,
+                figures=module.parse_figure_selector(job['figures']) if job.get('figures') else None,
+                bbox_overrides=module.load_bbox_overrides(job['bbox_override']) if job.get('bbox_override') else None,
+                **kwargs
+            )
+        return module.extract_figures_with_text_guidance(
+            pdf_path, output_dir, raster_store=job.get('raster_store', False),
+            workers=job.get('workers') or 1, **kwargs)
+    if extractor == 'standalone':
+        return extract_figures_standalone.extract_figures(pdf_path, output_dir, **kwargs)
+    if extractor == 'targeted':
+        return extract_figures_targeted.extract_figures_targeted(pdf_path, output_dir, **kwargs)
+    raise ValueError(f"Unknown extractor: {extractor}")
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """Serves /health and streams /extract jobs; jobs run one at a time."""
+
+    job_lock = threading.Lock()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _emit(self, event):
+        self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        self._send_json(200, {'status': 'ok', 'pid': os.getpid(),
+                              'cache': adaptive_render.RENDER_CACHE.stats()})
+
+    def do_POST(self):
+        if self.path != '/extract':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {'error': f'invalid job: {e}'})
+            return
+
+        # Stream NDJSON until the connection closes (no Content-Length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+
+        with self.job_lock:
+            start = time.perf_counter()
+            try:
+                metadata = run_job(job, on_page=lambda page, records: self._emit(
+                    {'event': 'page', 'page': page, 'records': records}))
+                self._emit({'event': 'done', 'metadata': metadata,
+                            'elapsed_s': round(time.perf_counter() - start, 3)})
+            except Exception as e:
+                self._emit({'event': 'error', 'message': f"{type(e).__name__}: {e}"})
+
+
+def main():
+    default_host, _, default_port = DEFAULT_SERVER.rpartition(':')
+    parser = argparse.ArgumentParser(description='Warm figure extraction server with a local job API.')
+    parser.add_argument('--host', default=default_host, help=f'Bind address (default: {default_host})')
+    parser.add_argument('--port', type=int, default=int(default_port), help=f'Port (default: {default_port})')
+    parser.add_argument('--cache-mb', type=int, default=512, help='Render cache size in MB (default: 512)')
+    args = parser.parse_args()
+
+    adaptive_render.RENDER_CACHE = RenderCache(args.cache_mb * 1024 * 1024)
+
+    server = ThreadingHTTPServer((args.host, args.port), ExtractionHandler)
+    print(f"Extraction server listening on {args.host}:{args.port} (cache {args.cache_mb} MB)")
+    print(f"Set FIGURE_EXTRACTOR_SERVER={args.host}:{args.port} if not using the default")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
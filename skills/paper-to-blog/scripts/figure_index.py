@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Corpus-wide SQLite Index for Extracted Figures
+
+Upserts the records of each extraction run's figures_metadata.json into a
+single SQLite database so corpus lookups ("every architecture diagram we
+extracted this month") are indexed queries instead of JSON globbing. The
+metadata is the paper's complete figure list, so rows of that paper which
+are no longer in it (renumbered or dropped figures) are deleted.
+
+Usage:
+    python figure_index.py ingest <db_path> <pdf_path> <output_dir>
+    python figure_index.py query <db_path> [--type diagram] [--caption architecture] [--since 2026-10-01]
+
+Requirements:
+    pip install pillow
+"""
+
+from PIL import Image
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS figures (
+    id INTEGER PRIMARY KEY,
+    paper_hash TEXT NOT NULL,
+    pdf_path TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    number TEXT NOT NULL,
+    bbox_top REAL,
+    bbox_left REAL,
+    bbox_bottom REAL,
+    bbox_right REAL,
+    caption TEXT,
+    file_path TEXT NOT NULL,
+    phash TEXT,
+    timings TEXT,               -- run-level timings (JSON) of the extraction that wrote the row
+    extracted_at TEXT NOT NULL,
+    UNIQUE (paper_hash, page, type, number)
+);
+CREATE INDEX IF NOT EXISTS idx_figures_type ON figures (type, extracted_at);
+CREATE INDEX IF NOT EXISTS idx_figures_extracted_at ON figures (extracted_at);
+CREATE INDEX IF NOT EXISTS idx_figures_paper ON figures (paper_hash, page);
+CREATE INDEX IF NOT EXISTS idx_figures_phash ON figures (phash);
+"""
+
+UPSERT = """
+INSERT INTO figures (
+    paper_hash, pdf_path, page, type, number,
+    bbox_top, bbox_left, bbox_bottom, bbox_right,
+    caption, file_path, phash, timings, extracted_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (paper_hash, page, type, number) DO UPDATE SET
+    pdf_path = excluded.pdf_path,
+    bbox_top = excluded.bbox_top,
+    bbox_left = excluded.bbox_left,
+    bbox_bottom = excluded.bbox_bottom,
+    bbox_right = excluded.bbox_right,
+    caption = excluded.caption,
+    file_path = excluded.file_path,
+    phash = excluded.phash,
+    timings = excluded.timings,
+    extracted_at = excluded.extracted_at
+"""
+
+DELETE_STALE = """
+DELETE FROM figures
+WHERE paper_hash = ? AND NOT EXISTS (
+    SELECT 1 FROM current_figures AS c
+    WHERE c.page = figures.page AND c.type = figures.type AND c.number = figures.number
+)
+"""
+
+
+def paper_hash(pdf_path, chunk_size=1 << 20):
+    """SHA-256 of the PDF file, used as a stable paper identifier."""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def perceptual_hash(image_path):
+    """64-bit difference hash (dHash) of an image as a 16-char hex string."""
+    with Image.open(image_path) as img:
+        small = img.convert('L').resize((9, 8), Image.LANCZOS)
+        pixels = small.tobytes()
+
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+def open_index(db_path):
+    """Open (and create if needed) the figure index database."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def upsert_figures(db_path, pdf_path, records, figures_dir, timings=None):
+    """
+    Upsert extracted figure records into the index and delete the paper's stale rows.
+
+    Args:
+        db_path: Path to the SQLite database
+        pdf_path: Source PDF (hashed to identify the paper)
+        records: The paper's complete figure metadata as written to figures_metadata.json
+        figures_dir: Directory holding the cropped figure files
+        timings: Optional run-level timings (seconds) stored with every record
+
+    Returns:
+        Number of records upserted
+    """
+    digest = paper_hash(pdf_path)
+    extracted_at = datetime.now().isoformat(timespec='seconds')
+    rows = []
+
+    for record in records:
+        file_path = os.path.abspath(os.path.join(figures_dir, record['filename']))
+        phash = perceptual_hash(file_path) if os.path.exists(file_path) else None
+        bbox = record.get('bbox', {})
+        rows.append((
+            digest,
+            os.path.abspath(pdf_path),
+            int(record['page']),
+            record.get('type', 'figure'),
+            str(record.get('number', '')),
+            bbox.get('top'),
+            bbox.get('left'),
+            bbox.get('bottom'),
+            bbox.get('right'),
+            record.get('text_content') or record.get('description', ''),
+            file_path,
+            phash,
+            json.dumps(timings) if timings else None,
+            extracted_at
+        ))
+
+    conn = open_index(db_path)
+    try:
+        with conn:
+            conn.executemany(UPSERT, rows)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_figures (page INTEGER, type TEXT, number TEXT)")
+            conn.execute("DELETE FROM current_figures")
+            conn.executemany("INSERT INTO current_figures VALUES (?, ?, ?)", [row[2:5] for row in rows])
+            removed = conn.execute(DELETE_STALE, (digest,)).rowcount
+    finally:
+        conn.close()
+
+    print(f"Indexed {len(rows)} figures into {db_path}" + (f", removed {removed} stale" if removed else ""))
+    return len(rows)
+
+
+def query_figures(db_path, fig_type=None, caption=None, since=None, until=None, paper=None, limit=100):
+    """Query the index; all filters are optional and combined with AND."""
+    clauses = []
+    params = []
+    if fig_type:
+        clauses.append("type = ?")
+        params.append(fig_type)
+    if since:
+        clauses.append("extracted_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("extracted_at < ?")
+        params.append(until)
+    if paper:
+        clauses.append("paper_hash LIKE ?")
+        params.append(paper + '%')
+    if caption:
+        clauses.append("caption LIKE ?")
+        params.append(f"%{caption}%")
+
+    sql = "SELECT * FROM figures"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY extracted_at DESC, paper_hash, page LIMIT ?"
+    params.append(limit)
+
+    conn = open_index(db_path)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Corpus-wide SQLite index of extracted figures.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest = subparsers.add_parser('ingest', help='Index an existing extraction output directory')
+    ingest.add_argument('db_path', help='Path to SQLite database')
+    ingest.add_argument('pdf_path', help='Source PDF of the extraction run')
+    ingest.add_argument('output_dir', help='Extraction output directory (with figures_metadata.json)')
+
+    query = subparsers.add_parser('query', help='Query indexed figures')
+    query.add_argument('db_path', help='Path to SQLite database')
+    query.add_argument('--type', dest='fig_type', help='Element type, e.g. figure, table, diagram')
+    query.add_argument('--caption', help='Substring to match in the caption')
+    query.add_argument('--since', help='ISO date/time lower bound on extraction time')
+    query.add_argument('--until', help='ISO date/time upper bound on extraction time')
+    query.add_argument('--paper', help='Paper hash (or prefix)')
+    query.add_argument('--limit', type=int, default=100, help='Maximum rows (default: 100)')
+    query.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        metadata_path = os.path.join(args.output_dir, 'figures_metadata.json')
+        if not os.path.exists(metadata_path):
+            print(f"Error: metadata not found: {metadata_path}", file=sys.stderr)
+            sys.exit(1)
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        upsert_figures(args.db_path, args.pdf_path, records, os.path.join(args.output_dir, 'figures'))
+        return
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: index not found: {args.db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    rows = query_figures(args.db_path, args.fig_type, args.caption, args.since,
+                         args.until, args.paper, args.limit)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return
+
+    for row in rows:
+        print(f"{row['paper_hash'][:12]}  p{row['page']:<4} {row['type']:<8} {row['number']:<4} "
+              f"{row['extracted_at']}  {row['file_path']}")
+    print(f"{len(rows)} result(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,12 @@ Generates cartoon infographic cover images for blog posts
 using the ZhipuAI GLM-image (CogView) text-to-image API.
 
 Usage:
-    python generate_cover.py --blog-content <content> --output <path>
+    python generate_cover.py --blog-content <content> --output <path> [--candidates 3]
+    python generate_cover.py -c <content> -t <title> -o <path> --placeholder --fallback-local
 
 Environment:
     ZHIPUAI_API_KEY - Your ZhipuAI API key (get from https://open.bigmodel.cn/)
+    ZHIPUAI_API_URL - Images endpoint override, e.g. a local cover_api_stub.py
 
 Requirements:
     pip install requests pillow
@@ -18,16 +20,37 @@ Requirements:
 import os
 import sys
 import argparse
+import base64
+import glob
+import json
+import math
+import re
 import requests
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
 from PIL import Image
-import io
+import time
+
+from cover_cache import (CoverCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB,
+                         cache_key)
 
 
 # API Configuration
-ZHIPUAI_API_URL = "https://open.bigmodel.cn/api/paas/v4/images/generations"
+ZHIPUAI_API_URL = os.environ.get("ZHIPUAI_API_URL", "https://open.bigmodel.cn/api/paas/v4/images/generations")
 DEFAULT_MODEL = "glm-image"
 DEFAULT_SIZE = "1024x1024"  # ZhipuAI API supports square format
 
+# HTTP behaviour: (connect, read) timeouts and retry/backoff on quota and server errors
+GENERATE_TIMEOUT = (10, 60)
+DOWNLOAD_TIMEOUT = (10, 30)
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
 # Theme keywords and visual elements
 THEMES = {
     'ai': ['ai', 'artificial intelligence', 'machine learning', 'neural', 'model'],
@@ -37,6 +60,15 @@ THEMES = {
     'code': ['code', 'programming', 'algorithm', 'software'],
 }
 
+# Generic words that also appear outside their theme count for less
+KEYWORD_WEIGHTS = {
+    'model': 0.3, 'data': 0.4, 'text': 0.4, 'image': 0.5, 'graph': 0.5, 'analysis': 0.5, 'code': 0.6,
+}
+
+# Themes scoring at least this share of the top score are blended into the prompt
+BLEND_MIN_SHARE = 0.5
+BLEND_MAX_THEMES = 2
+
 VISUAL_ELEMENTS = {
     'ai': 'stylized brain with circuit patterns, neural network visualization',
     'vision': 'eye with digital overlay, camera lens with data streams',
@@ -58,19 +90,135 @@ def get_api_key():
     return api_key
 
 
+class GenerationRetry(Retry):
+    """
+    Retry policy that never resends a POST the API may already have received.
+
+    A read timeout or dropped connection after the request was sent can mean
+    the image is being generated (and billed), so a POST is retried only when
+    it failed to connect or was answered with one of RETRY_STATUSES.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = self
+        if method == 'POST' and error is not None and not self._is_connection_error(error):
+            retry = self.new(read=0, other=0)
+        return Retry.increment(retry, method, url, response, error, _pool, _stacktrace)
+
+
+def connect_failed(error):
+    """True if a requests error happened before the request was sent (DNS, refused, connect timeout)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, 'reason', reason), (NewConnectionError, ConnectTimeoutError))
+
+
+def create_session(retries=DEFAULT_RETRIES, pool_size=10):
+    """
+    Pooled keep-alive session that retries 429/5xx with exponential backoff.
+
+    Retry-After headers from the API are honoured. Downloads (GET) are also
+    retried after read errors; generation requests (POST) only after connect
+    errors and retryable statuses, see GenerationRetry.
+    """
+    retry = GenerationRetry(
+        total=retries,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session = None
+
+
+def get_session():
+    """Process-wide session, created on first use."""
+    global _session
+    if _session is None:
+        _session = create_session()
+    return _session
+
+
+def _build_keyword_index(themes):
+    """token or space-joined phrase -> [(theme, weight)], plus the longest phrase length in tokens."""
+    index = {}
+    for theme, keywords in themes.items():
+        for kw in keywords:
+            index.setdefault(kw, []).append((theme, KEYWORD_WEIGHTS.get(kw, 1.0)))
+    return index, max(len(kw.split()) for kw in index)
+
+
+KEYWORD_INDEX, MAX_PHRASE_TOKENS = _build_keyword_index(THEMES)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def score_themes(content):
+    """
+    Weighted score per theme from one pass over the tokens of the content.
+
+    Keywords match whole tokens (so 'ai' no longer matches inside 'said'),
+    multi-word keywords match consecutive tokens, and a trailing plural 's'
+    is ignored. Repeats count sub-linearly: 1 + ln(count) per keyword.
+
+    Returns:
+        Dict of theme -> score, highest first; empty if nothing matched
+    """
+    counts = {}
+    window = []
+    for token in TOKEN_RE.findall(content.lower()):
+        if token not in KEYWORD_INDEX and token.endswith('s') and token[:-1] in KEYWORD_INDEX:
+            token = token[:-1]
+        window.append(token)
+        if len(window) > MAX_PHRASE_TOKENS:
+            window.pop(0)
+        # Every keyword ending at this token: the token itself and the phrases before it
+        for n in range(1, len(window) + 1):
+            candidate = token if n == 1 else ' '.join(window[-n:])
+            if candidate in KEYWORD_INDEX:
+                counts[candidate] = counts.get(candidate, 0) + 1
+
+    scores = {}
+    for kw, count in counts.items():
+        for theme, weight in KEYWORD_INDEX[kw]:
+            scores[theme] = scores.get(theme, 0.0) + weight * (1 + math.log(count))
+    return dict(sorted(scores.items(), key=lambda item: -item[1]))
+
+
+def top_themes_from_scores(scores, max_themes=BLEND_MAX_THEMES, min_share=BLEND_MIN_SHARE):
+    """Best-scoring themes, keeping runners-up within min_share of the top score; ['tech'] if none."""
+    if not scores:
+        return ['tech']
+    best = next(iter(scores.values()))
+    return [theme for theme, score in scores.items() if score >= best * min_share][:max_themes]
+
+
+def top_themes(content, max_themes=BLEND_MAX_THEMES, min_share=BLEND_MIN_SHARE):
+    """Themes to blend into the cover prompt for this content."""
+    return top_themes_from_scores(score_themes(content), max_themes, min_share)
+
+
 def detect_theme(content):
     """Detect visual theme from blog content keywords."""
-    content_lower = content.lower()
-    for theme, keywords in THEMES.items():
-        if any(kw in content_lower for kw in keywords):
-            return theme
-    return 'tech'
+    return top_themes(content, max_themes=1)[0]
 
 
 def construct_prompt(blog_content, blog_title=None):
-    """Construct a prompt for CogView based on blog content."""
-    theme = detect_theme(blog_content)
-    main_element = VISUAL_ELEMENTS[theme]
+    """Construct a prompt for CogView based on blog content, blending the strongest themes."""
+    themes = top_themes(blog_content)
+    main_element = VISUAL_ELEMENTS[themes[0]]
+    secondary = ''.join(f"\n- Secondary motif: {VISUAL_ELEMENTS[theme]}" for theme in themes[1:])
 
     return f"""Cartoon infographic illustration for a blog post.
 
@@ -78,7 +226,7 @@ Style: Hand-drawn, clean lines, minimal aesthetic, flat colors
 Layout: Centered composition with clear focal point
 
 Visual Elements:
-- Central illustration: {main_element}
+- Central illustration: {main_element}{secondary}
 - Background: simple gradient, clean and uncluttered
 - Accent elements: small geometric shapes, subtle tech motifs
 
@@ -87,10 +235,22 @@ Color Palette: Professional and modern, blues with accent colors
 Technical: Blog header quality, high resolution, web-optimized"""
 
 
-def generate_cover_image(prompt, output_path, api_key=None):
-    """Generate cover image using ZhipuAI CogView API."""
-    api_key = api_key or get_api_key()
+def score_drafts(paths):
+    """Score theme mixes for many blog drafts; yields one result dict per file."""
+    for path in paths:
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            scores = score_themes(f.read())
+        yield {
+            'file': path,
+            'themes': top_themes_from_scores(scores),
+            'scores': {theme: round(score, 2) for theme, score in scores.items()},
+            'ms': round((time.perf_counter() - start) * 1000, 2)
+        }
 
+
+def request_image(prompt, api_key, session, api_url=None, timeout=GENERATE_TIMEOUT):
+    """POST one generation request and return its first image entry ({'url': ...} or {'b64_json': ...})."""
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -103,33 +263,183 @@ def generate_cover_image(prompt, output_path, api_key=None):
         "n": 1
     }
 
-    print(f"Generating image with prompt: {prompt[:80]}...")
-    print(f"Model: {DEFAULT_MODEL}, Size: {DEFAULT_SIZE}")
-
-    response = requests.post(ZHIPUAI_API_URL, json=payload, headers=headers, timeout=60)
+    response = session.post(api_url or ZHIPUAI_API_URL, json=payload, headers=headers, timeout=timeout)
     response.raise_for_status()
     data = response.json()
 
     if "data" not in data or not data["data"]:
         raise ValueError("No image data in response")
+    return data["data"][0]
+
+
+# Output extension -> PIL format; anything else is saved as PNG
+OUTPUT_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.webp': 'WEBP'}
+DOWNLOAD_CHUNK = 64 * 1024
+
+
+def download_image(image, session, dest_path, verbose=True):
+    """Write a response entry's image to dest_path, streaming URL downloads in chunks."""
+    if image.get("b64_json"):
+        with open(dest_path, 'wb') as f:
+            f.write(base64.b64decode(image["b64_json"]))
+        return
+
+    image_url = image["url"]
+    if verbose:
+        print(f"Downloading image from: {image_url}")
+    with session.get(image_url, timeout=DOWNLOAD_TIMEOUT, stream=True) as img_response:
+        img_response.raise_for_status()
+        with open(dest_path, 'wb') as f:
+            for chunk in img_response.iter_content(DOWNLOAD_CHUNK):
+                f.write(chunk)
+
+
+def finalize_image(tmp_path, output_path):
+    """
+    Move a downloaded image into place, re-encoding only if its format differs.
+
+    Format and dimensions come from the header (PIL opens lazily); pixels
+    are decoded only when the extension asks for another format.
+
+    Returns:
+        (width, height)
+    """
+    wanted = OUTPUT_FORMATS.get(os.path.splitext(output_path)[1].lower(), 'PNG')
+    with Image.open(tmp_path) as img:
+        size = img.size
+        if img.format != wanted:
+            print(f"Re-encoding {img.format} as {wanted}")
+            if wanted == 'JPEG' and img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            encoded_path = tmp_path + '.enc'
+            img.save(encoded_path, wanted)
+            os.replace(encoded_path, tmp_path)
+    os.replace(tmp_path, output_path)
+    return size
+
+
+def _write_cover(output_path, write):
+    """
+    Have write(tmp_path) produce the image next to output_path, then move it into place.
+
+    A failed or partial write never leaves a broken cover. Returns (width, height).
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        write(tmp_path)
+        return finalize_image(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def copy_cached_cover(prompt, output_path, cache, variant=0, verbose=True):
+    """Serve an identical (model, size, prompt, variant) request from a CoverCache; False on a miss."""
+    if not cache:
+        return False
+    start = time.perf_counter()
+    hit = cache.get(cache_key(DEFAULT_MODEL, DEFAULT_SIZE, prompt, variant))
+    if not hit:
+        return False
+    _write_cover(output_path, lambda tmp_path: shutil.copyfile(hit[0], tmp_path))
+    if verbose:
+        print(f"Cache hit for prompt: {prompt[:80]}... ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    return True
+
+
+def save_cover(image, prompt, output_path, session, cache=None, variant=0, verbose=True):
+    """
+    Download a generation response entry to output_path and add it to the cache.
+
+    Safe to call again after a failed download: it only fetches the image
+    the API already generated, it never requests a new one.
+    """
+    def write(tmp_path):
+        download_image(image, session, tmp_path, verbose)
+        if cache:
+            response = {k: v for k, v in image.items() if k != 'b64_json'}
+            cache.put_file(cache_key(DEFAULT_MODEL, DEFAULT_SIZE, prompt, variant), tmp_path,
+                           DEFAULT_MODEL, DEFAULT_SIZE, prompt, response)
+
+    return _write_cover(output_path, write)
+
+
+def generate_cover_image(prompt, output_path, api_key=None, session=None, api_url=None, cache=None, variant=0,
+                         verbose=True, timeout=GENERATE_TIMEOUT):
+    """Generate cover image using ZhipuAI CogView API.
+
+    The image is streamed to a temp file next to output_path and renamed into
+    place, so a failed or partial download never leaves a broken cover. With a
+    CoverCache, an identical (model, size, prompt, variant) request is served
+    from disk without an API key, a request or a download.
+    """
+    if not copy_cached_cover(prompt, output_path, cache, variant, verbose):
+        api_key = api_key or get_api_key()
+        session = session or get_session()
+
+        if verbose:
+            print(f"Generating image with prompt: {prompt[:80]}...")
+            print(f"Model: {DEFAULT_MODEL}, Size: {DEFAULT_SIZE}")
+
+        image = request_image(prompt, api_key, session, api_url, timeout)
+        save_cover(image, prompt, output_path, session, cache, variant, verbose)
+
+    if verbose:
+        with Image.open(output_path) as img:
+            width, height = img.size
+        print(f"Saved: {output_path}")
+        print(f"Dimensions: {width}x{height} (ratio: {width/height:.2f})")
+        print(f"File size: {os.path.getsize(output_path) / 1024:.1f} KB")
 
-    # Download image from URL
-    image_url = data["data"][0]["url"]
-    print(f"Downloading image from: {image_url}")
-    img_response = requests.get(image_url, timeout=30)
-    img_response.raise_for_status()
-    img = Image.open(io.BytesIO(img_response.content))
+    return output_path
 
-    # Save as PNG
-    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-    img.save(output_path, "PNG")
 
-    width, height = img.size
-    print(f"Saved: {output_path}")
-    print(f"Dimensions: {width}x{height} (ratio: {width/height:.2f})")
-    print(f"File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+def candidate_paths(output_path, count):
+    """cover.png -> cover_1.png ... cover_<count>.png"""
+    root, ext = os.path.splitext(output_path)
+    return [f"{root}_{i}{ext or '.png'}" for i in range(1, count + 1)]
 
-    return output_path
+
+def generate_candidates(prompt, output_path, count, api_key=None, session=None, api_url=None, cache=None,
+                        timeout=GENERATE_TIMEOUT):
+    """
+    Generate `count` candidate covers concurrently over one pooled session.
+
+    The API returns one image per request, so candidates are separate
+    requests issued in parallel. Failed candidates are reported and skipped.
+    Candidate i is cached as variant i-1, so candidate 1 is the single cover.
+
+    Returns:
+        List of saved candidate paths (at least one)
+    """
+    session = session or create_session(pool_size=max(count, 10))
+    paths = candidate_paths(output_path, count)
+
+    def generate(variant):
+        try:
+            return generate_cover_image(prompt, paths[variant], api_key, session, api_url, cache, variant,
+                                        timeout=timeout)
+        except Exception as e:
+            print(f"Candidate {paths[variant]} failed: {e}", file=sys.stderr)
+            return None
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        saved = [path for path in pool.map(generate, range(count)) if path]
+
+    if not saved:
+        raise RuntimeError(f"All {count} candidate covers failed")
+    print(f"\nGenerated {len(saved)}/{count} candidates")
+    return saved
+
+
+def save_local_covers(title, paths, content=''):
+    """Render the local cover once, write it to every path and return its theme."""
+    from local_cover import save_local_cover
+    theme = save_local_cover(title, paths[0], content)
+    for path in paths[1:]:
+        shutil.copyfile(paths[0], path)
+    return theme
 
 
 def main():
@@ -142,14 +452,46 @@ def main():
                         help='Blog post title (optional)')
     parser.add_argument('--prompt', '-p',
                         help='Direct prompt (overrides --blog-content)')
+    parser.add_argument('--score', nargs='+', metavar='DRAFT',
+                        help='Batch mode: print theme scores (JSON lines) for these drafts or globs and exit')
     parser.add_argument('--output', '-o',
                         default='cover.png',
                         help='Output path for generated image (default: cover.png)')
     parser.add_argument('--api-key',
                         help='ZhipuAI API key (uses ZHIPUAI_API_KEY env var if not provided)')
+    parser.add_argument('--api-url',
+                        help='Images endpoint (default: ZHIPUAI_API_URL env var or the ZhipuAI API)')
+    parser.add_argument('--candidates', '-k', type=int, default=1,
+                        help='Generate K candidate covers concurrently as <output>_1..K (default: 1)')
+    parser.add_argument('--timeout', type=float,
+                        help=f'Read timeout in seconds for the generation request, also capping its connect '
+                             f'timeout (default: {GENERATE_TIMEOUT[1]})')
+    parser.add_argument('--fallback-local', action='store_true',
+                        help='If the API key is missing or generation fails or times out, render a local cover instead '
+                             '(no retries unless --retries is given, so the fallback is not delayed by backoff)')
+    parser.add_argument('--placeholder', action='store_true',
+                        help='Write a local cover to every output path first (--output, or each candidate with -k); '
+                             'the remote image replaces it when it arrives')
+    parser.add_argument('--retries', type=int,
+                        help=f'Retries with backoff on 429/5xx responses (default: {DEFAULT_RETRIES}, '
+                             f'or 0 with --fallback-local)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the API, bypassing the prompt-keyed image cache')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Image cache directory (default: COVER_CACHE_DIR or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_MB,
+                        help=f'Evict least recently used entries above this size (default: {DEFAULT_MAX_MB})')
+    parser.add_argument('--cache-max-age-days', type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help=f'Evict entries older than this (default: {DEFAULT_MAX_AGE_DAYS})')
 
     args = parser.parse_args()
 
+    if args.score:
+        paths = sorted({path for pattern in args.score for path in glob.glob(pattern)})
+        for result in score_drafts(paths):
+            print(json.dumps(result, ensure_ascii=False))
+        return 0
+
     # Determine prompt
     if args.prompt:
         prompt = args.prompt
@@ -159,12 +501,38 @@ def main():
     else:
         parser.error("Either --prompt or --blog-content must be provided")
 
+    timeout = (min(GENERATE_TIMEOUT[0], args.timeout), args.timeout) if args.timeout else GENERATE_TIMEOUT
+    retries = args.retries
+    if retries is None:
+        retries = 0 if args.fallback_local else DEFAULT_RETRIES
+
+    # The placeholder and the fallback go wherever the remote images would land
+    title = args.blog_title or (args.blog_content or args.prompt).strip().split('\n')[0][:80]
+    outputs = candidate_paths(args.output, args.candidates) if args.candidates > 1 else [args.output]
+    if args.placeholder:
+        save_local_covers(title, outputs, args.blog_content or '')
+        print(f"Placeholder: {', '.join(outputs)}")
+
     try:
-        generate_cover_image(prompt, args.output, args.api_key)
+        session = create_session(retries, pool_size=max(args.candidates, 10))
+        cache = None
+        if not args.no_cache:
+            cache = CoverCache(args.cache_dir, args.cache_max_mb * 1024 * 1024, args.cache_max_age_days * 86400)
+        if args.candidates > 1:
+            generate_candidates(prompt, args.output, args.candidates, args.api_key, session, args.api_url, cache,
+                                timeout)
+        else:
+            generate_cover_image(prompt, args.output, args.api_key, session, args.api_url, cache, timeout=timeout)
         print("\n✓ Cover image generated successfully!")
         return 0
     except Exception as e:
         print(f"\n✗ Error: {e}", file=sys.stderr)
+        if args.fallback_local:
+            theme = save_local_covers(title, outputs, args.blog_content or '')
+            print(f"✓ Rendered local fallback cover ({theme}): {', '.join(outputs)}")
+            return 0
+        if args.placeholder:
+            print(f"Keeping placeholder: {', '.join(outputs)}", file=sys.stderr)
         return 1
 
 
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Offline Layout Segmenter for Scanned Pages
+
+Classical document layout analysis in NumPy for pages without a text layer:
+binarize (Otsu), smear with the run-length smearing algorithm (RLSA),
+label connected components, and classify each block as text, table or
+figure from its row projection profile. Text blocks show regular line
+bands separated by white gaps; figures show tall continuous ink; tables
+are text-like blocks crossed by full-width rules. No vision calls, tens of
+milliseconds per page.
+
+Usage:
+    python layout_segmenter.py <page_image> [--show-text]
+
+Requirements:
+    pip install pillow numpy
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+
+# Pages are segmented at no more than this height (about 75 dpi for Letter/A4)
+WORK_HEIGHT = 900
+
+# RLSA gaps as fractions of the working page size
+H_GAP = 0.015
+V_GAP = 0.01
+
+# Figures smaller than this fraction of the page area are dropped
+MIN_FIGURE_AREA = 0.01
+
+
+def otsu_threshold(gray):
+    """
+    Otsu's threshold for a uint8-range grayscale array: levels <= the threshold are ink.
+
+    Returns None for a single-level (blank or single-colour) image, which has no ink/background split.
+    """
+    hist = np.bincount(gray.ravel().astype(np.uint8), minlength=256).astype(np.float64)
+    if np.count_nonzero(hist) < 2:
+        return None
+    levels = np.arange(256)
+    # Dark class: levels 0..t inclusive; light class: t+1..255
+    weight_dark = np.cumsum(hist)
+    weight_light = weight_dark[-1] - weight_dark
+    mean_dark = np.cumsum(hist * levels)
+    mean_light = mean_dark[-1] - mean_dark
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = weight_dark * weight_light * (mean_dark / weight_dark - mean_light / weight_light) ** 2
+    return int(np.nanargmax(between))
+
+
+def binarize(image):
+    """Boolean ink mask (True = dark) of an RGB/grayscale array, downsampled to WORK_HEIGHT."""
+    gray = image.min(axis=2) if image.ndim == 3 else image
+    factor = -(-gray.shape[0] // WORK_HEIGHT)
+    if factor > 1:
+        # Min-pool over strided views keeps thin strokes that plain striding would drop
+        h, w = gray.shape[0] // factor, gray.shape[1] // factor
+        pooled = gray[:h * factor:factor, :w * factor:factor].copy()
+        for dy in range(factor):
+            for dx in range(factor):
+                np.minimum(pooled, gray[dy:h * factor:factor, dx:w * factor:factor], out=pooled)
+        gray = pooled
+    threshold = otsu_threshold(gray)
+    if threshold is None:
+        # Blank or single-colour page: no ink
+        return np.zeros(gray.shape, dtype=bool)
+    return gray <= threshold
+
+
+def rlsa(ink, gap, axis):
+    """Fill background runs of at most `gap` pixels lying between ink pixels along `axis`."""
+    ink = np.moveaxis(ink, axis, -1)
+    n = ink.shape[-1]
+    idx = np.broadcast_to(np.arange(n, dtype=np.int32), ink.shape)
+    prev_ink = np.maximum.accumulate(np.where(ink, idx, -n - gap), axis=-1)
+    next_ink = np.minimum.accumulate(np.where(ink, idx, 2 * n + gap)[..., ::-1], axis=-1)[..., ::-1]
+    return np.moveaxis(next_ink - prev_ink - 1 <= gap, -1, axis)
+
+
+def smear(ink, h_gap, v_gap):
+    """Wong's RLSA: horizontal AND vertical smearing, then a short horizontal pass."""
+    mask = rlsa(ink, h_gap, axis=1) & rlsa(ink, v_gap, axis=0)
+    return rlsa(mask, max(1, h_gap // 3), axis=1)
+
+
+def connected_components(mask):
+    """
+    Bounding boxes of 4-connected components, labelled run by run.
+
+    Returns:
+        List of (top, left, bottom, right) boxes, bottom/right exclusive
+    """
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    starts_r, starts_c = np.nonzero(edges == 1)
+    _, ends_c = np.nonzero(edges == -1)
+
+    parent = list(range(len(starts_r)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Union each run with the overlapping runs of the previous row
+    row_first = np.searchsorted(starts_r, np.arange(mask.shape[0] + 1))
+    for row in range(1, mask.shape[0]):
+        prev, cur = range(row_first[row - 1], row_first[row]), range(row_first[row], row_first[row + 1])
+        j = prev.start
+        for i in cur:
+            while j < prev.stop and ends_c[j] <= starts_c[i]:
+                j += 1
+            k = j
+            while k < prev.stop and starts_c[k] < ends_c[i]:
+                parent[find(i)] = find(k)
+                k += 1
+
+    boxes = {}
+    for i in range(len(starts_r)):
+        root = find(i)
+        r, c0, c1 = int(starts_r[i]), int(starts_c[i]), int(ends_c[i])
+        if root in boxes:
+            top, left, bottom, right = boxes[root]
+            boxes[root] = (min(top, r), min(left, c0), max(bottom, r + 1), max(right, c1))
+        else:
+            boxes[root] = (r, c0, r + 1, c1)
+    return list(boxes.values())
+
+
+def _runs(flags):
+    """(start, end) pairs of True runs in a 1-D boolean array."""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return list(zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]))
+
+
+def row_profile(row_sums, box):
+    """Fraction of ink per row inside a box, from column-cumulative ink counts."""
+    top, left, bottom, right = box
+    return (row_sums[top:bottom, right] - row_sums[top:bottom, left]) / (right - left)
+
+
+def classify_block(ink, rows, box, line_height):
+    """Label one block 'text', 'table' or 'figure' from its projection profiles."""
+    top, left, bottom, right = box
+    bands = _runs(rows > 0)
+    if not bands:
+        return 'text'
+
+    # Ruled grid: rows and columns of ink spanning the whole block
+    if right - left >= 10 * line_height and len(_runs(rows > 0.8)) >= 3:
+        cols = ink[top:bottom, left:right].mean(axis=0)
+        if len(_runs(cols > 0.8)) >= 2:
+            return 'table'
+
+    tallest = max(end - start for start, end in bands)
+    if tallest > 2.5 * line_height:
+        return 'figure'
+
+    # Line art (plots, diagrams) is sparse inside its bands; text is denser
+    band_ink = np.mean([rows[start:end].mean() for start, end in bands])
+    if band_ink < 0.04 and len(bands) < 3:
+        return 'figure'
+    return 'text'
+
+
+def group_rules(rules, line_height):
+    """Boxes of tables delimited by two or more stacked horizontal rules (booktabs style)."""
+    tables = []
+    group = []
+    for rule in sorted(rules):
+        if group:
+            last = group[-1]
+            overlap = min(last[3], rule[3]) - max(last[1], rule[1])
+            if overlap < 0.5 * min(last[3] - last[1], rule[3] - rule[1]) or rule[0] - last[2] > 12 * line_height:
+                if len(group) >= 2:
+                    tables.append(group)
+                group = []
+        group.append(rule)
+    if len(group) >= 2:
+        tables.append(group)
+    return [(min(r[0] for r in g), min(r[1] for r in g), max(r[2] for r in g), max(r[3] for r in g))
+            for g in tables]
+
+
+def _inside(box, outer):
+    return box[0] >= outer[0] and box[1] >= outer[1] and box[2] <= outer[2] and box[3] <= outer[3]
+
+
+def _merge_boxes(boxes, gap):
+    """Merge boxes that overlap or lie within `gap` pixels of each other."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if (a[0] - gap < b[2] and b[0] - gap < a[2] and a[1] - gap < b[3] and b[1] - gap < a[3]):
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def segment_page(page_image, include_text=False):
+    """
+    Segment a scanned page into text, table and figure blocks.
+
+    Args:
+        page_image: Page image path or RGB/grayscale ndarray
+        include_text: Also return text blocks (default: figures and tables only)
+
+    Returns:
+        Elements with percentage bboxes, in the same format as the other detectors
+    """
+    image = page_image if isinstance(page_image, np.ndarray) else np.array(Image.open(page_image).convert('L'))
+    ink = binarize(image)
+    if not ink.any():
+        return []
+    h, w = ink.shape
+
+    components = connected_components(smear(ink, int(w * H_GAP), int(h * V_GAP)))
+    boxes = [box for box in components if box[2] - box[0] >= 3 and box[3] - box[1] >= 3]
+    if not boxes:
+        return []
+
+    row_sums = np.zeros((h, w + 1), dtype=np.int32)
+    np.cumsum(ink, axis=1, out=row_sums[:, 1:])
+    profiles = [row_profile(row_sums, box) for box in boxes]
+
+    # Typical text line height from the row bands of all blocks
+    band_heights = [end - start for rows in profiles for start, end in _runs(rows > 0)]
+    line_height = float(np.median(band_heights)) if band_heights else h * 0.012
+
+    labelled = {'text': [], 'table': [], 'figure': []}
+    for box, rows in zip(boxes, profiles):
+        labelled[classify_block(ink, rows, box, line_height)].append(box)
+
+    # Thin, wide components are table rules; blocks between them belong to the table
+    rules = [box for box in components if box[2] - box[0] < 3 and box[3] - box[1] >= 0.2 * w]
+    for table in group_rules(rules, line_height):
+        labelled['table'].append(table)
+        for kind in ('text', 'figure'):
+            labelled[kind] = [box for box in labelled[kind] if not _inside(box, table)]
+
+    # Sub-panels and labels of one figure end up as separate components
+    labelled['figure'] = [box for box in _merge_boxes(labelled['figure'], int(h * V_GAP * 2))
+                          if (box[2] - box[0]) * (box[3] - box[1]) >= MIN_FIGURE_AREA * h * w]
+
+    elements = []
+    for kind in ('figure', 'table', 'text') if include_text else ('figure', 'table'):
+        for number, (top, left, bottom, right) in enumerate(sorted(labelled[kind]), 1):
+            elements.append({
+                'type': kind,
+                'number': number,
+                'description': f'Detected {kind} block',
+                'text': '',
+                'top': round(top / h * 100, 2),
+                'left': round(left / w * 100, 2),
+                'bottom': round(bottom / h * 100, 2),
+                'right': round(right / w * 100, 2)
+            })
+    return elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Segment a scanned page image into figure/table/text blocks.')
+    parser.add_argument('page_image', help='Rendered or scanned page image')
+    parser.add_argument('--show-text', action='store_true', help='Also list text blocks')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    elements = segment_page(args.page_image, include_text=args.show_text)
+    elapsed = time.perf_counter() - start
+
+    json.dump(elements, sys.stdout, indent=2)
+    print(f"\nSegmented in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
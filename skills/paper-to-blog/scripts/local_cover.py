@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Local Fallback Cover Renderer
+
+Draws a flat, themed cover with PIL/NumPy in a few tens of milliseconds, with
+no network and no API key: a vertical gradient in the theme's palette, a
+simple motif for the theme detected from the blog content (network for ai,
+lens for vision, speech bubbles for nlp, bars for data, brackets for code,
+circuit traces for tech) and the title on a band at the bottom.
+
+The same title and content always produce the same image, so a fallback
+cover does not change between runs. generate_cover.py uses it when the API
+key is missing or the API fails or times out (--fallback-local), and to
+write a placeholder that is replaced once the remote image arrives
+(--placeholder).
+
+Usage:
+    python local_cover.py --title "..." [--content "..."] [-o cover.png] [--size 1024x1024]
+
+Environment:
+    COVER_FONT - TrueType/OpenType font for the title (use a CJK font for Chinese titles)
+
+Requirements:
+    pip install pillow numpy
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from generate_cover import DEFAULT_SIZE, detect_theme
+
+
+# Theme -> (gradient top, gradient bottom, primary accent, secondary accent)
+PALETTES = {
+    'ai': ((236, 242, 255), (197, 212, 250), (76, 98, 214), (255, 183, 77)),
+    'vision': ((232, 248, 250), (186, 226, 235), (18, 130, 160), (255, 120, 100)),
+    'nlp': ((245, 240, 255), (214, 200, 245), (120, 80, 190), (80, 190, 170)),
+    'data': ((236, 250, 240), (195, 232, 208), (40, 150, 90), (250, 170, 60)),
+    'code': ((40, 44, 58), (22, 25, 36), (120, 200, 255), (255, 200, 90)),
+    'tech': ((238, 243, 250), (202, 216, 236), (52, 100, 170), (240, 130, 80)),
+}
+
+# Common CJK-capable fonts, tried after COVER_FONT
+FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/System/Library/Fonts/PingFang.ttc',
+    'C:/Windows/Fonts/msyhbd.ttc',
+]
+
+
+def load_font(size):
+    for path in [os.environ.get('COVER_FONT')] + FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+    return ImageFont.load_default(size)
+
+
+def gradient(width, height, top, bottom):
+    """(height, width, 3) uint8 vertical gradient, built from one column."""
+    t = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    column = (np.array(top, np.float32) * (1 - t) + np.array(bottom, np.float32) * t).astype(np.uint8)
+    return np.broadcast_to(column[:, None, :], (height, width, 3))
+
+
+def _motif_ai(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    layers = [rng.randint(3, 5) for _ in range(4)]
+    nodes = []
+    for i, count in enumerate(layers):
+        x = left + (right - left) * (i + 0.5) / len(layers)
+        nodes.append([(x, top + (bottom - top) * (j + 0.5) / count) for j in range(count)])
+    for a, b in zip(nodes, nodes[1:]):
+        for p in a:
+            for q in b:
+                draw.line([p, q], fill=primary + (90,), width=max(1, scale // 3))
+    radius = scale * 2
+    for layer in nodes:
+        for x, y in layer:
+            draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=secondary, outline=primary,
+                         width=max(1, scale // 2))
+
+
+def _motif_vision(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    cx, cy = (left + right) / 2, (top + bottom) / 2
+    r = min(right - left, bottom - top) / 2
+    draw.ellipse([cx - r, cy - r * 0.6, cx + r, cy + r * 0.6], outline=primary, width=scale)
+    for k, frac in enumerate((0.45, 0.3, 0.12)):
+        rr = r * frac
+        draw.ellipse([cx - rr, cy - rr, cx + rr, cy + rr], fill=secondary if k == 1 else None,
+                     outline=primary, width=scale)
+    for _ in range(6):
+        y = cy + rng.uniform(-0.5, 0.5) * r
+        draw.line([(cx + r * 1.05, y), (right + (right - left) * 0.15, y)], fill=secondary + (160,), width=scale // 2)
+
+
+def _motif_nlp(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    bubbles = [(left, top, left + width * 0.62, top + height * 0.45, primary),
+               (left + width * 0.38, top + height * 0.52, right, bottom, secondary)]
+    for x0, y0, x1, y1, color in bubbles:
+        draw.rounded_rectangle([x0, y0, x1, y1], radius=scale * 4, fill=color + (60,), outline=color, width=scale)
+        for row in range(3):
+            y = y0 + (y1 - y0) * (row + 1) / 4
+            length = rng.uniform(0.45, 0.8) * (x1 - x0)
+            draw.line([(x0 + scale * 4, y), (x0 + scale * 4 + length, y)], fill=color, width=scale)
+
+
+def _motif_data(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    count = 6
+    step = (right - left) / count
+    points = []
+    for i in range(count):
+        h = rng.uniform(0.25, 0.95) * (bottom - top)
+        x0 = left + i * step + step * 0.15
+        draw.rectangle([x0, bottom - h, x0 + step * 0.7, bottom], fill=primary + (200,))
+        points.append((x0 + step * 0.35, bottom - h - scale * 3))
+    draw.line(points, fill=secondary, width=scale, joint='curve')
+    draw.line([(left, bottom), (right, bottom)], fill=primary, width=scale)
+
+
+def _motif_code(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    mid_y, height = (top + bottom) / 2, (bottom - top) / 2
+    draw.line([(left + height * 0.5, top), (left, mid_y), (left + height * 0.5, bottom)], fill=primary, width=scale * 2)
+    draw.line([(right - height * 0.5, top), (right, mid_y), (right - height * 0.5, bottom)], fill=primary, width=scale * 2)
+    inner_left, inner_right = left + height * 0.8, right - height * 0.8
+    for row in range(6):
+        y = top + (bottom - top) * (row + 0.75) / 6.5
+        indent = (inner_right - inner_left) * 0.1 * rng.randint(0, 2)
+        length = rng.uniform(0.3, 0.8) * (inner_right - inner_left - indent)
+        draw.line([(inner_left + indent, y), (inner_left + indent + length, y)],
+                  fill=secondary if row % 3 == 0 else primary, width=scale)
+
+
+def _motif_tech(draw, rng, box, primary, secondary, scale):
+    left, top, right, bottom = box
+    for _ in range(9):
+        x, y = rng.uniform(left, right), rng.uniform(top, bottom)
+        points = [(x, y)]
+        for _ in range(3):
+            if rng.random() < 0.5:
+                x = min(right, max(left, x + rng.choice((-1, 1)) * rng.uniform(0.1, 0.3) * (right - left)))
+            else:
+                y = min(bottom, max(top, y + rng.choice((-1, 1)) * rng.uniform(0.1, 0.3) * (bottom - top)))
+            points.append((x, y))
+        draw.line(points, fill=primary, width=scale)
+        for px, py in (points[0], points[-1]):
+            r = scale * 1.8
+            draw.ellipse([px - r, py - r, px + r, py + r], fill=secondary)
+
+
+MOTIFS = {
+    'ai': _motif_ai, 'vision': _motif_vision, 'nlp': _motif_nlp,
+    'data': _motif_data, 'code': _motif_code, 'tech': _motif_tech,
+}
+
+
+def _wrap(draw, text, font, max_width, max_lines=2):
+    """Greedy wrap by words, or by characters for text without spaces (e.g. Chinese)."""
+    units = text.split() if ' ' in text.strip() else list(text.strip())
+    joiner = ' ' if ' ' in text.strip() else ''
+    lines, current = [], ''
+    for unit in units:
+        trial = current + joiner + unit if current else unit
+        if draw.textlength(trial, font=font) <= max_width:
+            current = trial
+            continue
+        lines.append(current)
+        current = unit
+        if len(lines) == max_lines:
+            break
+    if len(lines) < max_lines and current:
+        lines.append(current)
+    if len(lines) == max_lines and ''.join(lines).replace(' ', '') != text.replace(' ', ''):
+        lines[-1] = lines[-1].rstrip()[:-1] + '…'
+    return lines
+
+
+def render_local_cover(title, content='', size=DEFAULT_SIZE, theme=None):
+    """
+    Themed cover image for a title, deterministic in (title, content, size).
+
+    Args:
+        title: Text drawn on the cover
+        content: Blog content used to pick the theme (defaults to the title)
+        size: 'WIDTHxHEIGHT'
+        theme: Force a THEMES key instead of detecting one
+
+    Returns:
+        PIL RGB image
+    """
+    width, height = (int(v) for v in size.lower().split('x'))
+    theme = theme or detect_theme(content or title)
+    top, bottom, primary, secondary = PALETTES.get(theme, PALETTES['tech'])
+    seed = int.from_bytes(hashlib.sha256(f"{title}\0{content}\0{size}".encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    scale = max(2, round(min(width, height) / 160))
+
+    image = Image.fromarray(np.ascontiguousarray(gradient(width, height, top, bottom)), 'RGB')
+    draw = ImageDraw.Draw(image, 'RGBA')
+
+    # Soft accent shapes behind the motif
+    for _ in range(5):
+        r = rng.uniform(0.04, 0.12) * min(width, height)
+        x, y = rng.uniform(0, width), rng.uniform(0, height * 0.7)
+        shape = [x - r, y - r, x + r, y + r]
+        color = (secondary if rng.random() < 0.5 else primary) + (40,)
+        if rng.random() < 0.5:
+            draw.ellipse(shape, fill=color)
+        else:
+            draw.regular_polygon((x, y, r), rng.choice((3, 4, 6)), rotation=rng.uniform(0, 60), fill=color)
+
+    band_top = int(height * 0.72)
+    motif_box = (width * 0.22, height * 0.12, width * 0.78, band_top - height * 0.06)
+    MOTIFS.get(theme, _motif_tech)(draw, rng, motif_box, primary, secondary, scale)
+
+    # Title band
+    dark = sum(top) < 300
+    draw.rectangle([0, band_top, width, height], fill=(255, 255, 255, 40) if dark else (255, 255, 255, 170))
+    draw.rectangle([0, band_top, width, band_top + scale], fill=primary)
+    font_size = max(12, int(height * 0.065))
+    font = load_font(font_size)
+    lines = _wrap(draw, title.strip() or theme.upper(), font, width * 0.86)
+    text_color = (245, 245, 250) if dark else (30, 34, 48)
+    line_height = font_size * 1.25
+    y = band_top + (height - band_top - line_height * len(lines)) / 2
+    for line in lines:
+        x = (width - draw.textlength(line, font=font)) / 2
+        draw.text((x, y), line, font=font, fill=text_color)
+        y += line_height
+
+    return image
+
+
+def save_local_cover(title, output_path, content='', size=DEFAULT_SIZE, theme=None):
+    """Render a local cover and write it atomically to output_path; returns the theme used."""
+    theme = theme or detect_theme(content or title)
+    image = render_local_cover(title, content, size, theme)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    ext = os.path.splitext(output_path)[1].lower()
+    tmp_path = f"{output_path}.{os.getpid()}.local"
+    if ext in ('.jpg', '.jpeg'):
+        image.save(tmp_path, 'JPEG', quality=90)
+    elif ext == '.webp':
+        image.save(tmp_path, 'WEBP', quality=90)
+    else:
+        # Flat colours compress well even at the fastest zlib level
+        image.save(tmp_path, 'PNG', compress_level=1)
+    os.replace(tmp_path, output_path)
+    return theme
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a themed cover locally, without the image API.')
+    parser.add_argument('--title', '-t', required=True, help='Title drawn on the cover')
+    parser.add_argument('--content', '-c', default='', help='Blog content used to pick the theme')
+    parser.add_argument('--output', '-o', default='cover.png', help='Output path (default: cover.png)')
+    parser.add_argument('--size', default=DEFAULT_SIZE, help=f'WIDTHxHEIGHT (default: {DEFAULT_SIZE})')
+    parser.add_argument('--theme', choices=sorted(PALETTES), help='Force a theme instead of detecting one')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    theme = save_local_cover(args.title, args.output, args.content, args.size, args.theme)
+    print(f"Saved: {args.output} (theme: {theme}, {(time.perf_counter() - start) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
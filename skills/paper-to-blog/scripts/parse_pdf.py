@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Local PDF-to-Markdown Parser for Academic Papers
+
+Replaces the remote web-reader step of the Parser agent with PyMuPDF's
+get_text("dict"): headings are detected from font sizes, two-column pages
+are merged into reading order, running headers/footers and page numbers
+are dropped, the abstract and references are marked, and figure/table
+captions become image placeholders (linked to extracted files when a
+figures_metadata.json is given). Pages are extracted in parallel.
+
+Usage:
+    python parse_pdf.py <pdf_path> [-o parsed.md] [--workers 4] [--figures-metadata figures_metadata.json]
+
+Requirements:
+    pip install pymupdf
+"""
+
+import fitz  # PyMuPDF
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+
+CAPTION_RE = re.compile(r'^(fig\.|figure|table)\s*(\d+)\s*[:.]?\s*(.*)$', re.IGNORECASE)
+PAGE_NUMBER_RE = re.compile(r'^\d{1,4}$')
+REFERENCE_START_RE = re.compile(r'^(\[\d+\]|\d{1,3}\.\s)')
+REFERENCE_HEADINGS = ('references', 'bibliography', 'reference')
+BOLD_FLAG = 16
+
+
+def extract_page_blocks(pdf_path, page_numbers):
+    """Extract simplified text blocks for the given pages (runs in a worker process)."""
+    doc = fitz.open(pdf_path)
+    pages = []
+    for page_num in page_numbers:
+        page = doc[page_num]
+        blocks = []
+        for block in page.get_text("dict")["blocks"]:
+            if block.get("type") != 0:
+                continue
+            lines = []
+            for line in block["lines"]:
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                # Skip empty lines and rotated text such as arXiv side stamps
+                if not spans or abs(line["dir"][1]) > 0.01:
+                    continue
+                text = "".join(span["text"] for span in line["spans"]).strip()
+                chars = sum(len(span["text"]) for span in spans)
+                size = sum(span["size"] * len(span["text"]) for span in spans) / chars
+                bold = all(span["flags"] & BOLD_FLAG or "Bold" in span["font"] for span in spans)
+                lines.append({"text": text, "size": round(size, 1), "bold": bold})
+            if lines:
+                blocks.append({"bbox": tuple(block["bbox"]), "lines": lines})
+        pages.append({"page": page_num + 1, "width": page.rect.width, "height": page.rect.height,
+                      "blocks": blocks})
+    doc.close()
+    return pages
+
+
+def _chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def extract_blocks(pdf_path, workers=None):
+    """Extract blocks for all pages, in parallel across `workers` processes."""
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    workers = workers or min(os.cpu_count() or 1, 8)
+    page_numbers = list(range(page_count))
+
+    if workers <= 1 or page_count < 4:
+        return extract_page_blocks(pdf_path, page_numbers)
+
+    pages = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(extract_page_blocks, [pdf_path] * workers, _chunks(page_numbers, workers)):
+            pages.extend(chunk)
+    return pages
+
+
+def body_font_size(pages):
+    """Most common font size by character count."""
+    sizes = Counter()
+    for page in pages:
+        for block in page["blocks"]:
+            for line in block["lines"]:
+                sizes[line["size"]] += len(line["text"])
+    return sizes.most_common(1)[0][0] if sizes else 10.0
+
+
+def _block_text(block):
+    """Join block lines, undoing end-of-line hyphenation."""
+    text = ""
+    for line in block["lines"]:
+        part = line["text"]
+        if text.endswith("-") and part[:1].islower():
+            text = text[:-1] + part
+        elif text:
+            text += " " + part
+        else:
+            text = part
+    return text
+
+
+def reading_order(blocks, page_width):
+    """
+    Order blocks for single- or two-column layouts.
+
+    Full-width blocks split the page into bands; inside each band the left
+    column is read before the right column.
+    """
+    mid = page_width / 2
+    ordered = []
+    band = []
+
+    def flush():
+        left = [b for b in band if (b["bbox"][0] + b["bbox"][2]) / 2 < mid]
+        right = [b for b in band if (b["bbox"][0] + b["bbox"][2]) / 2 >= mid]
+        ordered.extend(sorted(left, key=lambda b: b["bbox"][1]))
+        ordered.extend(sorted(right, key=lambda b: b["bbox"][1]))
+        band.clear()
+
+    for block in sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0])):
+        x0, _, x1, _ = block["bbox"]
+        if x0 < mid - 20 and x1 > mid + 20:
+            flush()
+            ordered.append(block)
+        else:
+            band.append(block)
+    flush()
+    return ordered
+
+
+def running_lines(pages, min_fraction=0.5):
+    """Texts repeated in the top/bottom margin of many pages (running headers/footers)."""
+    counts = Counter()
+    for page in pages:
+        seen = set()
+        for block in page["blocks"]:
+            top, bottom = block["bbox"][1], block["bbox"][3]
+            if top < page["height"] * 0.08 or bottom > page["height"] * 0.92:
+                seen.add(_block_text(block))
+        counts.update(seen)
+    threshold = max(2, int(len(pages) * min_fraction))
+    return {text for text, count in counts.items() if count >= threshold}
+
+
+def load_caption_index(metadata_path):
+    """Map (type, number) to extracted figure filenames from a figures_metadata.json."""
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    index = {}
+    for record in records:
+        fig_type = 'table' if record.get('type') == 'table' else 'figure'
+        index.setdefault((fig_type, str(record.get('number'))), record['filename'])
+    return index
+
+
+def to_markdown(pages, caption_index=None):
+    """Render extracted page blocks as markdown."""
+    caption_index = caption_index or {}
+    body = body_font_size(pages)
+    skip = running_lines(pages)
+
+    def heading_size(block, text):
+        """Font size if the block looks like a heading, else None."""
+        if len(block["lines"]) > 3 or len(text) > 120 or text.endswith('.'):
+            return None
+        size = max(line["size"] for line in block["lines"])
+        bold = all(line["bold"] for line in block["lines"])
+        if size >= body * 1.4 or (bold and size >= body * 1.15):
+            return size
+        if bold and len(text) < 80:
+            return body
+        return None
+
+    # Larger heading sizes map to higher levels; body-size bold headings come last
+    heading_sizes = sorted({heading_size(block, _block_text(block)) for page in pages
+                            for block in page["blocks"]} - {None, body}, reverse=True)
+
+    def heading_level(block, text):
+        size = heading_size(block, text)
+        if size is None:
+            return None
+        if size == body:
+            return min(len(heading_sizes) + 1, 4)
+        return min(heading_sizes.index(size) + 1, 3)
+
+    out = []
+    in_references = False
+    seen_captions = set()
+
+    for page in pages:
+        for block in reading_order(page["blocks"], page["width"]):
+            text = _block_text(block)
+            if not text or text in skip or PAGE_NUMBER_RE.match(text):
+                continue
+
+            caption = CAPTION_RE.match(text)
+            if caption and not in_references:
+                fig_type = 'table' if caption.group(1).lower() == 'table' else 'figure'
+                number = caption.group(2)
+                if (fig_type, number) not in seen_captions:
+                    seen_captions.add((fig_type, number))
+                    label = f"{fig_type.capitalize()} {number}"
+                    target = caption_index.get((fig_type, number))
+                    target = f"figures/{target}" if target else f"{fig_type}:{number}"
+                    out.append(f"![{label}: {caption.group(3)}]({target})")
+                    out.append(f"*{label}: {caption.group(3)}*")
+                    continue
+
+            if text.lower().startswith('abstract') and len(text) > len('abstract') + 20:
+                out.append("## Abstract")
+                out.append(text[len('abstract'):].lstrip(' .:—-'))
+                continue
+
+            level = heading_level(block, text)
+            if level:
+                bare = re.sub(r'^[\dIVX]+(\.\d+)*\.?\s+', '', text).strip().lower()
+                in_references = bare in REFERENCE_HEADINGS
+                out.append(f"{'#' * level} {text}")
+                continue
+
+            # Lone short tokens are labels inside figures (axis ticks, legends)
+            if len(block["lines"]) == 1 and ' ' not in text and len(text) < 16 and not text[:1].isdigit():
+                continue
+
+            if in_references:
+                # Entries broken across blocks/columns continue the previous item
+                if out and out[-1].startswith("- ") and not REFERENCE_START_RE.match(text):
+                    out[-1] += " " + text
+                else:
+                    out.append(f"- {text}")
+                continue
+
+            out.append(text)
+
+    return "\n\n".join(out) + "\n"
+
+
+def parse_pdf(pdf_path, workers=None, figures_metadata=None):
+    """
+    Parse a PDF into markdown.
+
+    Args:
+        pdf_path: Path to PDF file
+        workers: Number of extraction processes (default: CPU count, max 8)
+        figures_metadata: Optional figures_metadata.json to link figure placeholders
+
+    Returns:
+        Markdown string
+    """
+    pages = extract_blocks(pdf_path, workers)
+    caption_index = load_caption_index(figures_metadata) if figures_metadata else None
+    return to_markdown(pages, caption_index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an academic paper (PDF) to markdown locally.')
+    parser.add_argument('pdf_path', help='Path to PDF file')
+    parser.add_argument('--output', '-o', help='Output markdown path (default: stdout)')
+    parser.add_argument('--workers', type=int, help='Parallel page extraction processes (default: CPU count, max 8)')
+    parser.add_argument('--figures-metadata', help='figures_metadata.json used to link figure placeholders')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf_path):
+        print(f"Error: PDF file not found: {args.pdf_path}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    markdown = parse_pdf(args.pdf_path, args.workers, args.figures_metadata)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        with fitz.open(args.pdf_path) as doc:
+            page_count = len(doc)
+        print(f"Saved: {args.output}")
+        print(f"Parsed {page_count} pages in {elapsed * 1000:.0f} ms ({elapsed * 1000 / page_count:.1f} ms/page)")
+    else:
+        sys.stdout.write(markdown)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Page Raster Store
+
+Renders all pages of a document into one np.memmap-backed file instead of
+one temporary PNG per page. The file starts with a page offset table;
+every page is a page-aligned uint8 (height, width, channels) block that
+detection and cropping read as zero-copy views. Worker processes can open
+the same file read-only, and because the pages are file-backed the kernel
+can drop them from memory, keeping RSS flat on 800-page scanned reports.
+
+Usage:
+    store = render_pdf_to_store('paper.pdf', 'pages.raster', scale=2.0)
+    gray = store.page(0).mean(axis=2)   # view, no decode, no copy
+
+Requirements:
+    pip install pymupdf numpy
+"""
+
+import fitz  # PyMuPDF
+import json
+import struct
+
+import numpy as np
+
+from tracing import span
+
+
+MAGIC = b'RSTR'
+ALIGN = 4096
+
+
+def _align(value):
+    return (value + ALIGN - 1) // ALIGN * ALIGN
+
+
+class RasterStore:
+    """A single file holding every rendered page plus its offset table."""
+
+    def __init__(self, path, table, mode):
+        self.path = path
+        self.pages = table['pages']
+        self.scale = table.get('scale')
+        self._mm = np.memmap(path, dtype=np.uint8, mode=mode)
+
+    @classmethod
+    def create(cls, path, shapes, scale=None):
+        """Preallocate a store for pages of the given (height, width, channels) shapes."""
+        pages = []
+        for height, width, channels in shapes:
+            pages.append({'offset': 0, 'height': height, 'width': width, 'channels': channels})
+
+        # The header size depends on the table, which holds the offsets: fix
+        # the offsets for a generous header estimate, then grow if needed
+        header_size = _align(8 + len(json.dumps({'scale': scale, 'pages': pages})) + 16 * len(pages))
+        while True:
+            offset = header_size
+            for page in pages:
+                page['offset'] = offset
+                offset = _align(offset + page['height'] * page['width'] * page['channels'])
+            table = json.dumps({'scale': scale, 'pages': pages}).encode('utf-8')
+            if 8 + len(table) <= header_size:
+                break
+            header_size = _align(8 + len(table))
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<I', len(table)) + table)
+            f.truncate(max(offset, header_size))
+
+        return cls(path, {'scale': scale, 'pages': pages}, 'r+')
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """Open an existing store; the default read-only mode is safe to share between processes."""
+        with open(path, 'rb') as f:
+            magic, length = f.read(4), struct.unpack('<I', f.read(4))[0]
+            if magic != MAGIC:
+                raise ValueError(f"Not a raster store: {path}")
+            table = json.loads(f.read(length).decode('utf-8'))
+        return cls(path, table, mode)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def page(self, index):
+        """Zero-copy (height, width, channels) view of one page."""
+        meta = self.pages[index]
+        size = meta['height'] * meta['width'] * meta['channels']
+        view = self._mm[meta['offset']:meta['offset'] + size]
+        return view.reshape(meta['height'], meta['width'], meta['channels'])
+
+    def write_page(self, index, pix):
+        """Copy a rendered fitz.Pixmap into its slot (written back by the kernel, flushed on close)."""
+        target = self.page(index)
+        if (pix.height, pix.width, pix.n) != target.shape:
+            raise ValueError(f"Page {index} pixmap {pix.height}x{pix.width}x{pix.n} "
+                             f"does not match slot {target.shape}")
+        target[...] = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(target.shape)
+
+    def close(self):
+        """Flush pending writes and drop this handle's mapping."""
+        if self._mm.mode != 'r':
+            self._mm.flush()
+        self._mm = None
+
+
+def render_pdf_to_store(pdf_path, store_path, scale=2.0):
+    """Render every page of a PDF (RGB) into a new raster store."""
+    doc = fitz.open(pdf_path)
+    matrix = fitz.Matrix(scale, scale)
+
+    shapes = []
+    for page in doc:
+        irect = page.rect.transform(matrix).irect
+        shapes.append((irect.height, irect.width, 3))
+    store = RasterStore.create(store_path, shapes, scale)
+
+    for page_num in range(len(doc)):
+        with span('render', page=page_num + 1) as s:
+            pix = doc[page_num].get_pixmap(matrix=matrix, alpha=False)
+            store.write_page(page_num, pix)
+            s.set(pixels=pix.width * pix.height, bytes_written=len(pix.samples_mv))
+        print(f"Rendered page {page_num + 1}/{len(doc)} into {store_path}")
+
+    doc.close()
+    return store
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Lightweight Stage Tracing for the Extractors
+
+Span instrumentation around each pipeline stage and page, recording
+duration, pixels, bytes written and RSS delta. Tracing is off by default
+and spans are no-ops until enable() is called (the extractors do this for
+--profile). Traces are written in Chrome trace format, which loads
+directly in chrome://tracing and https://ui.perfetto.dev.
+
+Usage:
+    from tracing import span
+    with span('render', page=3) as s:
+        pix = page.get_pixmap()
+        s.set(pixels=pix.width * pix.height)
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Current resident set size in bytes (falls back to peak RSS off Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start', 'rss_start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def set(self, **args):
+        """Attach measurements (pixels, bytes_written, ...) to the span."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.rss_start = current_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.args['mem_delta_kb'] = (current_rss() - self.rss_start) // 1024
+        self.tracer._record(self, end)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects completed spans as Chrome trace 'X' (complete) events."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name, cat=None, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat or name, args)
+
+    def _record(self, span, end):
+        event = {
+            'name': span.name,
+            'cat': span.cat,
+            'ph': 'X',
+            'ts': round((span.start - self._origin) * 1e6, 1),
+            'dur': round((end - span.start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': span.args
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write_chrome_trace(self, path):
+        """Write collected spans as a Chrome-trace/Perfetto JSON file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Saved profile to: {path} (open in https://ui.perfetto.dev)")
+
+    def print_summary(self, top=10):
+        """Print per-stage totals and the slowest pages."""
+        stages = {}
+        pages = {}
+        for event in self.events:
+            stage = stages.setdefault(event['cat'], {'count': 0, 'ms': 0.0, 'pixels': 0, 'bytes': 0})
+            stage['count'] += 1
+            stage['ms'] += event['dur'] / 1000
+            stage['pixels'] += event['args'].get('pixels', 0)
+            stage['bytes'] += event['args'].get('bytes_written', 0)
+            if 'page' in event['args']:
+                page = pages.setdefault(event['args']['page'], {})
+                page[event['cat']] = page.get(event['cat'], 0.0) + event['dur'] / 1000
+
+        if not stages:
+            return
+
+        print("\nStage summary")
+        print(f"{'stage':<12} {'count':>6} {'total ms':>10} {'Mpixels':>9} {'KB written':>11}")
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]['ms']):
+            print(f"{name:<12} {stage['count']:>6} {stage['ms']:>10.1f} "
+                  f"{stage['pixels'] / 1e6:>9.1f} {stage['bytes'] / 1024:>11.1f}")
+
+        if pages:
+            print(f"\nTop {min(top, len(pages))} pages by time")
+            print(f"{'page':>5} {'total ms':>10}  breakdown")
+            ranked = sorted(pages.items(), key=lambda item: -sum(item[1].values()))
+            for page, breakdown in ranked[:top]:
+                detail = ', '.join(f"{name} {ms:.1f}" for name, ms in
+                                   sorted(breakdown.items(), key=lambda item: -item[1]))
+                print(f"{page:>5} {sum(breakdown.values()):>10.1f}  {detail}")
+
+
+TRACER = Tracer()
+
+
+def span(name, cat=None, **args):
+    """Open a span on the process-wide tracer (no-op unless tracing is enabled)."""
+    return TRACER.span(name, cat, **args)
+
+
+def enable():
+    """Turn on span collection for the process-wide tracer."""
+    TRACER.enabled = True
+    return TRACER
@@ -0,0 +1,82 @@
+"""Batch cover generation must never pay for the same cover twice."""
+
+import asyncio
+import functools
+
+import pytest
+import requests
+
+import batch_covers
+import generate_cover
+from cover_api_stub import GENERATIONS_PATH, serve
+
+POSTS = [{'id': 'p1', 'title': 'Attention', 'content': 'transformer attention'}]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**faults):
+        server = serve('127.0.0.1', 0, **faults)
+        servers.append(server)
+        return server, f'http://127.0.0.1:{server.server_address[1]}{GENERATIONS_PATH}'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _run(tmp_path, api_url, **options):
+    manifest = str(tmp_path / 'manifest.jsonl')
+    summary = asyncio.run(batch_covers.run_batch(POSTS, str(tmp_path / 'covers'), manifest, api_key='test',
+                                                 api_url=api_url, **options))
+    return summary, batch_covers.load_manifest(manifest)['p1']
+
+
+def test_read_timeout_does_not_resend_the_generation(tmp_path, stub, monkeypatch):
+    server, api_url = stub(latency_ms=800)
+    monkeypatch.setattr(batch_covers, 'request_image',
+                        functools.partial(generate_cover.request_image, timeout=(2, 0.2)))
+
+    summary, entry = _run(tmp_path, api_url)
+
+    assert summary['failed'] == 1 and entry['attempts'] == 1
+    assert server.RequestHandlerClass.state.counts['generations'] == 1
+
+
+def test_failed_download_is_retried_without_generating_again(tmp_path, stub, monkeypatch):
+    server, api_url = stub()
+    download_image = generate_cover.download_image
+    calls = []
+
+    def flaky_download(image, session, dest_path, verbose=True):
+        calls.append(image['url'])
+        if len(calls) == 1:
+            raise requests.ConnectionError('connection reset')
+        download_image(image, session, dest_path, verbose)
+
+    monkeypatch.setattr(generate_cover, 'download_image', flaky_download)
+    monkeypatch.setattr(batch_covers, 'RETRY_BACKOFF', 0.01)
+
+    summary, entry = _run(tmp_path, api_url)
+
+    assert summary['ok'] == 1 and entry['attempts'] == 1
+    assert len(calls) == 2 and calls[0] == calls[1]
+    assert server.RequestHandlerClass.state.counts['generations'] == 1
+
+
+def test_server_errors_are_retried(tmp_path, stub, monkeypatch):
+    server, api_url = stub(rate_500=1.0)
+    monkeypatch.setattr(batch_covers, 'RETRY_BACKOFF', 0.01)
+
+    summary, entry = _run(tmp_path, api_url, attempts=3)
+
+    assert summary['failed'] == 1 and entry['attempts'] == 3
+    assert server.RequestHandlerClass.state.counts['generations'] == 3
+
+
+def test_attempts_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        _run(tmp_path, None, attempts=0)
@@ -0,0 +1,17 @@
+"""Benchmark comparisons must not flag run-to-run noise on millisecond stages."""
+
+from benchmark_extraction import compare_results
+
+
+def _results(**metrics):
+    return {'results': {key: {'wall_s': wall, 'cpu_s': wall, 'peak_rss_mb': rss}
+                        for key, (wall, rss) in metrics.items()}}
+
+
+def test_small_absolute_slowdowns_are_not_regressions():
+    baseline = _results(metadata=(0.001, 60.0), render=(1.0, 100.0))
+    current = _results(metadata=(0.0014, 62.0), render=(1.2, 100.0))
+
+    regressions = compare_results(baseline, current, 0.10)
+
+    assert {(key, metric) for key, metric, *_ in regressions} == {('render', 'wall_s'), ('render', 'cpu_s')}
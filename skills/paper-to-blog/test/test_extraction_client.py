@@ -0,0 +1,108 @@
+"""The extractors must run locally whenever the extraction server cannot serve a job."""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import extraction_client
+from extraction_client import server_available, try_remote
+
+
+def _listen(handle):
+    """Accept connections on an ephemeral port and hand each socket to handle()."""
+    listener = socket.create_server(('127.0.0.1', 0))
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener
+
+
+class _FailingExtractHandler(BaseHTTPRequestHandler):
+    """Healthy /health, but every job fails mid-stream with protocol garbage."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'status': 'ok'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'{"event": "page", "page": 1, "records": []}\nnot json\n')
+
+
+@pytest.fixture
+def use_server(monkeypatch):
+    def point_at(port):
+        monkeypatch.setenv('FIGURE_EXTRACTOR_SERVER', f'127.0.0.1:{port}')
+    return point_at
+
+
+def test_non_http_service_on_the_port_is_not_a_server(use_server):
+    def garbage(conn):
+        conn.sendall(b'\x00\xffhello\r\n')
+        conn.close()
+
+    listener = _listen(garbage)
+    use_server(listener.getsockname()[1])
+    try:
+        assert not server_available()
+        assert try_remote({'extractor': 'improved'}) is None
+    finally:
+        listener.close()
+
+
+def test_silent_service_times_out(use_server):
+    held = []
+    listener = _listen(held.append)
+    use_server(listener.getsockname()[1])
+    try:
+        assert not server_available(timeout=0.2)
+    finally:
+        listener.close()
+        for conn in held:
+            conn.close()
+
+
+def test_failing_job_falls_back_to_local(use_server):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FailingExtractHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    use_server(server.server_address[1])
+    try:
+        assert server_available()
+        assert try_remote({'extractor': 'improved'}) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_stalled_stream_times_out(use_server):
+    def stall(conn):
+        conn.recv(65536)
+        conn.sendall(b'HTTP/1.1 200 OK\r\n\r\n')
+        threading.Event().wait(5)
+        conn.close()
+
+    listener = _listen(stall)
+    use_server(listener.getsockname()[1])
+    try:
+        with pytest.raises(OSError):
+            extraction_client.run_remote({'extractor': 'improved'}, timeout=0.2)
+    finally:
+        listener.close()
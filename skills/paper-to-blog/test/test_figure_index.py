@@ -0,0 +1,34 @@
+"""The corpus index mirrors each paper's latest figure metadata."""
+
+import os
+
+from figure_index import query_figures, upsert_figures
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PDF_PATH = os.path.join(FIXTURES_DIR, 'attention_paper.pdf')
+
+
+def _record(page, number):
+    return {'filename': f'figure{page}_{number}.png', 'type': 'figure', 'number': number, 'page': page,
+            'description': f'Figure {number}', 'bbox': {'top': 10, 'left': 10, 'bottom': 50, 'right': 90}}
+
+
+def test_reindexing_removes_figures_that_disappeared(tmp_path):
+    db_path = str(tmp_path / 'index.db')
+    upsert_figures(db_path, PDF_PATH, [_record(1, 1), _record(1, 2), _record(2, 1)], str(tmp_path))
+    upsert_figures(db_path, PDF_PATH, [_record(1, 1), _record(2, 3)], str(tmp_path), timings={'extract_s': 1.5})
+
+    rows = query_figures(db_path)
+    assert sorted((row['page'], row['number']) for row in rows) == [(1, '1'), (2, '3')]
+    assert all(row['timings'] == '{"extract_s": 1.5}' for row in rows)
+
+
+def test_reindexing_leaves_other_papers_alone(tmp_path):
+    db_path = str(tmp_path / 'index.db')
+    other_pdf = tmp_path / 'other.pdf'
+    other_pdf.write_bytes(b'%PDF-1.4 other')
+    upsert_figures(db_path, str(other_pdf), [_record(1, 1)], str(tmp_path))
+    upsert_figures(db_path, PDF_PATH, [_record(1, 1)], str(tmp_path))
+    upsert_figures(db_path, PDF_PATH, [], str(tmp_path))
+
+    assert [row['pdf_path'] for row in query_figures(db_path)] == [str(other_pdf)]
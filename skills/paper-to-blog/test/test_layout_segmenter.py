@@ -0,0 +1,46 @@
+"""Blank pages must segment to nothing instead of failing, and bilevel scans must still find their ink."""
+
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from extract_figures_improved import extract_figures_with_text_guidance
+from layout_segmenter import binarize, otsu_threshold, segment_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def test_blank_and_single_colour_pages_have_no_foreground():
+    for value in (255, 128, 0):
+        page = np.full((1100, 850, 3), value, dtype=np.uint8)
+        assert otsu_threshold(page.min(axis=2)) is None
+        assert not binarize(page).any()
+        assert segment_page(page) == []
+
+
+def test_bilevel_page_keeps_its_ink():
+    doc = fitz.open(os.path.join(FIXTURES_DIR, 'attention_paper.pdf'))
+    pix = doc[2].get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csGRAY)
+    doc.close()
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    bilevel = np.where(gray < 128, 0, 255).astype(np.uint8)
+
+    assert otsu_threshold(bilevel) == 0
+    assert binarize(bilevel).any()
+    figures = [elem for elem in segment_page(bilevel) if elem['type'] == 'figure']
+    assert figures == [elem for elem in segment_page(gray) if elem['type'] == 'figure']
+
+
+def test_extraction_survives_a_blank_page(tmp_path):
+    pdf_path = str(tmp_path / 'with_blank.pdf')
+    doc = fitz.open(os.path.join(FIXTURES_DIR, 'attention_paper.pdf'))
+    doc.new_page()
+    doc.save(pdf_path)
+    pages = len(doc)
+    doc.close()
+
+    metadata = extract_figures_with_text_guidance(pdf_path, str(tmp_path / 'out'))
+
+    assert len(metadata) == 45
+    assert all(record['page'] < pages for record in metadata)
@@ -0,0 +1,77 @@
+"""Partial re-extraction must only touch the records it was asked to redo."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from extract_figures_improved import (extract_figures_with_text_guidance, parse_figure_selector,
+                                      reextract_selected)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PDF_PATH = os.path.join(FIXTURES_DIR, 'attention_paper.pdf')
+
+
+def _snapshot(output_dir):
+    with open(os.path.join(output_dir, 'figures_metadata.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+    figures_dir = os.path.join(output_dir, 'figures')
+    files = {}
+    for name in os.listdir(figures_dir):
+        path = os.path.join(figures_dir, name)
+        with open(path, 'rb') as f:
+            files[name] = (f.read(), os.stat(path).st_mtime_ns)
+    return metadata, files
+
+
+@pytest.fixture(scope='module')
+def extracted(tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp('full'))
+    extract_figures_with_text_guidance(PDF_PATH, output_dir)
+    return output_dir
+
+
+@pytest.fixture
+def output_dir(extracted, tmp_path):
+    target = str(tmp_path / 'run')
+    shutil.copytree(extracted, target)
+    return target
+
+
+def test_reextract_one_figure_leaves_other_records_unchanged(output_dir):
+    metadata, files = _snapshot(output_dir)
+
+    reextract_selected(PDF_PATH, output_dir, figures=parse_figure_selector('figure:3@2'))
+
+    patched, patched_files = _snapshot(output_dir)
+    assert patched == metadata
+    assert set(patched_files) == set(files)
+    for record in metadata:
+        before, after = files[record['filename']], patched_files[record['filename']]
+        if (record['page'], str(record['number'])) != (2, '3'):
+            assert after == before
+        else:
+            assert after[0] == before[0] and after[1] != before[1]
+
+
+def test_figure_selector_requires_a_page():
+    assert parse_figure_selector('figure:3@4, 2@6') == {(4, 'figure', '3'), (6, None, '2')}
+    with pytest.raises(ValueError):
+        parse_figure_selector('figure:3')
+
+
+def test_reextract_keeps_record_when_nothing_is_redetected(output_dir):
+    metadata_path = os.path.join(output_dir, 'figures_metadata.json')
+    metadata, _ = _snapshot(output_dir)
+    stale = dict(metadata[0], number=7, page=3, filename='figure3_7_manual.png')
+    shutil.copy(os.path.join(output_dir, 'figures', metadata[0]['filename']),
+                os.path.join(output_dir, 'figures', stale['filename']))
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata + [stale], f)
+
+    patched = reextract_selected(PDF_PATH, output_dir, figures={(3, 'figure', '7')})
+
+    assert stale in patched
+    assert len(patched) == len(metadata) + 1
+    assert os.path.exists(os.path.join(output_dir, 'figures', stale['filename']))
@@ -2,13 +2,35 @@
 """
 Dataset Pipeline Builder
 Production-grade tool for senior computer vision engineer
+
+Streams an image directory through decode -> validate -> resize -> encode in a
+multiprocessing worker pool connected by bounded queues, and packs the results
+into WebDataset-style tar shards (<key>.jpg + <key>.json per sample) with an
+index.json giving each sample's shard and byte offset.
+
+Builds are incremental: manifest.json maps each source file's (size, mtime,
+sha256) to its sample, so later runs only process new or changed files.
+Replaced and deleted samples are tombstoned, and a shard whose dead fraction
+passes compact_threshold is rewritten without them.
+
+With tensor_store enabled, the indexed samples are also written to a
+preallocated fixed-shape tensor file (tensors/images.npy, N x H x W x C) plus
+tensors/labels.npy. Crop, flip, resize and normalize run vectorized over
+whole uint8 batches, and a trainer reads batches zero-copy with
+np.load(path, mmap_mode='r') instead of decoding JPEGs every epoch.
 """
 
+import io
 import os
+import hashlib
 import sys
 import json
+import time
+import tarfile
 import logging
 import argparse
+import threading
+import multiprocessing as mp
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -19,51 +41,578 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff'}
+
+DEFAULT_CONFIG = {
+    'workers': max(1, (os.cpu_count() or 2) - 1),
+    'queue_size': 64,           # items in flight per queue; bounds memory
+    'image_size': 512,          # longest side after resize
+    'min_size': 32,             # shorter side below this is rejected
+    'quality': 90,              # JPEG quality of encoded samples
+    'shard_size': 1000,         # samples per shard
+    'shard_max_mb': 256,        # or bytes per shard, whichever comes first
+    'compact_threshold': 0.3,   # rewrite a shard once this fraction of it is tombstoned
+    'tensor_store': False,      # also write tensors/images.npy + labels.npy
+    'tensor_load_size': 256,    # square size samples are decoded to before batching
+    'crop_fraction': 0.875,     # crop side as a fraction of the load size; resized to tensor_size
+    'tensor_size': 224,         # stored H = W
+    'tensor_dtype': 'float16',  # 'float16'/'float32' normalized, or 'uint8' as-is
+    'tensor_batch': 64,
+    'augment': False,           # random crop + horizontal flip instead of center crop
+    'seed': 0,
+    'mean': [0.485, 0.456, 0.406],
+    'std': [0.229, 0.224, 0.225],
+}
+
+MANIFEST_VERSION = 1
+
+_DONE = None
+
+
+def scan_images(root: str) -> List[str]:
+    """Image files under root, relative and sorted for a deterministic sample order"""
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(paths)
+
+
+def transform_image(data: bytes, options: Dict) -> Dict:
+    """Decode, validate, resize and re-encode one image; raises ValueError on rejection"""
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft('RGB', (options['image_size'], options['image_size']))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"decode: {e}")
+
+    if min(image.size) < options['min_size']:
+        raise ValueError(f"too small: {image.size[0]}x{image.size[1]}")
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    image.thumbnail((options['image_size'], options['image_size']), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=options['quality'])
+    return {'data': buffer.getvalue(), 'width': image.size[0], 'height': image.size[1]}
+
+
+def _worker(root: str, tasks, results, options: Dict):
+    """Pool process: transform tasks until the sentinel, then report done"""
+    while True:
+        task = tasks.get()
+        if task is _DONE:
+            results.put(_DONE)
+            return
+        index, rel_path, known_hash = task
+        try:
+            with open(os.path.join(root, rel_path), 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest == known_hash:
+                # Touched but not modified: keep the existing sample
+                sample = {'unchanged': True}
+            else:
+                sample = transform_image(data, options)
+                sample['source_bytes'] = len(data)
+            sample.update(index=index, path=rel_path, sha256=digest)
+        except (OSError, ValueError) as e:
+            sample = {'index': index, 'path': rel_path, 'error': str(e)}
+        results.put(sample)
+
+
+def run_pool(root: str, tasks: List, options: Dict, workers: int, queue_size: int):
+    """Yield worker results for (path, known_hash) tasks in task order, through bounded queues"""
+    workers = min(workers, max(1, len(tasks)))
+    task_queue = mp.Queue(maxsize=queue_size)
+    result_queue = mp.Queue(maxsize=queue_size)
+    pool = [mp.Process(target=_worker, args=(root, task_queue, result_queue, options), daemon=True)
+            for _ in range(workers)]
+    for process in pool:
+        process.start()
+
+    # Feed from a thread so the caller can drain results; both queues are bounded
+    def feed():
+        for index, (rel_path, known_hash) in enumerate(tasks):
+            task_queue.put((index, rel_path, known_hash))
+        for _ in pool:
+            task_queue.put(_DONE)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    done = 0
+    # Reorder completions so shard contents follow the sorted input order
+    pending, next_index = {}, 0
+    try:
+        while done < len(pool):
+            item = result_queue.get()
+            if item is _DONE:
+                done += 1
+                continue
+            pending[item['index']] = item
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+    finally:
+        feeder.join(timeout=5)
+        for process in pool:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def read_member(output_dir: str, shard: str, offset: int, size: int) -> bytes:
+    """Bytes of one shard member, read directly at its indexed offset"""
+    with open(os.path.join(output_dir, shard), 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def decode_batch(job):
+    """Pool task: decode indexed samples to a (n, L, L, 3) uint8 batch (shorter side to L, center crop)"""
+    import numpy as np
+    from PIL import Image
+
+    output_dir, entries, load_size = job
+    batch = np.empty((len(entries), load_size, load_size, 3), dtype=np.uint8)
+    for i, entry in enumerate(entries):
+        image = Image.open(io.BytesIO(read_member(output_dir, entry['shard'], entry['offset'], entry['size'])))
+        image.draft('RGB', (load_size, load_size))
+        image = image.convert('RGB')
+        scale = load_size / min(image.size)
+        width, height = max(load_size, round(image.size[0] * scale)), max(load_size, round(image.size[1] * scale))
+        left, top = (width - load_size) // 2, (height - load_size) // 2
+        image = image.resize((width, height), Image.BILINEAR).crop(
+            (left, top, left + load_size, top + load_size))
+        batch[i] = np.asarray(image)
+    return batch
+
+
+def crop_batch(batch, size: int, offsets_y, offsets_x):
+    """(n, size, size, C) crops at per-sample offsets: one gather over a sliding-window view"""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    windows = sliding_window_view(batch, (size, size), axis=(1, 2))  # (n, y, x, C, size, size), no copy
+    crops = windows[np.arange(len(batch)), offsets_y, offsets_x]      # (n, C, size, size)
+    return np.ascontiguousarray(crops.transpose(0, 2, 3, 1))
+
+
+def flip_batch(batch, mask):
+    """Mirror the samples selected by a boolean mask horizontally, in place"""
+    if mask.any():
+        batch[mask] = batch[mask][:, :, ::-1]
+    return batch
+
+
+def resize_batch(batch, size: int):
+    """
+    Resize a uint8 (n, H, W, C) batch to (n, size, size, C) uint8 with PIL's bilinear filter.
+
+    When downscaling, the triangle filter is widened by the scale factor as in
+    PIL, so every source pixel is averaged in instead of aliasing. Separable:
+    one gather and multiply-add per filter tap along rows, then along columns,
+    in 8-bit fixed point on uint16 so no float copy of the batch is made.
+    """
+    import numpy as np
+
+    def axis_taps(length):
+        scale = length / size
+        support = max(scale, 1.0)
+        centers = (np.arange(size) + 0.5) * scale
+        first = np.maximum(np.floor(centers - support + 0.5).astype(np.intp), 0)
+        stop = np.minimum(np.floor(centers + support + 0.5).astype(np.intp), length)
+        index = first[:, None] + np.arange(int((stop - first).max()))
+        weights = np.maximum(1 - np.abs((index + 0.5 - centers[:, None]) / support), 0) * (index < stop[:, None])
+        weights = np.round(weights / weights.sum(axis=1, keepdims=True) * 256).astype(np.int32)
+        # Rounding leftovers go to the heaviest tap so every row of weights sums to exactly 256
+        weights[np.arange(size), weights.argmax(axis=1)] += 256 - weights.sum(axis=1)
+        return np.minimum(index, length - 1), weights.astype(np.uint16)
+
+    def filter_axis(data, axis, index, weights):
+        out = None
+        for tap in range(index.shape[1]):
+            # np.take copies whole pixels per index, much faster than fancy indexing on a middle axis
+            term = np.take(data, index[:, tap], axis=axis) * weights[tap]
+            out = term if out is None else np.add(out, term, out=out)
+        out += 128
+        out >>= 8
+        return out.astype(np.uint8)
+
+    y_index, y_weights = axis_taps(batch.shape[1])
+    x_index, x_weights = axis_taps(batch.shape[2])
+    rows = filter_axis(batch, 1, y_index, [y_weights[:, tap, None, None] for tap in range(y_weights.shape[1])])
+    # Column weights spelled out per channel so the inner loops run over size * C, not C
+    channels = batch.shape[3]
+    return filter_axis(rows, 2, x_index,
+                       [np.repeat(x_weights[:, tap, None], channels, axis=1) for tap in range(x_weights.shape[1])])
+
+
+def normalize_batch(batch, mean, std, dtype):
+    """(x / 255 - mean) / std per channel for a uint8 batch, via a 256-entry lookup table per channel"""
+    import numpy as np
+
+    table = ((np.arange(256, dtype=np.float32)[:, None] / 255.0 - np.asarray(mean, np.float32))
+             / np.asarray(std, np.float32)).astype(dtype)
+    out = np.empty(batch.shape, dtype=dtype)
+    for channel in range(batch.shape[-1]):
+        np.take(table[:, channel], batch[..., channel], out=out[..., channel])
+    return out
+
+
+def augment_batch(batch, config: Dict, rng):
+    """Crop (random or center), flip and resize a uint8 load-size batch to the stored tensor layout"""
+    import numpy as np
+
+    n, load_size = len(batch), batch.shape[1]
+    size = int(config['tensor_size'])
+    crop = max(1, round(load_size * float(config['crop_fraction'])))
+    if config['augment']:
+        offsets_y = rng.integers(0, load_size - crop + 1, n)
+        offsets_x = rng.integers(0, load_size - crop + 1, n)
+    else:
+        offsets_y = offsets_x = np.full(n, (load_size - crop) // 2)
+    out = crop_batch(batch, crop, offsets_y, offsets_x)
+    if config['augment']:
+        flip_batch(out, rng.random(n) < 0.5)
+    if crop != size:
+        out = resize_batch(out, size)
+    if config['tensor_dtype'] != 'uint8':
+        out = normalize_batch(out, config['mean'], config['std'], config['tensor_dtype'])
+    return out
+
+
+def build_tensor_store(output_dir: str, samples: List[Dict], config: Dict) -> Dict:
+    """Write indexed samples into tensors/images.npy (memmap) and tensors/labels.npy"""
+    import numpy as np
+
+    store_dir = os.path.join(output_dir, 'tensors')
+    os.makedirs(store_dir, exist_ok=True)
+    size, batch_size = int(config['tensor_size']), int(config['tensor_batch'])
+    classes = sorted({s['label'] for s in samples if s['label'] is not None})
+    class_ids = {label: i for i, label in enumerate(classes)}
+
+    shape = (len(samples), size, size, 3)
+    images_path = os.path.join(store_dir, 'images.npy')
+    images = np.lib.format.open_memmap(images_path + '.tmp', mode='w+', dtype=config['tensor_dtype'], shape=shape)
+    labels = np.array([class_ids.get(s['label'], -1) for s in samples], dtype=np.int64)
+
+    jobs = [(output_dir, samples[i:i + batch_size], int(config['tensor_load_size']))
+            for i in range(0, len(samples), batch_size)]
+    decode_s = augment_s = 0.0
+    start = time.perf_counter()
+    with mp.Pool(min(int(config['workers']), max(1, len(jobs)))) as pool:
+        position = 0
+        last = time.perf_counter()
+        for batch_index, batch in enumerate(pool.imap(decode_batch, jobs)):
+            now = time.perf_counter()
+            decode_s += now - last
+            rng = np.random.default_rng([int(config['seed']), batch_index])
+            images[position:position + len(batch)] = augment_batch(batch, config, rng)
+            position += len(batch)
+            last = time.perf_counter()
+            augment_s += last - now
+    images.flush()
+    del images
+    os.replace(images_path + '.tmp', images_path)
+    np.save(os.path.join(store_dir, 'labels.npy'), labels)
+    elapsed = time.perf_counter() - start
+
+    meta = {
+        'images': 'images.npy',
+        'labels': 'labels.npy',
+        'shape': list(shape),
+        'dtype': config['tensor_dtype'],
+        'layout': 'NHWC',
+        'classes': classes,
+        'normalized': config['tensor_dtype'] != 'uint8',
+        'mean': config['mean'],
+        'std': config['std'],
+        'augment': bool(config['augment']),
+        'keys': [s['key'] for s in samples]
+    }
+    with open(os.path.join(store_dir, 'tensors.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    logger.info(f"Tensor store {shape} {config['tensor_dtype']} in {elapsed:.2f}s "
+                f"(waiting on decode {decode_s:.2f}s, vectorized transforms {augment_s:.2f}s)")
+    return {
+        'path': images_path,
+        'shape': list(shape),
+        'dtype': config['tensor_dtype'],
+        'bytes': os.path.getsize(images_path),
+        'elapsed_s': round(elapsed, 3),
+        'decode_wait_s': round(decode_s, 3),
+        'transform_s': round(augment_s, 3),
+        'images_per_s': round(len(samples) / elapsed, 1) if elapsed else 0.0
+    }
+
+
+class ShardWriter:
+    """Writes samples into size-bounded tar shards and records where each one landed"""
+
+    def __init__(self, output_dir: str, shard_size: int, shard_max_bytes: int, first_shard: int = 0):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.shard_max_bytes = shard_max_bytes
+        self.next_shard = first_shard
+        self.tar = None
+        self.shards = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _open(self):
+        name = f"shard-{self.next_shard:06d}.tar"
+        self.next_shard += 1
+        self.tar = tarfile.open(os.path.join(self.output_dir, name), 'w', format=tarfile.USTAR_FORMAT)
+        self.shards.append({'name': name, 'samples': 0, 'bytes': 0})
+
+    def _add(self, name: str, data: bytes) -> int:
+        """Append one member; returns the byte offset of its data in the shard"""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = 0
+        header = info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors)
+        offset = self.tar.offset + len(header)
+        self.tar.addfile(info, io.BytesIO(data))
+        return offset
+
+    def write(self, key: str, image: bytes, meta: Dict) -> Dict:
+        """Add <key>.jpg and <key>.json; returns the sample's index entry"""
+        current = self.shards[-1] if self.shards else None
+        if (self.tar is None or current['samples'] >= self.shard_size
+                or current['bytes'] + len(image) > self.shard_max_bytes):
+            self.close()
+            self._open()
+            current = self.shards[-1]
+
+        offset = self._add(f"{key}.jpg", image)
+        self._add(f"{key}.json", json.dumps(meta, sort_keys=True).encode('utf-8'))
+        current['samples'] += 1
+        current['bytes'] = self.tar.offset
+        return {'shard': current['name'], 'offset': offset, 'size': len(image)}
+
+    def close(self):
+        if self.tar is not None:
+            self.tar.close()
+            self.shards[-1]['bytes'] = os.path.getsize(os.path.join(self.output_dir, self.shards[-1]['name']))
+            self.tar = None
+
+
 class DatasetPipelineBuilder:
     """Production-grade dataset pipeline builder"""
-    
+
     def __init__(self, config: Dict):
-        self.config = config
+        self.config = {**DEFAULT_CONFIG, **config}
         self.results = {
             'status': 'initialized',
             'start_time': datetime.now().isoformat(),
             'processed_items': 0
         }
         logger.info(f"Initialized {self.__class__.__name__}")
-    
+
     def validate_config(self) -> bool:
         """Validate configuration"""
         logger.info("Validating configuration...")
-        # Add validation logic
+        if not os.path.isdir(self.config['input']):
+            raise ValueError(f"Input directory not found: {self.config['input']}")
+        for key in ('workers', 'queue_size', 'image_size', 'shard_size', 'shard_max_mb'):
+            if int(self.config[key]) < 1:
+                raise ValueError(f"{key} must be at least 1")
+        if not 1 <= int(self.config['quality']) <= 100:
+            raise ValueError("quality must be between 1 and 100")
         logger.info("Configuration validated")
         return True
-    
+
     def process(self) -> Dict:
         """Main processing logic"""
         logger.info("Starting processing...")
-        
+
         try:
             self.validate_config()
-            
+
             # Main processing
             result = self._execute()
-            
+            self.results.update(result)
+
             self.results['status'] = 'completed'
             self.results['end_time'] = datetime.now().isoformat()
-            
+
             logger.info("Processing completed successfully")
             return self.results
-            
+
         except Exception as e:
             self.results['status'] = 'failed'
             self.results['error'] = str(e)
             logger.error(f"Processing failed: {e}")
             raise
-    
+
+    def _load_manifest(self) -> Dict:
+        """Previous build's manifest, or an empty one"""
+        path = os.path.join(self.config['output'], 'manifest.json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != MANIFEST_VERSION:
+                logger.warning(f"Ignoring manifest with unknown version: {path}")
+            elif self.config.get('full'):
+                # Full rebuild: the old shards would be orphaned or overwritten piecemeal
+                for name in manifest['shards']:
+                    shard_path = os.path.join(self.config['output'], name)
+                    if os.path.exists(shard_path):
+                        os.remove(shard_path)
+            else:
+                return manifest
+        return {'version': MANIFEST_VERSION, 'next_key': 0, 'next_shard': 0, 'files': {}, 'shards': {}}
+
+    def _save_manifest(self, manifest: Dict):
+        path = os.path.join(self.config['output'], 'manifest.json')
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _write_sample(self, writer: ShardWriter, manifest: Dict, entry: Dict, image: bytes) -> Dict:
+        """Write a sample under a new key and point the entry at it"""
+        key = f"{manifest['next_key']:08d}"
+        manifest['next_key'] += 1
+        meta = {'path': entry['path'], 'label': entry['label'], 'width': entry['width'], 'height': entry['height']}
+        entry.update(key=key, **writer.write(key, image, meta))
+        return entry
+
+    def _compact(self, writer: ShardWriter, manifest: Dict) -> List[str]:
+        """Rewrite live samples out of shards past the tombstone threshold; returns the retired shards"""
+        output_dir = self.config['output']
+        threshold = float(self.config['compact_threshold'])
+        retired = [name for name, shard in manifest['shards'].items()
+                   if shard['dead'] and shard['dead'] / shard['samples'] >= threshold]
+        for name in sorted(retired):
+            live = sorted((entry for entry in manifest['files'].values() if entry['shard'] == name),
+                          key=lambda entry: entry['offset'])
+            logger.info(f"Compacting {name}: {manifest['shards'][name]['dead']} dead, {len(live)} live")
+            for entry in live:
+                image = read_member(output_dir, name, entry['offset'], entry['size'])
+                self._write_sample(writer, manifest, entry, image)
+            del manifest['shards'][name]
+        return retired
+
     def _execute(self) -> Dict:
-        """Execute main logic"""
-        # Implementation here
-        return {'success': True}
+        """Stream new and changed images through the worker pool into tar shards"""
+        config = self.config
+        root, output_dir = config['input'], config['output']
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        files = manifest['files']
+        paths = scan_images(root)
+        logger.info(f"Found {len(paths)} images under {root}")
+
+        # Same size and mtime as last build: unchanged without reading the file
+        tasks, stats = [], {}
+        for rel_path in paths:
+            st = os.stat(os.path.join(root, rel_path))
+            stats[rel_path] = st
+            entry = files.get(rel_path)
+            if entry and entry['source_size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                continue
+            tasks.append((rel_path, entry['sha256'] if entry else None))
+
+        def tombstone(entry):
+            manifest['shards'][entry['shard']]['dead'] += 1
+
+        deleted = [rel_path for rel_path in files if rel_path not in stats]
+        for rel_path in deleted:
+            tombstone(files.pop(rel_path))
+        logger.info(f"{len(paths) - len(tasks)} unchanged, {len(tasks)} to check, {len(deleted)} deleted")
+
+        writer = ShardWriter(output_dir, int(config['shard_size']), int(config['shard_max_mb']) * 1024 * 1024,
+                             first_shard=manifest['next_shard'])
+        options = {key: int(config[key]) for key in ('image_size', 'min_size', 'quality')}
+        rejected = []
+        counts = {'added': 0, 'changed': 0, 'touched': 0}
+        source_bytes = output_bytes = 0
+        start = time.perf_counter()
+        try:
+            for item in run_pool(root, tasks, options, int(config['workers']), int(config['queue_size'])):
+                rel_path = item['path']
+                st = stats[rel_path]
+                old = files.get(rel_path)
+                if 'error' in item:
+                    rejected.append({'path': rel_path, 'reason': item['error']})
+                    logger.debug(f"Rejected {rel_path}: {item['error']}")
+                    if old:
+                        tombstone(files.pop(rel_path))
+                    continue
+                if item.get('unchanged'):
+                    old.update(source_size=st.st_size, mtime_ns=st.st_mtime_ns)
+                    counts['touched'] += 1
+                    continue
+                if old:
+                    tombstone(old)
+                counts['changed' if old else 'added'] += 1
+                entry = {
+                    'path': rel_path,
+                    'label': os.path.dirname(rel_path).replace(os.sep, '/') or None,
+                    'width': item['width'],
+                    'height': item['height'],
+                    'source_size': st.st_size,
+                    'mtime_ns': st.st_mtime_ns,
+                    'sha256': item['sha256']
+                }
+                files[rel_path] = self._write_sample(writer, manifest, entry, item['data'])
+                source_bytes += item['source_bytes']
+                output_bytes += len(item['data'])
+                self.results['processed_items'] += 1
+            elapsed = time.perf_counter() - start
+            retired = self._compact(writer, manifest)
+        finally:
+            writer.close()
+
+        for shard in writer.shards:
+            manifest['shards'][shard['name']] = {'samples': shard['samples'], 'bytes': shard['bytes'], 'dead': 0}
+        manifest['next_shard'] = writer.next_shard
+        self._save_manifest(manifest)
+        # Retired shards go only once the manifest no longer points into them
+        for name in retired:
+            os.remove(os.path.join(output_dir, name))
+
+        samples = sorted(({'key': e['key'], 'path': e['path'], 'label': e['label'], 'shard': e['shard'],
+                           'offset': e['offset'], 'size': e['size']} for e in files.values()),
+                         key=lambda sample: sample['key'])
+        index = {
+            'created': datetime.now().isoformat(),
+            'config': {key: config[key] for key in DEFAULT_CONFIG},
+            'shards': [{'name': name, **shard} for name, shard in sorted(manifest['shards'].items())],
+            'samples': samples
+        }
+        index_path = os.path.join(output_dir, 'index.json')
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+
+        tensor_store = build_tensor_store(output_dir, samples, config) if config['tensor_store'] and samples else None
+
+        logger.info(f"Processed {self.results['processed_items']} images in {elapsed:.2f}s "
+                    f"({len(rejected)} rejected); {len(samples)} samples in {len(manifest['shards'])} shards")
+        return {
+            'success': True,
+            'index': index_path,
+            'samples': len(samples),
+            'shards': len(manifest['shards']),
+            'unchanged': len(paths) - len(tasks) + counts['touched'],
+            'added': counts['added'],
+            'changed': counts['changed'],
+            'deleted': len(deleted),
+            'compacted_shards': retired,
+            'rejected': len(rejected),
+            'rejected_items': rejected[:20],
+            'elapsed_s': round(elapsed, 3),
+            'images_per_s': round(self.results['processed_items'] / elapsed, 1) if elapsed else 0.0,
+            'input_bytes_per_s': round(source_bytes / elapsed) if elapsed else 0,
+            'output_bytes_per_s': round(output_bytes / elapsed) if elapsed else 0,
+            'tensor_store': tensor_store
+        }
 
 def main():
     """Main entry point"""
@@ -73,25 +622,47 @@ def main():
     parser.add_argument('--input', '-i', required=True, help='Input path')
     parser.add_argument('--output', '-o', required=True, help='Output path')
     parser.add_argument('--config', '-c', help='Configuration file')
+    parser.add_argument('--workers', '-w', type=int, help=f"Worker processes (default: {DEFAULT_CONFIG['workers']})")
+    parser.add_argument('--image-size', type=int, help=f"Longest side after resize (default: {DEFAULT_CONFIG['image_size']})")
+    parser.add_argument('--shard-size', type=int, help=f"Samples per shard (default: {DEFAULT_CONFIG['shard_size']})")
+    parser.add_argument('--compact-threshold', type=float,
+                        help=f"Tombstoned fraction that triggers shard compaction (default: {DEFAULT_CONFIG['compact_threshold']})")
+    parser.add_argument('--full', action='store_true', help='Ignore the manifest and rebuild every sample')
+    parser.add_argument('--tensor-store', action='store_true',
+                        help='Also write a fixed-shape memmapped tensor store (tensors/images.npy + labels.npy)')
+    parser.add_argument('--tensor-size', type=int, help=f"Stored H = W (default: {DEFAULT_CONFIG['tensor_size']})")
+    parser.add_argument('--tensor-dtype', choices=['float16', 'float32', 'uint8'],
+                        help=f"Stored dtype; uint8 skips normalization (default: {DEFAULT_CONFIG['tensor_dtype']})")
+    parser.add_argument('--augment', action='store_true', help='Random crop and flip instead of center crop')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
-    
+
     args = parser.parse_args()
-    
+
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
-    
+
     try:
-        config = {
+        config = {}
+        if args.config:
+            with open(args.config, 'r') as f:
+                config.update(json.load(f))
+        config.update({
             'input': args.input,
             'output': args.output
-        }
-        
+        })
+        for key in ('workers', 'image_size', 'shard_size', 'compact_threshold', 'tensor_size', 'tensor_dtype'):
+            if getattr(args, key) is not None:
+                config[key] = getattr(args, key)
+        for key in ('full', 'tensor_store', 'augment'):
+            if getattr(args, key):
+                config[key] = True
+
         processor = DatasetPipelineBuilder(config)
         results = processor.process()
-        
+
         print(json.dumps(results, indent=2))
         sys.exit(0)
-        
+
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         sys.exit(1)
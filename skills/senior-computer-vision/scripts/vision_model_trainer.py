@@ -2,15 +2,37 @@
 """
 Vision Model Trainer
 Production-grade tool for senior computer vision engineer
+
+CPU training loop for an image classifier (a NumPy MLP, softmax when
+hidden=0) on either a tensor store written by dataset_pipeline_builder.py
+(tensors/images.npy + labels.npy, read through a memmap) or an image
+directory with class sub-folders (decoded and resized on the fly).
+
+PrefetchLoader keeps `prefetch` batch slots in one shared-memory block.
+Worker processes fill free slots (read or decode, flip, normalize) while the
+model trains on a filled one, so no batch is pickled between processes and
+the step only waits when the workers fall behind. Every step records its
+data-wait time (blocked on the loader) and compute time (forward, backward,
+update) separately, to tell an input-bound run from a compute-bound one.
+
+Checkpoints (<output>/checkpoint.npz) are written atomically every
+checkpoint_every steps, at each epoch end and on Ctrl-C (after the current
+step finishes; a second Ctrl-C aborts at once). The sample order
+of an epoch is a pure function of (seed, epoch), so a run resumes at the exact
+step where the checkpoint was taken, mid-epoch included.
 """
 
 import os
 import sys
 import json
+import time
 import logging
 import argparse
+import signal
+import multiprocessing as mp
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 logging.basicConfig(
@@ -19,79 +41,560 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+DEFAULT_CONFIG = {
+    'epochs': 3,
+    'batch_size': 64,
+    'workers': max(1, (os.cpu_count() or 2) - 1),   # 0 loads batches in the training process
+    'prefetch': 4,              # shared-memory batch slots; workers run at most this far ahead
+    'image_size': 64,           # square size image directories are decoded to (tensor stores keep theirs)
+    'hidden': 256,              # MLP hidden units; 0 trains a linear softmax classifier
+    'learning_rate': 0.01,
+    'momentum': 0.9,
+    'weight_decay': 1e-4,
+    'augment': True,            # random horizontal flip
+    'checkpoint_every': 100,    # steps between checkpoints
+    'resume': True,             # continue from <output>/checkpoint.npz if present
+    'max_steps': None,          # stop after this many total steps (the checkpoint allows resuming)
+    'log_every': 20,
+    'input_bound_fraction': 0.2,  # data wait above this share of step time -> input-bound
+    'seed': 0,
+    'mean': [0.485, 0.456, 0.406],
+    'std': [0.229, 0.224, 0.225],
+}
+
+CHECKPOINT_VERSION = 1
+
+_DONE = None
+
+
+def open_source(root: str, image_size: int) -> Dict:
+    """
+    Describe a training set: a tensor store (tensors.json) or class sub-folders of images.
+
+    Returns a picklable spec with the sample shape, class names and, for image
+    directories, the (path, label) list; unlabeled tensor-store samples are skipped.
+    """
+    import numpy as np
+
+    for meta_path in (os.path.join(root, 'tensors', 'tensors.json'), os.path.join(root, 'tensors.json')):
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            store_dir = os.path.dirname(meta_path)
+            labels = np.load(os.path.join(store_dir, meta['labels']))
+            return {
+                'kind': 'tensors',
+                'images': os.path.join(store_dir, meta['images']),
+                'indices': np.flatnonzero(labels >= 0),
+                'labels': labels,
+                'shape': meta['shape'][1:],
+                'normalized': meta['normalized'],
+                'classes': meta['classes']
+            }
+
+    classes = sorted(d.name for d in Path(root).iterdir() if d.is_dir())
+    files = [(str(path), label) for label, name in enumerate(classes)
+             for path in sorted((Path(root) / name).rglob('*')) if path.suffix.lower() in IMAGE_EXTENSIONS]
+    return {
+        'kind': 'images',
+        'files': files,
+        'indices': np.arange(len(files)),
+        'labels': np.array([label for _, label in files], dtype=np.int64),
+        'shape': [image_size, image_size, 3],
+        'normalized': False,
+        'classes': classes
+    }
+
+
+def epoch_order(spec: Dict, seed: int, epoch: int):
+    """Sample indices of one epoch; deterministic in (seed, epoch) so resume can skip to any step"""
+    import numpy as np
+
+    return np.random.default_rng([seed, epoch]).permutation(spec['indices'])
+
+
+class BatchReader:
+    """Loads one batch of samples into a float32 NHWC array (runs inside loader workers)"""
+
+    def __init__(self, spec: Dict, mean: List[float], std: List[float], augment: bool):
+        import numpy as np
+
+        self.spec = spec
+        self.augment = augment
+        self.mean = np.asarray(mean, dtype=np.float32) * 255
+        self.inv_std = 1 / (np.asarray(std, dtype=np.float32) * 255)
+        self.images = None
+        if spec['kind'] == 'tensors':
+            self.images = np.load(spec['images'], mmap_mode='r')
+
+    def read(self, indices, out, labels_out, seed) -> None:
+        import numpy as np
+
+        if self.images is not None:
+            # Sorted reads walk the memmap forward; scatter back into batch order
+            order = np.argsort(indices)
+            out[order] = self.images[indices[order]]
+            if not self.spec['normalized']:
+                out -= self.mean
+                out *= self.inv_std
+        else:
+            from PIL import Image
+
+            size = self.spec['shape'][0]
+            for i, index in enumerate(indices):
+                with Image.open(self.spec['files'][index][0]) as img:
+                    img.draft('RGB', (size, size))
+                    out[i] = np.asarray(img.convert('RGB').resize((size, size), Image.BILINEAR), dtype=np.float32)
+            out -= self.mean
+            out *= self.inv_std
+        if self.augment:
+            flip = np.random.default_rng(seed).random(len(indices)) < 0.5
+            out[flip] = out[flip, :, ::-1]
+        labels_out[:] = self.spec['labels'][indices]
+
+
+def _loader_worker(shm_name: str, slots_shape: Tuple, spec: Dict, options: Dict, tasks, done):
+    """Loader process: fill the shared-memory slot named by each task, then report it"""
+    # Ctrl-C reaches the whole process group; the trainer decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    images, labels = _slot_arrays(shm, slots_shape)
+    try:
+        reader = BatchReader(spec, options['mean'], options['std'], options['augment'])
+        while True:
+            task = tasks.get()
+            if task is _DONE:
+                return
+            slot, batch_id, indices, seed = task
+            try:
+                reader.read(indices, images[slot, :len(indices)], labels[slot, :len(indices)], seed)
+                done.put((slot, batch_id, len(indices), None))
+            except Exception as e:
+                done.put((slot, batch_id, 0, f"{type(e).__name__}: {e}"))
+    finally:
+        del images, labels
+        shm.close()
+
+
+def _slot_arrays(shm, slots_shape: Tuple):
+    """(slots, B, H, W, C) float32 images followed by (slots, B) int64 labels in one buffer"""
+    import numpy as np
+
+    images = np.ndarray(slots_shape, dtype=np.float32, buffer=shm.buf)
+    labels = np.ndarray(slots_shape[:2], dtype=np.int64, buffer=shm.buf, offset=images.nbytes)
+    return images, labels
+
+
+class PrefetchLoader:
+    """
+    Multi-process batch loader over a ring of shared-memory slots.
+
+    iterate() yields (images, labels) views into a slot; the slot is handed
+    back to the workers when the caller asks for the next batch, so a
+    yielded batch is valid until then.
+    """
+
+    def __init__(self, spec: Dict, batch_size: int, workers: int, prefetch: int, options: Dict):
+        import numpy as np
+
+        self.spec = spec
+        self.batch_size = batch_size
+        self.workers = workers
+        self.prefetch = max(1, prefetch)
+        self.options = options
+        self.slots_shape = (self.prefetch, batch_size, *spec['shape'])
+        nbytes = int(np.prod(self.slots_shape)) * 4 + self.prefetch * batch_size * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.images, self.labels = _slot_arrays(self.shm, self.slots_shape)
+        self.pool = []
+        self.reader = None
+        if workers > 0:
+            self.tasks = mp.Queue()
+            self.done = mp.Queue()
+            self.pool = [mp.Process(target=_loader_worker, daemon=True,
+                                    args=(self.shm.name, self.slots_shape, spec, options, self.tasks, self.done))
+                         for _ in range(workers)]
+            for process in self.pool:
+                process.start()
+        else:
+            self.reader = BatchReader(spec, options['mean'], options['std'], options['augment'])
+
+    def steps_per_epoch(self) -> int:
+        return -(-len(self.spec['indices']) // self.batch_size)
+
+    def iterate(self, epoch: int, start_step: int = 0):
+        """Yield (step, images, labels) for one epoch from start_step, in order"""
+        order = epoch_order(self.spec, int(self.options['seed']), epoch)
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        seed = lambda step: (int(self.options['seed']), epoch, step)
+
+        if self.reader is not None:
+            for step in range(start_step, len(batches)):
+                count = len(batches[step])
+                self.reader.read(batches[step], self.images[0, :count], self.labels[0, :count], seed(step))
+                yield step, self.images[0, :count], self.labels[0, :count]
+            return
+
+        free = list(range(self.prefetch))
+        next_submit = start_step
+        ready = {}
+        in_flight = 0
+        try:
+            for step in range(start_step, len(batches)):
+                while free and next_submit < len(batches):
+                    self.tasks.put((free.pop(), next_submit, batches[next_submit], seed(next_submit)))
+                    next_submit += 1
+                    in_flight += 1
+                # Workers finish out of order; hold early batches until their turn
+                while step not in ready:
+                    slot, batch_id, count, error = self.done.get()
+                    in_flight -= 1
+                    if error:
+                        raise RuntimeError(f"Loader worker failed on batch {batch_id}: {error}")
+                    ready[batch_id] = (slot, count)
+                slot, count = ready.pop(step)
+                yield step, self.images[slot, :count], self.labels[slot, :count]
+                free.append(slot)
+        finally:
+            # Drain batches still in flight so their slots are not written during the next epoch
+            for _ in range(in_flight):
+                self.done.get()
+
+    def close(self):
+        for _ in self.pool:
+            self.tasks.put(_DONE)
+        for process in self.pool:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        del self.images, self.labels
+        self.shm.close()
+        self.shm.unlink()
+
+
+class MLPClassifier:
+    """NumPy MLP (one ReLU hidden layer, or softmax regression) trained with SGD + momentum"""
+
+    def __init__(self, inputs: int, classes: int, hidden: int, seed: int = 0):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        sizes = [inputs, hidden, classes] if hidden else [inputs, classes]
+        self.params = {}
+        for layer, (fan_in, fan_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            self.params[f'W{layer}'] = (rng.standard_normal((fan_in, fan_out)) * np.sqrt(2 / fan_in)).astype(np.float32)
+            self.params[f'b{layer}'] = np.zeros(fan_out, dtype=np.float32)
+        self.velocity = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self.layers = len(sizes) - 1
+
+    def step(self, images, labels, learning_rate: float, momentum: float, weight_decay: float) -> Tuple[float, int]:
+        """One SGD step on a batch; returns (mean loss, correct predictions)"""
+        import numpy as np
+
+        x = images.reshape(len(images), -1)
+        activations = [x]
+        for layer in range(self.layers):
+            x = x @ self.params[f'W{layer}'] + self.params[f'b{layer}']
+            if layer < self.layers - 1:
+                x = np.maximum(x, 0)
+            activations.append(x)
+
+        logits = x - x.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        rows = np.arange(len(labels))
+        loss = float(-np.log(np.maximum(probs[rows, labels], 1e-12)).mean())
+        correct = int((probs.argmax(axis=1) == labels).sum())
+
+        grad = probs
+        grad[rows, labels] -= 1
+        grad /= len(labels)
+        for layer in reversed(range(self.layers)):
+            inputs = activations[layer]
+            grads = {f'W{layer}': inputs.T @ grad, f'b{layer}': grad.sum(axis=0)}
+            if layer:
+                grad = (grad @ self.params[f'W{layer}'].T) * (inputs > 0)
+            for name, g in grads.items():
+                if name[0] == 'W':
+                    g += weight_decay * self.params[name]
+                self.velocity[name] *= momentum
+                self.velocity[name] -= learning_rate * g
+                self.params[name] += self.velocity[name]
+        return loss, correct
+
+
+def _summarize(values: List[float]) -> Dict:
+    import numpy as np
+
+    if not values:
+        return {'total_s': 0.0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0}
+    ms = np.asarray(values) * 1000
+    return {'total_s': round(float(ms.sum()) / 1000, 3), 'mean_ms': round(float(ms.mean()), 3),
+            'p50_ms': round(float(np.percentile(ms, 50)), 3), 'p95_ms': round(float(np.percentile(ms, 95)), 3)}
+
+
 class VisionModelTrainer:
     """Production-grade vision model trainer"""
-    
+
     def __init__(self, config: Dict):
-        self.config = config
+        self.config = {**DEFAULT_CONFIG, **config}
         self.results = {
             'status': 'initialized',
             'start_time': datetime.now().isoformat(),
             'processed_items': 0
         }
         logger.info(f"Initialized {self.__class__.__name__}")
-    
+
     def validate_config(self) -> bool:
         """Validate configuration"""
         logger.info("Validating configuration...")
-        # Add validation logic
+        if not self.config.get('input') or not os.path.isdir(self.config['input']):
+            raise ValueError(f"Input directory not found: {self.config.get('input')}")
+        if not self.config.get('output'):
+            raise ValueError("output directory is required")
+        for key in ('epochs', 'batch_size', 'prefetch', 'checkpoint_every', 'log_every', 'image_size'):
+            if int(self.config[key]) < 1:
+                raise ValueError(f"{key} must be a positive integer")
+        if int(self.config['workers']) < 0 or int(self.config['hidden']) < 0:
+            raise ValueError("workers and hidden must be >= 0")
         logger.info("Configuration validated")
         return True
-    
+
     def process(self) -> Dict:
         """Main processing logic"""
         logger.info("Starting processing...")
-        
+
         try:
             self.validate_config()
-            
+
             # Main processing
             result = self._execute()
-            
+            self.results.update(result)
+
             self.results['status'] = 'completed'
             self.results['end_time'] = datetime.now().isoformat()
-            
+
             logger.info("Processing completed successfully")
             return self.results
-            
+
         except Exception as e:
             self.results['status'] = 'failed'
             self.results['error'] = str(e)
             logger.error(f"Processing failed: {e}")
             raise
-    
+
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.config['output'], 'checkpoint.npz')
+
+    def _save_checkpoint(self, model: MLPClassifier, state: Dict):
+        """Write params, momentum and loop position to a temp file and rename it into place"""
+        import numpy as np
+
+        path = self._checkpoint_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        arrays = {**{f'param/{k}': v for k, v in model.params.items()},
+                  **{f'velocity/{k}': v for k, v in model.velocity.items()}}
+        meta = {'version': CHECKPOINT_VERSION, **state}
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _load_checkpoint(self, model: MLPClassifier, fingerprint: Dict) -> Optional[Dict]:
+        """Restore model and loop position from the checkpoint, if it matches this run"""
+        import numpy as np
+
+        path = self._checkpoint_path()
+        if not self.config['resume'] or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != CHECKPOINT_VERSION or meta.get('fingerprint') != fingerprint:
+                logger.warning(f"Ignoring {path}: written for a different dataset or model setup")
+                return None
+            for name in model.params:
+                model.params[name][...] = data[f'param/{name}']
+                model.velocity[name][...] = data[f'velocity/{name}']
+        return meta
+
     def _execute(self) -> Dict:
-        """Execute main logic"""
-        # Implementation here
-        return {'success': True}
+        """Train with prefetching, periodic checkpoints and data-wait vs compute timing per step"""
+        import numpy as np
+
+        config = self.config
+        os.makedirs(config['output'], exist_ok=True)
+        spec = open_source(config['input'], int(config['image_size']))
+        if not len(spec['indices']) or len(spec['classes']) < 2:
+            raise ValueError(f"Need labeled samples from at least 2 classes in {config['input']}")
+        seed = int(config['seed'])
+        model = MLPClassifier(int(np.prod(spec['shape'])), len(spec['classes']), int(config['hidden']), seed)
+        fingerprint = {'samples': int(len(spec['indices'])), 'shape': list(spec['shape']),
+                       'classes': spec['classes'], 'hidden': int(config['hidden']),
+                       'batch_size': int(config['batch_size']), 'seed': seed}
+
+        state = {'epoch': 0, 'step': 0, 'global_step': 0, 'fingerprint': fingerprint}
+        restored = self._load_checkpoint(model, fingerprint)
+        if restored:
+            state.update(epoch=restored['epoch'], step=restored['step'], global_step=restored['global_step'])
+            logger.info(f"Resumed from {self._checkpoint_path()} at epoch {state['epoch']} step {state['step']}")
+
+        loader = PrefetchLoader(spec, int(config['batch_size']), int(config['workers']), int(config['prefetch']),
+                                {'seed': seed, 'mean': config['mean'], 'std': config['std'],
+                                 'augment': bool(config['augment'])})
+        steps_per_epoch = loader.steps_per_epoch()
+        max_steps = config['max_steps']
+        logger.info(f"{spec['kind']} {config['input']}: {len(spec['indices'])} samples {spec['shape']}, "
+                    f"{len(spec['classes'])} classes, {steps_per_epoch} steps/epoch, "
+                    f"{config['workers']} loader workers x {loader.prefetch} slots")
+
+        steps_log = open(os.path.join(config['output'], 'steps.jsonl'), 'a', encoding='utf-8')
+        data_wait, compute, epochs = [], [], []
+        stopped = False
+        interrupted = []
+
+        def on_interrupt(signum, frame):
+            # Finish the step in progress so the checkpoint never holds half-updated weights
+            interrupted.append(signum)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+        start = time.perf_counter()
+        try:
+            while state['epoch'] < int(config['epochs']) and not stopped:
+                epoch = state['epoch']
+                loss_sum, correct, seen = 0.0, 0, 0
+                batches = loader.iterate(epoch, state['step'])
+                while True:
+                    t0 = time.perf_counter()
+                    batch = next(batches, None)
+                    t1 = time.perf_counter()
+                    if batch is None:
+                        break
+                    step, images, labels = batch
+                    loss, hits = model.step(images, labels, float(config['learning_rate']),
+                                            float(config['momentum']), float(config['weight_decay']))
+                    t2 = time.perf_counter()
+
+                    data_wait.append(t1 - t0)
+                    compute.append(t2 - t1)
+                    loss_sum += loss * len(labels)
+                    correct += hits
+                    seen += len(labels)
+                    self.results['processed_items'] += len(labels)
+                    state.update(step=step + 1, global_step=state['global_step'] + 1)
+                    steps_log.write(json.dumps({'epoch': epoch, 'step': step, 'global_step': state['global_step'],
+                                                'loss': round(loss, 5), 'data_wait_ms': round((t1 - t0) * 1000, 3),
+                                                'compute_ms': round((t2 - t1) * 1000, 3)}) + '\n')
+
+                    if state['global_step'] % int(config['log_every']) == 0:
+                        wait_ms = np.mean(data_wait[-int(config['log_every']):]) * 1000
+                        compute_ms = np.mean(compute[-int(config['log_every']):]) * 1000
+                        logger.info(f"epoch {epoch} step {step + 1}/{steps_per_epoch}: loss {loss:.4f}, "
+                                    f"data wait {wait_ms:.1f} ms, compute {compute_ms:.1f} ms "
+                                    f"({wait_ms / (wait_ms + compute_ms):.0%} waiting)")
+                    if state['global_step'] % int(config['checkpoint_every']) == 0:
+                        self._save_checkpoint(model, state)
+                    if interrupted or (max_steps and state['global_step'] >= int(max_steps)):
+                        stopped = True
+                        break
+
+                batches.close()
+                if state['step'] >= steps_per_epoch:
+                    state.update(epoch=epoch + 1, step=0)
+                self._save_checkpoint(model, state)
+                if seen:
+                    epochs.append({'epoch': epoch, 'samples': seen, 'loss': round(loss_sum / seen, 5),
+                                   'accuracy': round(correct / seen, 4)})
+                    logger.info(f"epoch {epoch}: loss {loss_sum / seen:.4f}, train accuracy {correct / seen:.3f}")
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+            steps_log.close()
+            loader.close()
+
+        if interrupted:
+            logger.info(f"Interrupted; checkpoint saved at epoch {state['epoch']} step {state['step']}")
+        elapsed = time.perf_counter() - start
+        wait_total, compute_total = sum(data_wait), sum(compute)
+        wait_share = wait_total / (wait_total + compute_total) if data_wait else 0.0
+        bottleneck = 'input' if wait_share > float(config['input_bound_fraction']) else 'compute'
+        logger.info(f"{len(data_wait)} steps in {elapsed:.1f}s: data wait {wait_total:.2f}s, compute "
+                    f"{compute_total:.2f}s ({wait_share:.0%} waiting) -> {bottleneck}-bound")
+
+        summary = {
+            'source': spec['kind'],
+            'samples': int(len(spec['indices'])),
+            'classes': spec['classes'],
+            'steps': len(data_wait),
+            'epoch': state['epoch'],
+            'step': state['step'],
+            'global_step': state['global_step'],
+            'finished': state['epoch'] >= int(config['epochs']),
+            'resumed': bool(restored),
+            'interrupted': bool(interrupted),
+            'elapsed_s': round(elapsed, 3),
+            'samples_per_s': round(self.results['processed_items'] / elapsed, 1) if elapsed else 0.0,
+            'data_wait': _summarize(data_wait),
+            'compute': _summarize(compute),
+            'data_wait_share': round(wait_share, 4),
+            'bottleneck': bottleneck,
+            'epochs': epochs,
+            'checkpoint': self._checkpoint_path()
+        }
+        with open(os.path.join(config['output'], 'training_summary.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return {'success': True, 'training': summary}
 
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
         description="Vision Model Trainer"
     )
-    parser.add_argument('--input', '-i', required=True, help='Input path')
-    parser.add_argument('--output', '-o', required=True, help='Output path')
+    parser.add_argument('--input', '-i', required=True,
+                        help='Tensor store (dataset_pipeline_builder.py --tensor-store output) or class-folder image directory')
+    parser.add_argument('--output', '-o', required=True, help='Output directory (checkpoint, steps.jsonl, summary)')
     parser.add_argument('--config', '-c', help='Configuration file')
+    parser.add_argument('--epochs', type=int, help=f"Epochs (default: {DEFAULT_CONFIG['epochs']})")
+    parser.add_argument('--batch-size', type=int, help=f"Batch size (default: {DEFAULT_CONFIG['batch_size']})")
+    parser.add_argument('--workers', type=int, help=f"Loader processes; 0 loads in-process (default: {DEFAULT_CONFIG['workers']})")
+    parser.add_argument('--prefetch', type=int, help=f"Shared-memory batch slots (default: {DEFAULT_CONFIG['prefetch']})")
+    parser.add_argument('--learning-rate', type=float, help=f"SGD learning rate (default: {DEFAULT_CONFIG['learning_rate']})")
+    parser.add_argument('--hidden', type=int, help=f"Hidden units, 0 for softmax regression (default: {DEFAULT_CONFIG['hidden']})")
+    parser.add_argument('--checkpoint-every', type=int,
+                        help=f"Steps between checkpoints (default: {DEFAULT_CONFIG['checkpoint_every']})")
+    parser.add_argument('--max-steps', type=int, help='Stop after this many total steps; rerun to resume')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore an existing checkpoint and start over')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
-    
+
     args = parser.parse_args()
-    
+
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
-    
+
     try:
-        config = {
+        config = {}
+        if args.config:
+            with open(args.config, 'r') as f:
+                config.update(json.load(f))
+        config.update({
             'input': args.input,
             'output': args.output
-        }
-        
+        })
+        for key in ('epochs', 'batch_size', 'workers', 'prefetch', 'learning_rate', 'hidden',
+                    'checkpoint_every', 'max_steps'):
+            if getattr(args, key) is not None:
+                config[key] = getattr(args, key)
+        if args.no_resume:
+            config['resume'] = False
+
         processor = VisionModelTrainer(config)
         results = processor.process()
-        
+
         print(json.dumps(results, indent=2))
         sys.exit(0)
-        
+
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         sys.exit(1)
@@ -0,0 +1,153 @@
+"""MicroBatcher must flush on size or age, shed load, and never leave a caller waiting."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from inference_optimizer import BatcherOverloaded, DeadlineExceeded, MicroBatcher
+
+
+class RecordingRunner:
+    """Sums each sample; records batch sizes and can hold every call until released."""
+
+    def __init__(self, block=False):
+        self.sizes = []
+        self.shapes = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, inputs):
+        self.release.wait(5)
+        self.sizes.append(len(inputs))
+        self.shapes.append(inputs.shape[1:])
+        if inputs.shape[1:] == (2, 2):
+            raise ValueError("model expects 3x3 inputs")
+        return inputs.reshape(len(inputs), -1).sum(axis=1)
+
+
+def _run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+
+def test_flushes_when_max_batch_requests_are_waiting():
+    runner = RecordingRunner()
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=4, max_wait_ms=2000)
+        await batcher.start()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.submit(np.full((3, 3), i)) for i in range(8)))
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        return results, elapsed
+
+    results, elapsed = _run(scenario())
+    assert results == [9 * i for i in range(8)]
+    assert runner.sizes == [4, 4]
+    assert elapsed < 1.0
+
+
+def test_flushes_a_partial_batch_after_max_wait():
+    runner = RecordingRunner()
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=16, max_wait_ms=50)
+        await batcher.start()
+        start = time.perf_counter()
+        result = await batcher.submit(np.ones((3, 3)))
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        return result, elapsed
+
+    result, elapsed = _run(scenario())
+    assert result == 9
+    assert runner.sizes == [1]
+    assert 0.04 <= elapsed < 1.0
+
+
+def test_rejects_requests_when_the_queue_is_full():
+    runner = RecordingRunner(block=True)
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=1, max_wait_ms=0, max_queue=2)
+        await batcher.start()
+        in_flight = asyncio.ensure_future(batcher.submit(np.ones((3, 3))))
+        await asyncio.sleep(0.05)  # first request is now held in the runner
+        queued = [asyncio.ensure_future(batcher.submit(np.ones((3, 3)))) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(BatcherOverloaded):
+            await batcher.submit(np.ones((3, 3)))
+        runner.release.set()
+        results = await asyncio.gather(in_flight, *queued)
+        await batcher.stop()
+        return results, batcher.stats
+
+    results, stats = _run(scenario())
+    assert results == [9, 9, 9]
+    assert stats['rejected'] == 1
+
+
+def test_request_fails_once_its_deadline_passes():
+    runner = RecordingRunner(block=True)
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=1, max_wait_ms=0)
+        await batcher.start()
+        in_flight = asyncio.ensure_future(batcher.submit(np.ones((3, 3))))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            await batcher.submit(np.ones((3, 3)), deadline_ms=30)
+        elapsed = time.perf_counter() - start
+        runner.release.set()
+        result = await in_flight
+        await batcher.stop()
+        return result, elapsed
+
+    result, elapsed = _run(scenario())
+    assert result == 9
+    assert elapsed < 1.0
+    assert runner.sizes == [1]  # the expired request never reached the model
+
+
+def test_mismatched_shapes_only_fail_their_own_requests():
+    runner = RecordingRunner()
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=8, max_wait_ms=20)
+        await batcher.start()
+        results = await asyncio.gather(batcher.submit(np.ones((3, 3))), batcher.submit(np.ones((2, 2))),
+                                       batcher.submit(np.ones((3, 3))), batcher.submit([[1, 2], [3]]),
+                                       return_exceptions=True)
+        later = await batcher.submit(np.ones((3, 3)))
+        await batcher.stop()
+        return results, later
+
+    (first, mismatched, third, ragged), later = _run(scenario())
+    assert (first, third, later) == (9, 9, 9)
+    assert isinstance(mismatched, ValueError)
+    assert isinstance(ragged, ValueError)
+    assert runner.shapes[:2] == [(3, 3), (2, 2)]
+
+
+def test_stop_cancels_queued_and_in_flight_requests():
+    runner = RecordingRunner(block=True)
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch=1, max_wait_ms=0)
+        await batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit(np.ones((3, 3)))) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        threading.Timer(0.1, runner.release.set).start()  # lets the executor shut down
+        await batcher.stop()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await batcher.submit(np.ones((3, 3)))
+        return results
+
+    results = _run(scenario())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)